@@ -0,0 +1 @@
+# Lets Python know this folder has code it can use.
@@ -0,0 +1,180 @@
+# backend/api/loadtest.py
+#
+# Load test for the JSON API. Start a local server first, e.g.
+#   FITNESS_DB_PATH=/tmp/fitness.db USERS_DB_PATH=/tmp/users.db python -m backend.api.server --port 8080
+# then run:
+#   python -m backend.api.loadtest --port 8080 --connections 50 --duration 10
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class KeepAliveClient:
+    """Minimal HTTP/1.1 JSON client that reuses one connection for every request."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.token: Optional[str] = None
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload).encode() if payload is not None else b""
+        headers = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+            "Content-Type: application/json",
+        ]
+        if self.token:
+            headers.append(f"Authorization: Bearer {self.token}")
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        length = 0
+        closing = False
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+            elif name.lower() == "connection" and value.strip().lower() == "close":
+                closing = True
+        data = json.loads(await self.reader.readexactly(length)) if length else None
+
+        if closing:
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def _setup_user(host: str, port: int, seed_workouts: int) -> str:
+    """Creates a throwaway user with some workouts and returns a bearer token."""
+    client = KeepAliveClient(host, port)
+    username, password = f"loadtest-{uuid.uuid4().hex[:8]}", "loadtest"
+    await client.request("POST", "/signup", {"username": username, "password": password})
+    status, data = await client.request("POST", "/login", {"username": username, "password": password})
+    if status != 200:
+        raise RuntimeError(f"Login failed: {status} {data}")
+    client.token = data["token"]
+
+    for i in range(seed_workouts):
+        await client.request("POST", "/workouts", _sample_workout(i))
+    await client.close()
+    return client.token
+
+
+def _sample_workout(i: int) -> Dict[str, Any]:
+    return {
+        "type": "strength",
+        "date": (date.today() - timedelta(days=i)).isoformat(),
+        "name": f"Load test workout {i}",
+        "exercises": [
+            {"name": "Bench Press", "type": "strength", "sets": [{"reps": 5, "weight": 135.0 + i % 10}] * 3},
+            {"name": "Squat", "type": "strength", "sets": [{"reps": 5, "weight": 185.0}] * 3},
+        ],
+    }
+
+
+async def _worker(host: str, port: int, token: str, deadline: float, write_ratio: float,
+                  latencies: List[float], errors: List[int], worker_id: int):
+    client = KeepAliveClient(host, port)
+    client.token = token
+    paths = ["/workouts?limit=20", "/workouts?limit=20&offset=20", "/templates", "/stats", "/search?q=bench"]
+    n = 0
+    while time.perf_counter() < deadline:
+        # Spread writes evenly: every 1/write_ratio-th request of each worker is a POST
+        is_write = write_ratio > 0 and n % max(1, round(1 / write_ratio)) == 0
+        started = time.perf_counter()
+        try:
+            if is_write:
+                status, _ = await client.request("POST", "/workouts", _sample_workout(worker_id + n))
+            else:
+                status, _ = await client.request("GET", paths[n % len(paths)])
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status = 0
+            await client.close()
+        latencies.append(time.perf_counter() - started)
+        if status >= 400 or status == 0:
+            errors.append(status)
+        n += 1
+    await client.close()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load_test(host: str, port: int, connections: int, duration: float,
+                        write_ratio: float, seed_workouts: int) -> Dict[str, float]:
+    """
+    Drives the API with `connections` concurrent keep-alive clients for `duration` seconds.
+    Returns throughput and latency percentiles (milliseconds).
+    """
+    token = await _setup_user(host, port, seed_workouts)
+    latencies: List[float] = []
+    errors: List[int] = []
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _worker(host, port, token, deadline, write_ratio, latencies, errors, i)
+        for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running Fitness Tracker API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="fraction of requests that add a workout")
+    parser.add_argument("--seed-workouts", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(
+        args.host, args.port, args.connections, args.duration, args.write_ratio, args.seed_workouts,
+    ))
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"Requests:     {results['requests']} ({results['errors']} errors)")
+        print(f"Requests/sec: {results['requests_per_sec']:.1f}")
+        print(f"p50 latency:  {results['p50_ms']:.2f} ms")
+        print(f"p99 latency:  {results['p99_ms']:.2f} ms")
+        print(f"Max latency:  {results['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
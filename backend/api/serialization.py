@@ -0,0 +1,128 @@
+# backend/api/serialization.py
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+from backend.models import Workout, Template, Exercise, WorkoutSet
+
+
+class PayloadError(ValueError):
+    """Raised when a JSON payload can't be turned into a model object."""
+
+
+def workout_to_dict(workout: Workout) -> Dict[str, Any]:
+    """
+    Converts a Workout into a JSON-ready dict (dates as ISO strings).
+    """
+    return {
+        "id": workout.id,
+        "type": workout.type,
+        "date": workout.date.isoformat(),
+        "name": workout.name,
+        "exercises": [exercise_to_dict(ex) for ex in workout.exercises or []],
+        "duration_minutes": workout.duration_minutes,
+        "distance_mi": workout.distance_mi,
+    }
+
+
+def template_to_dict(template: Template) -> Dict[str, Any]:
+    """
+    Converts a Template into a JSON-ready dict.
+    """
+    return {
+        "id": template.id,
+        "name": template.name,
+        "type": template.type,
+        "exercises": [exercise_to_dict(ex) for ex in template.exercises or []],
+    }
+
+
+def exercise_to_dict(exercise: Exercise) -> Dict[str, Any]:
+    return {
+        "name": exercise.name,
+        "type": exercise.type,
+        "sets": None if exercise.sets is None else [{"reps": s.reps, "weight": s.weight} for s in exercise.sets],
+        "duration_minutes": exercise.duration_minutes,
+        "distance_mi": exercise.distance_mi,
+    }
+
+
+def workout_from_dict(data: Dict[str, Any], workout_id: Optional[str] = None) -> Workout:
+    """
+    Builds a Workout from a JSON payload. A new id is generated unless workout_id is given.
+    Raises PayloadError if required fields are missing or malformed.
+    """
+    if not isinstance(data, dict):
+        raise PayloadError("Workout must be a JSON object.")
+
+    try:
+        workout_date = date.fromisoformat(data["date"])
+    except KeyError:
+        raise PayloadError("Workout date is required.")
+    except (TypeError, ValueError):
+        raise PayloadError("Workout date must be an ISO date (YYYY-MM-DD).")
+
+    exercises = _exercises_from_list(data.get("exercises"))
+    workout = Workout.create(
+        type=data.get("type", ""),
+        date=workout_date,
+        name=_name(data, "Workout name"),
+        exercises=exercises or None,
+        duration_minutes=data.get("duration_minutes"),
+        distance_mi=data.get("distance_mi"),
+    )
+    if workout_id:
+        workout.id = workout_id
+    return workout
+
+
+def template_from_dict(data: Dict[str, Any]) -> Template:
+    """
+    Builds a new Template from a JSON payload.
+    Raises PayloadError if required fields are missing or malformed.
+    """
+    if not isinstance(data, dict):
+        raise PayloadError("Template must be a JSON object.")
+    name = _name(data, "Template name")
+    if not name:
+        raise PayloadError("Template name is required.")
+
+    return Template.create(
+        name=name,
+        type=data.get("type") or "mixed",
+        exercises=_exercises_from_list(data.get("exercises")),
+    )
+
+
+def _name(data: Dict[str, Any], label: str) -> str:
+    """data["name"] stripped ("" when missing or null); raises PayloadError if it isn't a string."""
+    name = data.get("name")
+    if name is None:
+        return ""
+    if not isinstance(name, str):
+        raise PayloadError(f"{label} must be a string.")
+    return name.strip()
+
+
+def _exercises_from_list(items: Any) -> List[Exercise]:
+    if items is None:
+        return []
+    if not isinstance(items, list):
+        raise PayloadError("Exercises must be a list.")
+
+    exercises = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise PayloadError(f"Exercise {i + 1} must be a JSON object.")
+        sets = item.get("sets")
+        if sets is not None:
+            if not isinstance(sets, list) or not all(isinstance(s, dict) for s in sets):
+                raise PayloadError(f"Exercise {i + 1}: sets must be a list of objects.")
+            sets = [WorkoutSet(reps=s.get("reps"), weight=s.get("weight")) for s in sets]
+        exercises.append(Exercise(
+            name=_name(item, f"Exercise {i + 1}: name"),
+            type=item.get("type", ""),
+            sets=sets,
+            duration_minutes=item.get("duration_minutes"),
+            distance_mi=item.get("distance_mi"),
+        ))
+    return exercises
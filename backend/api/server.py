@@ -0,0 +1,474 @@
+# backend/api/server.py
+#
+# Headless HTTP/JSON API over the backend for non-Streamlit clients (mobile app, scripts).
+# Run with:  python -m backend.api.server --port 8080
+
+import argparse
+import asyncio
+import json
+import re
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from backend.auth import login_user, signup_user
+from backend.db_users import init_db as init_user_db
+from backend.db_fitness.connection import init_db as init_fitness_db
+from backend.db_fitness.aio import AsyncFitnessDB
+from backend.filters import search_templates_by_name
+from backend.validators import validate_workouts
+from backend.api.serialization import (
+    PayloadError,
+    template_from_dict,
+    template_to_dict,
+    workout_from_dict,
+    workout_to_dict,
+)
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15.0  # seconds an idle keep-alive connection stays open
+TOKEN_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DEFAULT_CHART_WIDTH = 600
+MAX_IDEMPOTENCY_KEY = 200
+
+_REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    """Raised by handlers to return an error response."""
+
+    def __init__(self, status: int, message: str, details: Optional[Any] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.details = details
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+    params: Dict[str, str] = field(default_factory=dict)  # values captured from the route
+    username: Optional[str] = None  # set once the bearer token is verified
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Request body must be valid JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Request body must be a JSON object.")
+        return data
+
+
+class FitnessApi:
+    """
+    asyncio HTTP/1.1 server exposing workouts, templates, search and stats as JSON.
+    Fitness data goes through AsyncFitnessDB (one writer thread, `workers` reader threads);
+    the remaining blocking calls (users.db auth) run on a small thread pool.
+    """
+
+    def __init__(self, workers: int = 4):
+        self.db = AsyncFitnessDB(readers=workers)
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fitness-api-auth")
+        self.tokens: Dict[str, Tuple[str, float]] = {}  # token -> (username, expires_at)
+
+        # (method, path pattern, handler, requires auth)
+        self.routes: List[Tuple[str, "re.Pattern", Callable, bool]] = [
+            ("POST", re.compile(r"^/login$"), self.login, False),
+            ("POST", re.compile(r"^/signup$"), self.signup, False),
+            ("GET", re.compile(r"^/workouts$"), self.list_workouts, True),
+            ("POST", re.compile(r"^/workouts$"), self.create_workout, True),
+            ("GET", re.compile(r"^/workouts/(?P<workout_id>[^/]+)$"), self.get_workout, True),
+            ("PUT", re.compile(r"^/workouts/(?P<workout_id>[^/]+)$"), self.update_workout, True),
+            ("DELETE", re.compile(r"^/workouts/(?P<workout_id>[^/]+)$"), self.delete_workout, True),
+            ("GET", re.compile(r"^/templates$"), self.list_templates, True),
+            ("POST", re.compile(r"^/templates$"), self.create_template, True),
+            ("DELETE", re.compile(r"^/templates/(?P<template_id>[^/]+)$"), self.delete_template, True),
+            ("GET", re.compile(r"^/search$"), self.search, True),
+            ("GET", re.compile(r"^/stats$"), self.stats, True),
+            ("GET", re.compile(r"^/changes$"), self.changes, True),
+            ("GET", re.compile(r"^/progress$"), self.progress, True),
+        ]
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        print(f"[API] Serving on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.db.close()
+
+    async def run_blocking(self, func: Callable, *args):
+        """Runs a blocking backend call on the auth thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    # ------------------ HTTP plumbing ------------------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves requests on one connection until the client closes it, asks for
+        `Connection: close`, or stays idle longer than KEEP_ALIVE_TIMEOUT.
+        """
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    await self._write_response(writer, 431, {"error": _REASONS[431]}, keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+
+                try:
+                    request, keep_alive = self._parse_head(head)
+                    length = int(request.headers.get("content-length", "0"))
+                    if length > MAX_BODY_BYTES:
+                        raise HttpError(413, _REASONS[413])
+                    request.body = await reader.readexactly(length) if length else b""
+                except HttpError as e:
+                    await self._write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                except ValueError:
+                    await self._write_response(writer, 400, {"error": "Malformed request."}, keep_alive=False)
+                    break
+
+                status, payload = await self.dispatch(request)
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _parse_head(self, head: bytes) -> Tuple[Request, bool]:
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+
+        return Request(method=method.upper(), path=unquote(url.path), query=query, headers=headers, body=b""), keep_alive
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+    async def dispatch(self, request: Request) -> Tuple[int, Any]:
+        """
+        Routes a request to its handler and turns errors into JSON error responses.
+        """
+        path_matched = False
+        for method, pattern, handler, requires_auth in self.routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            path_matched = True
+            if method != request.method:
+                continue
+
+            request.params = match.groupdict()
+            try:
+                if requires_auth:
+                    request.username = self._authenticate(request)
+                return await handler(request)
+            except HttpError as e:
+                payload = {"error": e.message}
+                if e.details is not None:
+                    payload["details"] = e.details
+                return e.status, payload
+            except Exception as e:
+                print(f"[ERROR] {request.method} {request.path} failed: {e}")
+                return 500, {"error": _REASONS[500]}
+
+        if path_matched:
+            return 405, {"error": _REASONS[405]}
+        return 404, {"error": _REASONS[404]}
+
+    # ------------------ Auth ------------------
+
+    def _authenticate(self, request: Request) -> str:
+        """Returns the username for the request's bearer token, or raises 401."""
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        entry = self.tokens.get(token) if scheme.lower() == "bearer" else None
+        if entry is None or entry[1] < time.time():
+            self.tokens.pop(token, None)
+            raise HttpError(401, "Missing or expired token.")
+        return entry[0]
+
+    def _prune_tokens(self):
+        """Drops expired tokens (a token is otherwise only dropped when it is presented again)."""
+        now = time.time()
+        for token in [t for t, (_, expires_at) in self.tokens.items() if expires_at < now]:
+            del self.tokens[token]
+
+    async def login(self, request: Request):
+        username, password = _credentials(request)
+        if not await self.run_blocking(login_user, username, password):
+            raise HttpError(401, "Invalid credentials.")
+
+        token = secrets.token_urlsafe(32)
+        self._prune_tokens()
+        self.tokens[token] = (username, time.time() + TOKEN_TTL_SECONDS)
+        return 200, {"token": token, "expires_in": TOKEN_TTL_SECONDS}
+
+    async def signup(self, request: Request):
+        username, password = _credentials(request)
+        username = username.strip()
+        if not username or not password:
+            raise HttpError(400, "Username and password are required.")
+        if not await self.run_blocking(signup_user, username, password):
+            raise HttpError(409, "Username already exists.")
+        return 201, {"username": username}
+
+    # ------------------ Workouts ------------------
+
+    async def list_workouts(self, request: Request):
+        limit, offset = _page_params(request)
+        filters = _workout_filter_params(request)
+
+        total, items = await asyncio.gather(
+            self.db.count_workouts(request.username, *filters),
+            self.db.get_workouts_page(request.username, limit, offset, *filters),
+        )
+        return 200, _page([workout_to_dict(w) for w in items], total, limit, offset)
+
+    async def create_workout(self, request: Request):
+        workout = _workout_from_request(request)
+        stored_id = await self.db.add_workout(request.username, workout, _idempotency_key(request))
+        if stored_id != workout.id:
+            # Same content as a workout the user already has (e.g. a retried POST)
+            existing = await self.db.get_workout(request.username, stored_id)
+            return 200, workout_to_dict(existing or workout)
+        return 201, workout_to_dict(workout)
+
+    async def get_workout(self, request: Request):
+        workout = await self.db.get_workout(request.username, request.params["workout_id"])
+        if workout is None:
+            raise HttpError(404, "Workout not found.")
+        return 200, workout_to_dict(workout)
+
+    async def update_workout(self, request: Request):
+        workout_id = request.params["workout_id"]
+        if await self.db.get_workout(request.username, workout_id) is None:
+            raise HttpError(404, "Workout not found.")
+
+        workout = _workout_from_request(request, workout_id)
+        await self.db.update_workout(request.username, workout_id, workout)
+        return 200, workout_to_dict(workout)
+
+    async def delete_workout(self, request: Request):
+        workout_id = request.params["workout_id"]
+        if await self.db.get_workout(request.username, workout_id) is None:
+            raise HttpError(404, "Workout not found.")
+
+        await self.db.delete_workout(request.username, workout_id)
+        return 200, {"deleted": workout_id}
+
+    # ------------------ Templates ------------------
+
+    async def list_templates(self, request: Request):
+        limit, offset = _page_params(request)
+        templates = await self.db.get_templates(request.username)
+        templates = search_templates_by_name(templates, request.query.get("q"))
+        items = templates[offset:offset + limit]
+        return 200, _page([template_to_dict(t) for t in items], len(templates), limit, offset)
+
+    async def create_template(self, request: Request):
+        try:
+            template = template_from_dict(request.json())
+        except PayloadError as e:
+            raise HttpError(400, str(e))
+
+        await self.db.add_template(request.username, template, _idempotency_key(request))
+        return 201, template_to_dict(template)
+
+    async def delete_template(self, request: Request):
+        template_id = request.params["template_id"]
+        templates = await self.db.get_templates(request.username)
+        if not any(t.id == template_id for t in templates):
+            raise HttpError(404, "Template not found.")
+
+        await self.db.delete_template(template_id, request.username)
+        return 200, {"deleted": template_id}
+
+    # ------------------ Search & Stats ------------------
+
+    async def search(self, request: Request):
+        keyword = (request.query.get("q") or "").strip()
+        if not keyword:
+            raise HttpError(400, "Query parameter 'q' is required.")
+        limit, offset = _page_params(request)
+
+        total, items, templates = await asyncio.gather(
+            self.db.count_workouts(request.username, keyword=keyword),
+            self.db.get_workouts_page(request.username, limit, offset, keyword=keyword),
+            self.db.get_templates(request.username),
+        )
+        templates = search_templates_by_name(templates, keyword)
+        return 200, {
+            "workouts": _page([workout_to_dict(w) for w in items], total, limit, offset),
+            "templates": [template_to_dict(t) for t in templates],
+        }
+
+    async def stats(self, request: Request):
+        return 200, await self.db.get_workout_stats(request.username)
+
+    async def progress(self, request: Request):
+        """
+        Downsampled chart series for ?exercise= (see backend/db_fitness/progress.py):
+        metric=weight|reps|volume|duration|distance, mode=lttb|minmax, width in pixels,
+        optional start/end dates.
+        """
+        exercise = (request.query.get("exercise") or "").strip()
+        if not exercise:
+            raise HttpError(400, "Query parameter 'exercise' is required.")
+        start, end, _, _ = _workout_filter_params(request)
+        try:
+            width = int(request.query.get("width", DEFAULT_CHART_WIDTH))
+        except ValueError:
+            raise HttpError(400, "width must be an integer.")
+        try:
+            series = await self.db.get_progress_series(
+                request.username, exercise, request.query.get("metric", "weight"), start, end, width,
+                request.query.get("mode", "lttb"),
+            )
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        return 200, series
+
+    # ------------------ Changes ------------------
+
+    async def changes(self, request: Request):
+        """
+        The user's changes after ?since= (a seq from a previous response), so clients refresh
+        only what changed. Keep passing next_since until items comes back empty.
+        """
+        try:
+            since = int(request.query.get("since", 0))
+        except ValueError:
+            raise HttpError(400, "since must be an integer.")
+        limit, _ = _page_params(request)
+
+        changes = await self.db.get_changes(request.username, since, limit)
+        return 200, {
+            "items": [
+                {"seq": ch.seq, "entity": ch.entity, "id": ch.entity_id, "op": ch.op, "at": ch.created_at}
+                for ch in changes
+            ],
+            "next_since": changes[-1].seq if changes else since,
+        }
+
+
+def _page_params(request: Request) -> Tuple[int, int]:
+    """Reads limit/offset query parameters, clamping limit to MAX_PAGE_SIZE."""
+    try:
+        limit = int(request.query.get("limit", DEFAULT_PAGE_SIZE))
+        offset = int(request.query.get("offset", 0))
+    except ValueError:
+        raise HttpError(400, "limit and offset must be integers.")
+    if limit < 1 or offset < 0:
+        raise HttpError(400, "limit must be positive and offset non-negative.")
+    return min(limit, MAX_PAGE_SIZE), offset
+
+
+def _credentials(request: Request) -> Tuple[str, str]:
+    data = request.json()
+    username, password = data.get("username") or "", data.get("password") or ""
+    if not isinstance(username, str) or not isinstance(password, str):
+        raise HttpError(400, "Username and password must be strings.")
+    return username, password
+
+
+def _idempotency_key(request: Request) -> Optional[str]:
+    """The Idempotency-Key header: a client retrying a create sends the same key to avoid a duplicate."""
+    key = request.headers.get("idempotency-key") or None
+    if key is not None and len(key) > MAX_IDEMPOTENCY_KEY:
+        raise HttpError(400, f"Idempotency-Key must be at most {MAX_IDEMPOTENCY_KEY} characters.")
+    return key
+
+
+def _workout_filter_params(request: Request) -> Tuple[Optional[date], Optional[date], Optional[str], Optional[str]]:
+    """Reads start/end/type/q query parameters in get_workouts_page argument order."""
+    try:
+        start = date.fromisoformat(request.query["start"]) if "start" in request.query else None
+        end = date.fromisoformat(request.query["end"]) if "end" in request.query else None
+    except ValueError:
+        raise HttpError(400, "start and end must be ISO dates (YYYY-MM-DD).")
+    return start, end, request.query.get("type") or None, request.query.get("q") or None
+
+
+def _page(items: List[Any], total: int, limit: int, offset: int) -> Dict[str, Any]:
+    next_offset = offset + limit if offset + limit < total else None
+    return {"items": items, "total": total, "limit": limit, "offset": offset, "next_offset": next_offset}
+
+
+def _workout_from_request(request: Request, workout_id: Optional[str] = None):
+    """Parses and validates a workout payload, raising 400 with every validation error."""
+    try:
+        workout = workout_from_dict(request.json(), workout_id)
+    except PayloadError as e:
+        raise HttpError(400, str(e))
+
+    errors = validate_workouts([workout])
+    if errors:
+        details = [{"path": e.path, "message": e.message} for e in errors]
+        raise HttpError(400, errors[0].message, details)
+    return workout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fitness Tracker JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="reader threads for database calls")
+    args = parser.parse_args()
+
+    init_user_db()
+    init_fitness_db()
+
+    try:
+        asyncio.run(FitnessApi(workers=args.workers).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
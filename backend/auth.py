@@ -1,6 +1,8 @@
+import os  # For reading the admin list from the environment
 import sqlite3  # For interacting with the SQLite database
 import hashlib  # For hashing passwords
 from backend.db_users import get_connection  # Function to get a database connection to users.db
+from backend.instrumentation import instrumented  # Optional latency/row-count tracking
 
 
 # Hashes a given password using SHA-256 for secure storage
@@ -9,6 +11,7 @@ def hash_password(password: str) -> str:
 
 
 # Checks if a user with the given username already exists in the database
+@instrumented
 def user_exists(username: str) -> bool:
     conn = get_connection()
     c = conn.cursor()
@@ -20,6 +23,7 @@ def user_exists(username: str) -> bool:
 
 # Creates a new user if the username doesn't already exist
 # Returns True if created successfully, False otherwise
+@instrumented
 def create_user(username: str, password: str) -> bool:
     if user_exists(username):
         return False  # Username already exists
@@ -39,6 +43,7 @@ def create_user(username: str, password: str) -> bool:
 
 
 # Verifies that the provided password matches the stored password for the username
+@instrumented
 def authenticate_user(username: str, password: str) -> bool:
     hashed = hash_password(password)  # Hash the entered password for comparison
     conn = get_connection()
@@ -57,3 +62,10 @@ def login_user(username: str, password: str) -> bool:
 # Wrapper function for signing up — currently just calls create_user
 def signup_user(username: str, password: str) -> bool:
     return create_user(username, password)
+
+
+# Admins are listed in the FITNESS_ADMINS environment variable (comma-separated usernames)
+# and can open admin-only pages such as Diagnostics
+def is_admin(username: str) -> bool:
+    admins = {name.strip() for name in os.environ.get("FITNESS_ADMINS", "").split(",") if name.strip()}
+    return username in admins
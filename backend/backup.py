@@ -0,0 +1,287 @@
+# backend/backup.py
+#
+# Online backups of fitness.db and users.db through SQLite's backup API, so a copy is always
+# consistent even while the app is writing. Each snapshot is integrity-checked, gzip-compressed
+# and kept in a rotating set; any snapshot can be restored into the live database.
+#
+#   python -m backend.backup create --keep 14
+#   python -m backend.backup list
+#   python -m backend.backup restore fitness --at 2026-10-19T08:00
+#
+# Snapshots are named <database>-YYYYmmdd-HHMMSS.ffffff.db.gz (microseconds, so two taken in
+# the same second don't overwrite each other) and live in backend/.db/backups (or
+# FITNESS_BACKUP_DIR).
+
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.db_fitness import connection as fitness_connection
+from backend.db_fitness.sharding import fitness_databases
+from backend import db_users
+
+BACKUP_PAGES = 1024      # pages copied per backup step; progress is reported between steps
+KEEP_SNAPSHOTS = 7
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S.%f"
+LEGACY_TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S"   # snapshots named before microseconds were added
+PROGRESS_EVERY = 0.10    # print progress every 10%
+
+
+@dataclass
+class BackupReport:
+    database: str
+    snapshot: str
+    seconds: float
+    pages: int
+    steps: int
+    restarts: int
+    max_step_ms: float       # longest single step, i.e. the longest the source lock was held
+    raw_bytes: int
+    compressed_bytes: int
+    integrity: str
+
+
+def get_backup_dir() -> str:
+    backup_dir = os.environ.get("FITNESS_BACKUP_DIR")
+    if backup_dir:
+        return os.path.abspath(backup_dir)
+    return os.path.join(os.path.dirname(fitness_connection.get_db_path()), "backups")
+
+
+def databases() -> Dict[str, str]:
+    """users.db plus fitness.db, or every shard file when fitness data is sharded."""
+    return {**fitness_databases(), "users": db_users.get_db_path()}
+
+
+def backup_database(src_path: str, dest_path: str, pages: int = BACKUP_PAGES, label: str = "") -> Dict:
+    """Copies a live database to the file at dest_path (see copy_database)."""
+    dest = sqlite3.connect(dest_path)
+    try:
+        return copy_database(src_path, dest, pages, label)
+    finally:
+        dest.close()
+
+
+def copy_database(src_path: str, dest: sqlite3.Connection, pages: int = BACKUP_PAGES, label: str = "") -> Dict:
+    """
+    Copies a live database into an open connection in steps of `pages` pages.
+
+    In WAL mode the copy runs inside one read transaction: it sees a single snapshot, writers
+    carry on appending to the WAL, and the backup never has to restart. In rollback-journal mode
+    the read lock is released between steps so writers can get in, at the cost of restarting
+    if they change pages already copied.
+    """
+    src = sqlite3.connect(src_path)
+    stats = {"steps": 0, "restarts": 0, "max_step_ms": 0.0, "pages": 0}
+    last = {"remaining": None, "at": time.perf_counter(), "reported": 0.0}
+
+    def progress(status, remaining, total):
+        now = time.perf_counter()
+        stats["steps"] += 1
+        stats["pages"] = total
+        stats["max_step_ms"] = max(stats["max_step_ms"], (now - last["at"]) * 1000)
+        if last["remaining"] is not None and remaining > last["remaining"]:
+            stats["restarts"] += 1  # a writer changed the source mid-copy
+        last["remaining"], last["at"] = remaining, now
+
+        done = 1 - remaining / total if total else 1.0
+        if label and done - last["reported"] >= PROGRESS_EVERY:
+            last["reported"] = done
+            print(f"[BACKUP] {label}: {done:.0%} ({total - remaining}/{total} pages)")
+
+    try:
+        if src.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # pins the read snapshot
+        started = time.perf_counter()
+        last["at"] = started
+        src.backup(dest, pages=pages, progress=progress)
+        stats["seconds"] = time.perf_counter() - started
+    finally:
+        src.close()
+    return stats
+
+
+def check_integrity(db_path: str, full: bool = False) -> str:
+    """Returns "ok" or the first problem reported by quick_check (integrity_check with full=True)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        pragma = "integrity_check" if full else "quick_check"
+        return conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def create_snapshot(name: str, db_path: str, backup_dir: Optional[str] = None,
+                    keep: int = KEEP_SNAPSHOTS, full_check: bool = False) -> BackupReport:
+    """
+    Backs up one database into a new compressed snapshot and prunes all but the newest `keep`.
+    Raises RuntimeError (and keeps nothing) if the copy fails its integrity check.
+    """
+    backup_dir = backup_dir or get_backup_dir()
+    os.makedirs(backup_dir, exist_ok=True)
+    snapshot = os.path.join(backup_dir, f"{name}-{datetime.now().strftime(TIMESTAMP_FORMAT)}.db.gz")
+    raw_path = snapshot[:-3] + ".partial"
+
+    started = time.perf_counter()
+    try:
+        stats = backup_database(db_path, raw_path, label=name)
+        integrity = check_integrity(raw_path, full=full_check)
+        if integrity != "ok":
+            raise RuntimeError(f"backup of {name} failed integrity check: {integrity}")
+
+        raw_bytes = os.path.getsize(raw_path)
+        with open(raw_path, "rb") as raw, gzip.open(snapshot + ".tmp", "wb", compresslevel=6) as packed:
+            shutil.copyfileobj(raw, packed, 1024 * 1024)
+        os.replace(snapshot + ".tmp", snapshot)
+    finally:
+        for leftover in (raw_path, snapshot + ".tmp"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    report = BackupReport(
+        database=name,
+        snapshot=snapshot,
+        seconds=time.perf_counter() - started,
+        pages=stats["pages"],
+        steps=stats["steps"],
+        restarts=stats["restarts"],
+        max_step_ms=stats["max_step_ms"],
+        raw_bytes=raw_bytes,
+        compressed_bytes=os.path.getsize(snapshot),
+        integrity=integrity,
+    )
+    print(f"[BACKUP] {name}: {raw_bytes / 2**20:.1f} MB -> {report.compressed_bytes / 2**20:.1f} MB "
+          f"in {report.seconds:.2f} s (copy {stats['seconds']:.2f} s, longest step {report.max_step_ms:.1f} ms, "
+          f"{report.restarts} restarts)")
+
+    for old in list_snapshots(name, backup_dir)[keep:]:
+        os.remove(old)
+    return report
+
+
+def create_snapshots(keep: int = KEEP_SNAPSHOTS, full_check: bool = False) -> List[BackupReport]:
+    """Snapshots every database that exists."""
+    return [
+        create_snapshot(name, path, keep=keep, full_check=full_check)
+        for name, path in databases().items()
+        if os.path.exists(path)
+    ]
+
+
+def list_snapshots(name: Optional[str] = None, backup_dir: Optional[str] = None) -> List[str]:
+    """Snapshot paths for one database (or all), newest first."""
+    backup_dir = backup_dir or get_backup_dir()
+    if not os.path.isdir(backup_dir):
+        return []
+    found = [
+        os.path.join(backup_dir, f) for f in os.listdir(backup_dir)
+        if f.endswith(".db.gz") and (name is None or f.rsplit("-", 2)[0] == name)
+    ]
+    return sorted(found, key=snapshot_time, reverse=True)
+
+
+def snapshot_time(snapshot: str) -> datetime:
+    stamp = os.path.basename(snapshot)[:-len(".db.gz")].rsplit("-", 2)
+    stamp = f"{stamp[-2]}-{stamp[-1]}"
+    return datetime.strptime(stamp, TIMESTAMP_FORMAT if "." in stamp else LEGACY_TIMESTAMP_FORMAT)
+
+
+def find_snapshot(name: str, at: Optional[datetime] = None) -> Optional[str]:
+    """The newest snapshot of `name` taken at or before `at` (the newest overall if at is None)."""
+    for snapshot in list_snapshots(name):
+        if at is None or snapshot_time(snapshot) <= at:
+            return snapshot
+    return None
+
+
+def _decompress(snapshot: str) -> str:
+    raw_path = snapshot[:-3] + ".restore"
+    with gzip.open(snapshot, "rb") as packed, open(raw_path, "wb") as raw:
+        shutil.copyfileobj(packed, raw, 1024 * 1024)
+    return raw_path
+
+
+def verify_snapshot(snapshot: str, full: bool = True) -> str:
+    """Decompresses a snapshot to a temporary file and integrity-checks it."""
+    raw_path = _decompress(snapshot)
+    try:
+        return check_integrity(raw_path, full=full)
+    finally:
+        os.remove(raw_path)
+
+
+def restore_snapshot(snapshot: str, name: str, db_path: str):
+    """
+    Replaces the contents of a live database with a snapshot. The current state is
+    snapshotted first (as <name>-pre-restore) so a mistaken restore can be undone.
+    Open connections see the restored data on their next query.
+    """
+    raw_path = _decompress(snapshot)
+    try:
+        integrity = check_integrity(raw_path, full=True)
+        if integrity != "ok":
+            raise RuntimeError(f"snapshot {snapshot} is damaged: {integrity}")
+
+        if os.path.exists(db_path):
+            create_snapshot(f"{name}-pre-restore", db_path, keep=KEEP_SNAPSHOTS)
+
+        src = sqlite3.connect(raw_path)
+        dest = sqlite3.connect(db_path, timeout=30)
+        try:
+            src.backup(dest)  # takes the write lock once and copies every page
+        finally:
+            src.close()
+            dest.close()
+    finally:
+        os.remove(raw_path)
+    print(f"[BACKUP] Restored {db_path} from {os.path.basename(snapshot)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up and restore the Fitness Tracker databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="snapshot every database now")
+    create.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS, help="snapshots to keep per database")
+    create.add_argument("--full-check", action="store_true", help="run integrity_check instead of quick_check")
+
+    commands.add_parser("list", help="list snapshots, newest first")
+
+    verify = commands.add_parser("verify", help="integrity-check a snapshot file")
+    verify.add_argument("snapshot")
+
+    restore = commands.add_parser("restore", help="restore a database from a snapshot")
+    restore.add_argument("database", choices=sorted(databases()))
+    restore.add_argument("--snapshot", help="snapshot file (default: the newest)")
+    restore.add_argument("--at", help="restore the newest snapshot taken at or before this time (ISO format)")
+
+    args = parser.parse_args()
+
+    if args.command == "create":
+        create_snapshots(keep=args.keep, full_check=args.full_check)
+
+    elif args.command == "list":
+        for snapshot in list_snapshots():
+            print(f"{snapshot_time(snapshot).isoformat(sep=' ')}  "
+                  f"{os.path.getsize(snapshot) / 2**20:8.1f} MB  {os.path.basename(snapshot)}")
+
+    elif args.command == "verify":
+        print(verify_snapshot(args.snapshot))
+
+    elif args.command == "restore":
+        at = datetime.fromisoformat(args.at) if args.at else None
+        snapshot = args.snapshot or find_snapshot(args.database, at)
+        if snapshot is None:
+            parser.error(f"no snapshot of {args.database} found")
+        restore_snapshot(snapshot, args.database, databases()[args.database])
+
+
+if __name__ == "__main__":
+    main()
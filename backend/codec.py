@@ -0,0 +1,370 @@
+# backend/codec.py
+#
+# Compact binary encoding for the models in backend/models.py, for caches, exports and
+# passing workouts between processes without pickling nested dataclasses.
+#
+#   data = to_bytes(workout)            # also Template, Exercise, WorkoutSet, or a list of Workouts
+#   workout = from_bytes(data)
+#
+# Layout (little-endian):
+#
+#   header   b"FT", format version, kind, total set count, which set columns hold Nones
+#   objects  each workout/exercise/template as one fixed-size struct (string lengths, flags,
+#            optional numbers as a tag byte plus a float64, set count) followed by its strings;
+#            the flags also mark strings that are None rather than empty
+#   columns  every set in the document, in order: all reps (int32), then all weights (float64)
+#
+# Keeping the sets columnar means decoding casts the two columns once with memoryview instead
+# of unpacking set by set, and set_columns() hands out per-exercise views into them without
+# building any objects.
+
+import struct
+import sys
+from datetime import date
+from typing import Any, Iterator, List, Optional, Tuple, Union
+
+from backend.models import Workout, WorkoutSet, Exercise, Template
+
+MAGIC = b"FT"
+VERSION = 2
+
+KIND_WORKOUT = ord("W")
+KIND_TEMPLATE = ord("T")
+KIND_EXERCISE = ord("E")
+KIND_SET = ord("S")
+KIND_WORKOUT_LIST = ord("L")
+
+# magic, version, kind, total sets, None flags
+_HEADER = struct.Struct("<2sBBIB")
+_COUNT = struct.Struct("<I")
+# id, type and name lengths, date ordinal, duration, distance, flags, legacy set count
+_WORKOUT = struct.Struct("<HHHIBdBdBI")
+# name and type lengths, duration, distance, flags, set count
+_EXERCISE = struct.Struct("<HHBdBdBI")
+# id, name and type lengths, flags
+_TEMPLATE = struct.Struct("<HHHB")
+
+# Optional numbers: a tag, then the value as a float64 (ints up to 2**53 round-trip exactly)
+_NUM_NONE, _NUM_INT, _NUM_FLOAT = 0, 1, 2
+_MAX_EXACT_INT = 2**53
+
+# Flags for lists that are None rather than empty
+_HAS_EXERCISES = 1
+_HAS_SETS = 2
+# Flags for strings that are None rather than empty: the object's first, second, third string
+_NONE_STR = (4, 8, 16)
+
+# Reps of None are stored as this sentinel and weights of None as NaN; the header says
+# whether either occurs so decoding can skip the check
+_NO_REPS = -2**31
+_MAX_REPS = 2**31 - 1
+_NONE_REPS = 1
+_NONE_WEIGHTS = 2
+
+# memoryview.cast reads in native byte order; big-endian hosts unpack the columns instead
+_NATIVE_LITTLE = sys.byteorder == "little"
+
+
+class CodecError(ValueError):
+    """Raised for data that isn't a valid encoding (wrong magic, version or kind, truncated)."""
+
+
+# ------------------ Encoding ------------------
+
+def _utf8(value: Optional[str]) -> bytes:
+    raw = (value or "").encode("utf-8")
+    if len(raw) > 0xFFFF:
+        raise ValueError("strings longer than 65535 bytes can't be encoded")
+    return raw
+
+
+def _strings(*values: Optional[str]) -> Tuple[List[bytes], int]:
+    """The values encoded, and the _NONE_STR flags for those that are None."""
+    return [_utf8(v) for v in values], sum(flag for v, flag in zip(values, _NONE_STR) if v is None)
+
+
+def _invalid_set(sets: List[WorkoutSet]) -> str:
+    """Describes the first set that can't go in the reps/weights columns."""
+    for s in sets:
+        if s.reps is not None and not (isinstance(s.reps, int) and _NO_REPS < s.reps <= _MAX_REPS):
+            return f"reps must be integers from {_NO_REPS + 1} to {_MAX_REPS}, got {s.reps!r}"
+        if s.weight is not None and not isinstance(s.weight, (int, float)):
+            return f"weights must be numbers, got {s.weight!r}"
+    return ""
+
+
+def _num(value: Union[int, float, None]) -> Tuple[int, float]:
+    """An optional number (duration, distance) as (tag, float64); raises ValueError for anything else."""
+    if value is None:
+        return _NUM_NONE, 0.0
+    if isinstance(value, int):
+        if abs(value) > _MAX_EXACT_INT:
+            raise ValueError(f"integer {value} is too large to encode")
+        return _NUM_INT, float(value)
+    if not isinstance(value, float):
+        raise ValueError(f"durations and distances must be numbers, got {value!r}")
+    return _NUM_FLOAT, value
+
+
+class _Encoder:
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.sets: List[WorkoutSet] = []
+
+    def exercise(self, exercise: Exercise):
+        (name, type_), flags = _strings(exercise.name, exercise.type)
+        sets = exercise.sets
+        if sets is not None:
+            flags |= _HAS_SETS
+        self.parts.append(_EXERCISE.pack(
+            len(name), len(type_), *_num(exercise.duration_minutes), *_num(exercise.distance_mi),
+            flags, len(sets or ()),
+        ))
+        self.parts.append(name)
+        self.parts.append(type_)
+        if sets:
+            self.sets.extend(sets)
+
+    def exercises(self, exercises: List[Exercise]):
+        self.parts.append(_COUNT.pack(len(exercises)))
+        for exercise in exercises:
+            self.exercise(exercise)
+
+    def workout(self, workout: Workout):
+        (id_, type_, name), flags = _strings(workout.id, workout.type, workout.name)
+        sets = workout.sets
+        flags |= (_HAS_EXERCISES if workout.exercises is not None else 0) | (_HAS_SETS if sets is not None else 0)
+        self.parts.append(_WORKOUT.pack(
+            len(id_), len(type_), len(name), workout.date.toordinal(),
+            *_num(workout.duration_minutes), *_num(workout.distance_mi), flags, len(sets or ()),
+        ))
+        self.parts.append(id_)
+        self.parts.append(type_)
+        self.parts.append(name)
+        if sets:
+            self.sets.extend(sets)
+        if workout.exercises is not None:
+            self.exercises(workout.exercises)
+
+    def template(self, template: Template):
+        (id_, name, type_), flags = _strings(template.id, template.name, template.type)
+        if template.exercises is not None:
+            flags |= _HAS_EXERCISES
+        self.parts.append(_TEMPLATE.pack(len(id_), len(name), len(type_), flags))
+        self.parts.append(id_)
+        self.parts.append(name)
+        self.parts.append(type_)
+        if template.exercises is not None:
+            self.exercises(template.exercises)
+
+    def finish(self, kind: int) -> bytes:
+        n = len(self.sets)
+        reps = [_NO_REPS if s.reps is None else s.reps for s in self.sets]
+        weights = [float("nan") if s.weight is None else s.weight for s in self.sets]
+        nones = (_NONE_REPS if _NO_REPS in reps else 0) | (_NONE_WEIGHTS if None in (s.weight for s in self.sets) else 0)
+        # The None sentinel is a valid int32, so real reps equal to it need checking apart
+        if nones & _NONE_REPS and _NO_REPS in (s.reps for s in self.sets):
+            raise ValueError(f"can't encode sets: {_invalid_set(self.sets)}")
+        try:
+            columns = [struct.pack(f"<{n}i", *reps), struct.pack(f"<{n}d", *weights)]
+        except struct.error as e:
+            raise ValueError(f"can't encode sets: {_invalid_set(self.sets) or e}") from None
+        return b"".join([_HEADER.pack(MAGIC, VERSION, kind, n, nones), *self.parts, *columns])
+
+
+def to_bytes(obj: Union[Workout, Template, Exercise, WorkoutSet, List[Workout]]) -> bytes:
+    """Encodes a Workout, Template, Exercise, WorkoutSet or list of Workouts."""
+    encoder = _Encoder()
+    if isinstance(obj, Workout):
+        kind = KIND_WORKOUT
+        encoder.workout(obj)
+    elif isinstance(obj, Template):
+        kind = KIND_TEMPLATE
+        encoder.template(obj)
+    elif isinstance(obj, Exercise):
+        kind = KIND_EXERCISE
+        encoder.exercise(obj)
+    elif isinstance(obj, WorkoutSet):
+        kind = KIND_SET
+        encoder.sets.append(obj)
+    elif isinstance(obj, list):
+        kind = KIND_WORKOUT_LIST
+        encoder.parts.append(_COUNT.pack(len(obj)))
+        for workout in obj:
+            encoder.workout(workout)
+    else:
+        raise TypeError(f"can't encode {type(obj).__name__}")
+    return encoder.finish(kind)
+
+
+# ------------------ Decoding ------------------
+
+def _text(buf: memoryview, pos: int, length: int, is_none: int) -> Optional[str]:
+    return None if is_none else str(buf[pos:pos + length], "utf-8")
+
+
+def _value(tag: int, value: float) -> Union[int, float, None]:
+    if tag == _NUM_NONE:
+        return None
+    return int(value) if tag == _NUM_INT else value
+
+
+def _open(data: Union[bytes, bytearray, memoryview]) -> Tuple[memoryview, int, Any, Any, int]:
+    """(buffer, kind, reps view, weights view, None flags) after checking the header."""
+    buf = memoryview(data).cast("B")
+    if len(buf) < _HEADER.size:
+        raise CodecError("truncated data")
+    magic, version, kind, n, nones = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise CodecError("not an encoded fitness object")
+    if version != VERSION:
+        raise CodecError(f"unsupported format version {version}")
+    if kind not in (KIND_WORKOUT, KIND_TEMPLATE, KIND_EXERCISE, KIND_SET, KIND_WORKOUT_LIST):
+        raise CodecError(f"unknown kind {kind}")
+
+    columns_start = len(buf) - 12 * n
+    if columns_start < _HEADER.size:
+        raise CodecError("truncated data")
+    reps, weights = buf[columns_start:columns_start + 4 * n], buf[columns_start + 4 * n:]
+    if _NATIVE_LITTLE:
+        reps, weights = reps.cast("i"), weights.cast("d")
+    else:
+        reps, weights = struct.unpack(f"<{n}i", reps), struct.unpack(f"<{n}d", weights)
+    return buf, kind, reps, weights, nones
+
+
+class _Decoder:
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self.buf, self.kind, reps, weights, nones = _open(data)
+        self.pos = _HEADER.size
+        self.end = len(self.buf) - 12 * len(reps)
+
+        # Build every set at once from the columns; objects then take consecutive slices
+        if nones:
+            self.sets = [
+                WorkoutSet(None if r == _NO_REPS else r, None if w != w else w)
+                for r, w in zip(reps.tolist() if _NATIVE_LITTLE else reps, weights.tolist() if _NATIVE_LITTLE else weights)
+            ]
+        elif _NATIVE_LITTLE:
+            self.sets = list(map(WorkoutSet, reps.tolist(), weights.tolist()))
+        else:
+            self.sets = list(map(WorkoutSet, reps, weights))
+        self.next_set = 0
+
+    def take_sets(self, n: int) -> List[WorkoutSet]:
+        start = self.next_set
+        self.next_set = start + n
+        return self.sets[start:start + n]
+
+    def exercise(self) -> Exercise:
+        buf, pos = self.buf, self.pos
+        name_len, type_len, dur_tag, dur, dist_tag, dist, flags, n = _EXERCISE.unpack_from(buf, pos)
+        pos += _EXERCISE.size
+        name = _text(buf, pos, name_len, flags & _NONE_STR[0])
+        pos += name_len
+        type_ = _text(buf, pos, type_len, flags & _NONE_STR[1])
+        self.pos = pos + type_len
+        sets = self.take_sets(n) if flags & _HAS_SETS else None
+        return Exercise(name, type_, sets, _value(dur_tag, dur), _value(dist_tag, dist))
+
+    def exercises(self) -> List[Exercise]:
+        (count,) = _COUNT.unpack_from(self.buf, self.pos)
+        self.pos += _COUNT.size
+        return [self.exercise() for _ in range(count)]
+
+    def workout(self) -> Workout:
+        buf, pos = self.buf, self.pos
+        id_len, type_len, name_len, ordinal, dur_tag, dur, dist_tag, dist, flags, n = _WORKOUT.unpack_from(buf, pos)
+        pos += _WORKOUT.size
+        workout_id = _text(buf, pos, id_len, flags & _NONE_STR[0])
+        pos += id_len
+        type_ = _text(buf, pos, type_len, flags & _NONE_STR[1])
+        pos += type_len
+        name = _text(buf, pos, name_len, flags & _NONE_STR[2])
+        self.pos = pos + name_len
+        sets = self.take_sets(n) if flags & _HAS_SETS else None
+        exercises = self.exercises() if flags & _HAS_EXERCISES else None
+        return Workout(workout_id, type_, date.fromordinal(ordinal), name, sets, exercises,
+                       _value(dur_tag, dur), _value(dist_tag, dist))
+
+    def template(self) -> Template:
+        buf, pos = self.buf, self.pos
+        id_len, name_len, type_len, flags = _TEMPLATE.unpack_from(buf, pos)
+        pos += _TEMPLATE.size
+        template_id = _text(buf, pos, id_len, flags & _NONE_STR[0])
+        pos += id_len
+        name = _text(buf, pos, name_len, flags & _NONE_STR[1])
+        pos += name_len
+        type_ = _text(buf, pos, type_len, flags & _NONE_STR[2])
+        self.pos = pos + type_len
+        exercises = self.exercises() if flags & _HAS_EXERCISES else None
+        return Template(template_id, name, type_, exercises)
+
+    def workout_list(self) -> List[Workout]:
+        (count,) = _COUNT.unpack_from(self.buf, self.pos)
+        self.pos += _COUNT.size
+        return [self.workout() for _ in range(count)]
+
+
+def from_bytes(data: Union[bytes, bytearray, memoryview]) -> Union[Workout, Template, Exercise, WorkoutSet, List[Workout]]:
+    """Decodes anything to_bytes produced."""
+    decoder = _Decoder(data)
+    kind = decoder.kind
+    try:
+        if kind == KIND_WORKOUT:
+            obj = decoder.workout()
+        elif kind == KIND_TEMPLATE:
+            obj = decoder.template()
+        elif kind == KIND_EXERCISE:
+            obj = decoder.exercise()
+        elif kind == KIND_WORKOUT_LIST:
+            obj = decoder.workout_list()
+        else:
+            obj = decoder.take_sets(1)[0] if len(decoder.sets) == 1 else None
+            if obj is None:
+                raise CodecError("a WorkoutSet encoding must hold exactly one set")
+    except (struct.error, ValueError) as e:
+        if isinstance(e, CodecError):
+            raise
+        # Cut-off buffers surface as short unpacks or cut-off UTF-8
+        raise CodecError(f"malformed data: {e}") from None
+    if decoder.pos != decoder.end or decoder.next_set != len(decoder.sets):
+        raise CodecError("encoded object doesn't match its length or set count")
+    return obj
+
+
+def set_columns(data: Union[bytes, bytearray, memoryview]) -> Iterator[Tuple[str, Any, Any]]:
+    """
+    Yields (exercise name, reps, weights) for every set list in an encoded Workout or list
+    of Workouts ("" as the name for a workout's legacy top-level sets), without building
+    model objects. reps and weights are views into data; None reps read as -2**31 and
+    None weights as NaN.
+    """
+    buf, kind, reps, weights, _ = _open(data)
+    if kind not in (KIND_WORKOUT, KIND_WORKOUT_LIST):
+        raise CodecError("set_columns needs an encoded Workout or list of Workouts")
+    pos = _HEADER.size
+    count = 1
+    if kind == KIND_WORKOUT_LIST:
+        (count,) = _COUNT.unpack_from(buf, pos)
+        pos += _COUNT.size
+
+    next_set = 0
+    for _ in range(count):
+        id_len, type_len, name_len, *_, flags, n = _WORKOUT.unpack_from(buf, pos)
+        pos += _WORKOUT.size + id_len + type_len + name_len
+        if flags & _HAS_SETS:
+            yield "", reps[next_set:next_set + n], weights[next_set:next_set + n]
+            next_set += n
+        if not flags & _HAS_EXERCISES:
+            continue
+        (exercises,) = _COUNT.unpack_from(buf, pos)
+        pos += _COUNT.size
+        for _ in range(exercises):
+            name_len, type_len, *_, ex_flags, n = _EXERCISE.unpack_from(buf, pos)
+            pos += _EXERCISE.size
+            name = _text(buf, pos, name_len, ex_flags & _NONE_STR[0])
+            pos += name_len + type_len
+            if ex_flags & _HAS_SETS:
+                yield name, reps[next_set:next_set + n], weights[next_set:next_set + n]
+                next_set += n
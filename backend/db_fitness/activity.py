@@ -0,0 +1,186 @@
+# backend/db_fitness/activity.py
+#
+# Per-user activity bitmap: one bit per day, set when the user has at least one workout that
+# day. Streaks, the calendar heatmap and active-day counts are a few big-integer bit
+# operations on it instead of a pass over every workout.
+#
+# Stored in activity_bitmaps as (origin, bits): bit i is the day origin + i (date ordinals),
+# bits as little-endian bytes. The workout write helpers keep it current; a user without a
+# row (existing data, or after a sync replaced their workouts) gets one built from the
+# workout tables on first read.
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from backend.db_fitness.connection import get_connection
+from backend.instrumentation import instrumented
+
+HEATMAP_WEEKS = 53
+
+
+@dataclass
+class Activity:
+    origin: int  # date ordinal of bit 0
+    bits: int
+
+    def _index(self, day: date) -> int:
+        return day.toordinal() - self.origin
+
+    def _window(self, start: int, length: int) -> int:
+        """Bits start .. start + length - 1 as an int (days before origin read as inactive)."""
+        if length <= 0:
+            return 0
+        shifted = self.bits >> start if start >= 0 else self.bits << -start
+        return shifted & ((1 << length) - 1)
+
+    def is_active(self, day: date) -> bool:
+        index = self._index(day)
+        return index >= 0 and bool(self.bits >> index & 1)
+
+    def active_days(self, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """Days with a workout between start and end inclusive (open-ended when None)."""
+        lo = self._index(start) if start else 0
+        hi = self._index(end) if end else self.bits.bit_length() - 1
+        lo = max(lo, 0)
+        return self._window(lo, hi - lo + 1).bit_count() if hi >= lo else 0
+
+    def current_streak(self, today: Optional[date] = None) -> int:
+        """Consecutive workout days ending today, or yesterday if today has no workout yet."""
+        end = self._index(today or date.today())
+        if end < 0:
+            return 0
+        if not self.bits >> end & 1:
+            end -= 1
+            if end < 0 or not self.bits >> end & 1:
+                return 0
+        mask = (1 << (end + 1)) - 1
+        gaps = ~self.bits & mask
+        # The highest inactive day at or before end bounds the streak
+        return end + 1 if not gaps else end - (gaps.bit_length() - 1)
+
+    def longest_streak(self) -> int:
+        runs = self.bits
+        if not runs:
+            return 0
+        # runs has bit i set when days i .. i + length - 1 are all active; double the length
+        # while any such run survives, then add halving steps to find the exact maximum
+        length = 1
+        while runs & (runs >> length):
+            runs &= runs >> length
+            length *= 2
+        step = length // 2
+        while step:
+            longer = runs & (runs >> step)
+            if longer:
+                runs, length = longer, length + step
+            step //= 2
+        return length
+
+    def heatmap(self, end: Optional[date] = None, weeks: int = HEATMAP_WEEKS) -> Tuple[date, List[List[bool]]]:
+        """
+        (first Monday, grid) for a calendar ending with the week of `end`: grid[weekday][week],
+        Monday first, like the Timeline's week grouping. Days after end read as inactive.
+        """
+        end = end or date.today()
+        first = end - timedelta(days=end.weekday(), weeks=weeks - 1)
+        days = (end - first).days + 1
+        window = self._window(self._index(first), days)
+        flags = format(window, f"0{weeks * 7}b")[::-1]
+        return first, [[flags[week * 7 + weekday] == "1" for week in range(weeks)] for weekday in range(7)]
+
+
+# ------------------ Cursor-level helpers ------------------
+
+def _store(c, username: str, activity: Activity):
+    c.execute(
+        "INSERT OR REPLACE INTO activity_bitmaps (username, origin, bits) VALUES (?, ?, ?)",
+        (username, activity.origin, activity.bits.to_bytes((activity.bits.bit_length() + 7) // 8, "little")),
+    )
+
+
+def _load_activity(c, username: str) -> Optional[Activity]:
+    c.execute("SELECT origin, bits FROM activity_bitmaps WHERE username = ?", (username,))
+    row = c.fetchone()
+    return Activity(row[0], int.from_bytes(row[1], "little")) if row else None
+
+
+def _build_activity(c, username: str) -> Activity:
+    """Builds and stores a user's bitmap from their hot and archived workout dates."""
+    c.execute("""
+        SELECT DISTINCT date FROM workouts WHERE username = ?
+        UNION SELECT date FROM archived_workouts WHERE username = ?
+    """, (username, username))
+    ordinals = [date.fromisoformat(row[0]).toordinal() for row in c.fetchall() if row[0]]
+    origin = min(ordinals) if ordinals else date.today().toordinal()
+    bits = 0
+    for ordinal in ordinals:
+        bits |= 1 << (ordinal - origin)
+    activity = Activity(origin, bits)
+    _store(c, username, activity)
+    return activity
+
+
+def _set_day(c, username: str, day: str, active: bool):
+    activity = _load_activity(c, username)
+    if activity is None:
+        return  # built with this write included on first read
+    ordinal = date.fromisoformat(day).toordinal()
+    if ordinal < activity.origin:
+        if not active:
+            return
+        activity = Activity(ordinal, activity.bits << (activity.origin - ordinal))
+    index = ordinal - activity.origin
+    bits = activity.bits | (1 << index) if active else activity.bits & ~(1 << index)
+    if bits != activity.bits:
+        _store(c, username, Activity(activity.origin, bits))
+
+
+def _mark_active(c, username: str, day: str):
+    """Records a workout on day (ISO date)."""
+    _set_day(c, username, day, True)
+
+
+def _refresh_day(c, username: str, day: Optional[str]):
+    """Re-reads whether the user still has a workout on day after one was moved or deleted."""
+    if not day:
+        return
+    c.execute("""
+        SELECT EXISTS (SELECT 1 FROM workouts WHERE username = ? AND date = ?)
+            OR EXISTS (SELECT 1 FROM archived_workouts WHERE username = ? AND date = ?)
+    """, (username, day, username, day))
+    _set_day(c, username, day, bool(c.fetchone()[0]))
+
+
+def _workout_day(c, username: str, workout_id: str) -> Optional[str]:
+    """The ISO date of one of the user's workouts, hot or archived."""
+    c.execute("""
+        SELECT date FROM workouts WHERE id = ? AND username = ?
+        UNION ALL SELECT date FROM archived_workouts WHERE id = ? AND username = ?
+    """, (workout_id, username, workout_id, username))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def _drop_activity(c, username: str):
+    """Forgets a user's bitmap so the next read rebuilds it (for bulk writes that bypass the helpers)."""
+    c.execute("DELETE FROM activity_bitmaps WHERE username = ?", (username,))
+
+
+# ------------------ Public API ------------------
+
+@instrumented
+def get_activity(username: str) -> Activity:
+    """The user's activity bitmap, built from their workouts the first time it is needed."""
+    conn = get_connection(username=username)
+    try:
+        c = conn.cursor()
+        activity = _load_activity(c, username)
+        if activity is None:
+            # Hold the write lock while building so a workout saved meanwhile isn't lost
+            c.execute("BEGIN IMMEDIATE")
+            activity = _load_activity(c, username) or _build_activity(c, username)
+            conn.commit()
+        return activity
+    finally:
+        conn.close()
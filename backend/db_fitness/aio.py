@@ -0,0 +1,323 @@
+# backend/db_fitness/aio.py
+#
+# Async facade over backend.db_fitness for event-loop code (the JSON API, concurrent jobs).
+#
+#   db = AsyncFitnessDB()
+#   page = await db.get_workouts_page("alice", limit=20)
+#   await db.add_workout("alice", workout)
+#   await db.close()
+
+import asyncio
+import os
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from backend.models import Workout, Template
+from backend.db_fitness.connection import get_connection, get_db_path
+from backend.db_fitness.history import AsyncPagedWorkouts, PagedWorkouts, memory_budget
+from backend.db_fitness.sharding import get_router, shard_path
+from backend.db_fitness import workouts as _workouts
+from backend.db_fitness import templates as _templates
+from backend.db_fitness import changes as _changes
+from backend.db_fitness import progress as _progress
+from backend.db_fitness.writes import (BUSY_TIMEOUT_MS, _drop_commit_hooks, _idempotent_write,
+                                       _run_commit_hooks, begin_immediate)
+
+
+class _DbExecutor:
+    """
+    A fixed set of threads, each holding one connection per database file it has served
+    (one file unsharded, one per shard otherwise). Jobs are cursor-level helpers from
+    workouts.py/templates.py; write jobs are committed, and rolled back if they raise.
+    """
+
+    def __init__(self, threads: int, name: str, read_only: bool):
+        self.read_only = read_only
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        # Metrics, guarded by _lock
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.max_queued = 0
+
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"fitness-db-{name}")
+
+    def _connection(self, db_path: str) -> sqlite3.Connection:
+        """This thread's connection to db_path, opened on first use."""
+        connections = self._local.__dict__.setdefault("connections", {})
+        conn = connections.get(db_path)
+        if conn is None:
+            conn = get_connection(db_path, check_same_thread=False)
+            if self.read_only:
+                conn.execute("PRAGMA busy_timeout = 5000")
+                conn.execute("PRAGMA query_only = ON")
+            else:
+                conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            connections[db_path] = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def run(self, db_path: str, func: Callable, *args):
+        """
+        Runs func(cursor, *args) against db_path on one of this executor's threads and returns its result.
+        If the awaiting task is cancelled, a job that hasn't started is dropped; a running
+        read is interrupted. A running write is left to finish so its transaction stays whole.
+        """
+        current: Dict[str, sqlite3.Connection] = {}
+
+        def job():
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            conn = self._connection(db_path)
+            current["conn"] = conn
+            try:
+                if not self.read_only:
+                    # Take the write lock up front, waiting with backoff while another process holds it
+                    begin_immediate(conn, getattr(func, "__name__", "write").lstrip("_"))
+                result = func(conn.cursor(), *args)
+                if not self.read_only:
+                    conn.commit()
+                    _run_commit_hooks()
+                return result
+            except BaseException:
+                if not self.read_only:
+                    _drop_commit_hooks()
+                conn.rollback()
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                current.pop("conn", None)
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = self._pool.submit(job)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+                    self.cancelled += 1
+            elif self.read_only and "conn" in current:
+                current["conn"].interrupt()
+            raise
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "max_queue_depth": self.max_queued,
+            }
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class AsyncFitnessDB:
+    """
+    Async versions of the backend.db_fitness functions.
+
+    Writes to a database file go through one dedicated writer thread, so they're serialized
+    without contending on SQLite's write lock. Reads run on a small pool of reader threads,
+    which WAL mode lets proceed in parallel with the writer.
+
+    With db_path given (or sharding off) everything goes to that one file. Otherwise each call
+    is routed to the user's shard: reader threads keep one connection per shard they have
+    served, and each shard's writes always land on the same one of `writers` writer threads,
+    so different shards are written in parallel.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, readers: int = 4, writers: Optional[int] = None):
+        self.db_path = db_path if db_path or get_router().sharded else get_db_path()
+        if writers is None:
+            writers = 1 if self.db_path else min(4, os.cpu_count() or 1)
+
+        self._wal_enabled: set = set()
+        self._wal_lock = threading.Lock()
+        if self.db_path:
+            self._enable_wal(self.db_path)
+
+        self._writers = [_DbExecutor(threads=1, name=f"writer{i}", read_only=False) for i in range(writers)]
+        self._readers = _DbExecutor(threads=readers, name="reader", read_only=True)
+
+    def _enable_wal(self, db_path: str):
+        # WAL must be enabled before readers and the writer open their connections
+        with self._wal_lock:
+            if db_path not in self._wal_enabled:
+                conn = get_connection(db_path)
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.close()
+                self._wal_enabled.add(db_path)
+
+    def _path(self, username: str) -> str:
+        if self.db_path:
+            return self.db_path
+        db_path = shard_path(username)
+        if db_path not in self._wal_enabled:
+            self._enable_wal(db_path)
+        return db_path
+
+    async def _write(self, username: str, func: Callable, *args):
+        db_path = self._path(username)
+        writer = self._writers[zlib.crc32(db_path.encode("utf-8")) % len(self._writers)]
+        return await writer.run(db_path, func, *args)
+
+    async def _read(self, username: str, func: Callable, *args):
+        return await self._readers.run(self._path(username), func, *args)
+
+    async def __aenter__(self) -> "AsyncFitnessDB":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Waits for queued jobs, then closes every connection."""
+        loop = asyncio.get_running_loop()
+        for writer in self._writers:
+            await loop.run_in_executor(None, writer.close)
+        await loop.run_in_executor(None, self._readers.close)
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        """Queue depth and job counters for the writer thread(s) and the reader pool."""
+        writer_metrics = [w.metrics() for w in self._writers]
+        merged = {key: sum(m[key] for m in writer_metrics) for key in writer_metrics[0]}
+        merged["max_queue_depth"] = max(m["max_queue_depth"] for m in writer_metrics)
+        return {"writer": merged, "readers": self._readers.metrics()}
+
+    # ------------------ Workouts ------------------
+
+    async def _keyed_write(self, username: str, idempotency_key: Optional[str], func: Callable, *args):
+        """A write that runs once per idempotency key (see backend/db_fitness/writes.py)."""
+        if idempotency_key is None:
+            return await self._write(username, func, *args)
+        return await self._write(username, _idempotent_write, username, idempotency_key, func, *args)
+
+    async def add_workout(self, username: str, workout: Workout, idempotency_key: Optional[str] = None) -> str:
+        return await self._keyed_write(username, idempotency_key, _workouts._add_workout, username, workout)
+
+    async def add_workouts(self, username: str, workouts: List[Workout],
+                           idempotency_key: Optional[str] = None) -> List[str]:
+        return await self._keyed_write(username, idempotency_key, _workouts._add_workouts, username, workouts)
+
+    async def update_workout(self, username: str, workout_id: str, workout: Workout,
+                             idempotency_key: Optional[str] = None):
+        await self._keyed_write(username, idempotency_key, _workouts._update_workout, username, workout_id, workout)
+
+    async def delete_workout(self, username: str, workout_id: str, idempotency_key: Optional[str] = None):
+        await self._keyed_write(username, idempotency_key, _workouts._delete_workout, username, workout_id)
+
+    async def get_all_workouts(self, username: str) -> Union[List[Workout], AsyncPagedWorkouts]:
+        """
+        Like workouts.get_all_workouts: a list in no particular order, or, over the memory
+        budget, an AsyncPagedWorkouts (newest first) whose pages are read by the reader pool.
+        """
+        workouts = await self._read(username, _workouts._get_all_workouts_within, username, memory_budget())
+        if isinstance(workouts, PagedWorkouts):  # nothing loaded yet; page through the pool instead
+            return AsyncPagedWorkouts(username, workouts.total, partial(self.get_workouts_page, username))
+        return workouts
+
+    async def get_workout(self, username: str, workout_id: str) -> Optional[Workout]:
+        return await self._read(username, _workouts._get_workout, username, workout_id)
+
+    async def get_workouts_page(
+        self,
+        username: str,
+        limit: int,
+        offset: int = 0,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        workout_type: Optional[str] = None,
+        keyword: Optional[str] = None,
+    ) -> List[Workout]:
+        return await self._read(
+            username, _workouts._get_workouts_page, username, limit, offset, start_date, end_date, workout_type, keyword,
+        )
+
+    async def count_workouts(
+        self,
+        username: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        workout_type: Optional[str] = None,
+        keyword: Optional[str] = None,
+    ) -> int:
+        return await self._read(
+            username, _workouts._count_workouts, username, start_date, end_date, workout_type, keyword,
+        )
+
+    async def get_workout_period_summaries(
+        self,
+        username: str,
+        period: str = "week",
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        workout_type: Optional[str] = None,
+    ) -> List[Tuple[str, int]]:
+        return await self._read(
+            username, _workouts._get_workout_period_summaries, username, period, start_date, end_date, workout_type,
+        )
+
+    async def get_workout_stats(self, username: str) -> Dict[str, object]:
+        return await self._read(username, _workouts._get_workout_stats, username)
+
+    # ------------------ Templates ------------------
+
+    async def add_template(self, username: str, template: Template, idempotency_key: Optional[str] = None):
+        await self._keyed_write(username, idempotency_key, _templates._add_template, username, template)
+
+    async def update_template(self, username: str, updated_template: Template, idempotency_key: Optional[str] = None):
+        await self._keyed_write(username, idempotency_key, _templates._update_template, username, updated_template)
+
+    async def delete_template(self, template_id: str, username: str, idempotency_key: Optional[str] = None):
+        await self._keyed_write(username, idempotency_key, _templates._delete_template, template_id, username)
+
+    async def get_templates(self, username: str) -> List[Template]:
+        return await self._read(username, _templates._get_templates, username)
+
+    # ------------------ Progress charts ------------------
+
+    async def get_progress_series(
+        self,
+        username: str,
+        exercise: str,
+        metric: str = "weight",
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        width: int = _progress.DEFAULT_WIDTH,
+        mode: str = "lttb",
+    ) -> Dict[str, object]:
+        return await self._read(
+            username, _progress._get_progress_series, username, exercise, metric, start_date, end_date, width, mode,
+        )
+
+    # ------------------ Changes ------------------
+
+    async def get_changes(self, username: str, since: int = 0, limit: int = _changes.DEFAULT_BATCH) -> List[_changes.Change]:
+        return await self._read(username, _changes._changes_since, since, limit, username)
@@ -0,0 +1,257 @@
+# backend/db_fitness/archive.py
+#
+# Hot/cold split for workout history. Workouts older than a horizon move out of the hot
+# tables (workouts, workout_exercises, exercise_sets) into archived_workouts: one row per
+# workout holding its exercises and sets as one zlib-compressed blob, plus the columns the
+# read queries filter and aggregate on. The hot tables and their indexes then only hold
+# recent months; the read functions in workouts.py include the archive only when a query's
+# date range reaches back past the archive horizon.
+#
+#   FITNESS_ARCHIVE_DAYS=365   archive workouts older than a year during maintenance
+#   python -m backend.db_fitness.archive run --days 365
+#   python -m backend.db_fitness.archive stats
+#
+# Editing an archived workout moves it back into the hot tables.
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+import zlib
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.db_fitness.connection import get_connection
+from backend.db_fitness.sharding import fitness_databases
+from backend.db_fitness.writes import begin_immediate
+
+PAYLOAD_VERSION = 1
+ARCHIVE_BATCH = 500  # workouts moved per transaction, so the app's writers wait briefly at most
+
+
+def archive_days() -> Optional[int]:
+    """The archive horizon in days from FITNESS_ARCHIVE_DAYS, or None when archiving is off."""
+    days = os.environ.get("FITNESS_ARCHIVE_DAYS")
+    return int(days) if days else None
+
+
+# ------------------ Payload ------------------
+# [[exercise_index, name, type, duration_minutes, distance_mi, [[reps, weight], ...]], ...]
+
+def _pack(exercise_rows: List[tuple], sets_by_index: Dict[int, List[Tuple[Any, Any]]]) -> bytes:
+    data = [list(row) + [[list(s) for s in sets_by_index.get(row[0], [])]] for row in exercise_rows]
+    body = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 6)
+    return bytes([PAYLOAD_VERSION]) + body
+
+
+def _unpack(payload: bytes) -> Tuple[List[tuple], Dict[int, List[Tuple[Any, Any]]]]:
+    """(exercise rows, sets by exercise index) in the shape of the hot tables' rows."""
+    if payload[0] != PAYLOAD_VERSION:
+        raise ValueError(f"unknown archive payload version {payload[0]}")
+    data = json.loads(zlib.decompress(payload[1:]))
+    exercise_rows = [tuple(item[:5]) for item in data]
+    sets_by_index = {item[0]: [tuple(s) for s in item[5]] for item in data if item[5]}
+    return exercise_rows, sets_by_index
+
+
+def _summary(exercise_rows: List[tuple], sets_by_index: Dict[int, List[Tuple[Any, Any]]]) -> tuple:
+    """(exercise_types, set_count, total_reps, total_volume, cardio_minutes, cardio_miles) for one workout."""
+    all_sets = [s for sets in sets_by_index.values() for s in sets]
+    cardio = [row for row in exercise_rows if row[2] == "cardio"]
+    types = sorted({row[2] for row in exercise_rows if row[2]})
+    return (
+        f",{','.join(types)}," if types else "",
+        len(all_sets),
+        sum(r for r, _ in all_sets if r is not None),
+        sum(r * w for r, w in all_sets if r is not None and w is not None),
+        sum(row[3] for row in cardio if row[3] is not None),
+        sum(row[4] for row in cardio if row[4] is not None),
+    )
+
+
+# ------------------ Cursor-level helpers ------------------
+
+def _archived_before(c) -> Optional[str]:
+    """ISO date before which workouts may be archived (None if nothing ever was)."""
+    c.execute("SELECT value FROM archive_meta WHERE key = 'archived_before'")
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def _archive_reached(c, start_date: Optional[date]) -> bool:
+    """Whether a query starting at start_date (None = no lower bound) needs the archive."""
+    horizon = _archived_before(c)
+    return horizon is not None and (start_date is None or start_date.isoformat() < horizon)
+
+
+def _archived_payloads(c, workout_ids: List[str]) -> Dict[str, bytes]:
+    placeholders = ", ".join("?" for _ in workout_ids)
+    c.execute(f"SELECT id, payload FROM archived_workouts WHERE id IN ({placeholders})", workout_ids)
+    return dict(c.fetchall())
+
+
+def _remove_archived(c, username: str, workout_id: str) -> bool:
+    c.execute("DELETE FROM archived_workouts WHERE id = ? AND username = ?", (workout_id, username))
+    return c.rowcount > 0
+
+
+def _archived_entity_rows(c, workout_id: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """An archived workout as the row dicts the hot tables would hold (used by sync)."""
+    c.execute("""
+        SELECT id, username, name, type, date, duration_minutes, distance_mi, updated_at, content_hash, payload
+        FROM archived_workouts WHERE id = ?
+    """, (workout_id,))
+    row = c.fetchone()
+    if row is None:
+        return None
+    exercise_rows, sets_by_index = _unpack(row[9])
+    names = ("id", "username", "name", "type", "date", "duration_minutes", "distance_mi", "updated_at", "content_hash")
+    return {
+        "workouts": [dict(zip(names, row[:9]))],
+        "workout_exercises": [
+            dict(zip(("workout_id", "exercise_index", "name", "type", "duration_minutes", "distance_mi"),
+                     (workout_id,) + ex))
+            for ex in exercise_rows
+        ],
+        "exercise_sets": [
+            {"workout_id": workout_id, "exercise_index": index, "set_number": j, "reps": reps, "weight": weight}
+            for index, sets in sets_by_index.items() for j, (reps, weight) in enumerate(sets)
+        ],
+    }
+
+
+def _archive_batch(c, cutoff: str, limit: int) -> int:
+    """Moves up to `limit` workouts dated before cutoff into the archive; returns how many."""
+    c.execute("""
+        SELECT id, username, name, type, date, duration_minutes, distance_mi, updated_at, content_hash
+        FROM workouts WHERE date < ? LIMIT ?
+    """, (cutoff, limit))
+    rows = c.fetchall()
+    if not rows:
+        return 0
+
+    ids = [row[0] for row in rows]
+    placeholders = ", ".join("?" for _ in ids)
+    c.execute(f"""
+        SELECT workout_id, exercise_index, name, type, duration_minutes, distance_mi
+        FROM workout_exercises WHERE workout_id IN ({placeholders}) ORDER BY workout_id, exercise_index
+    """, ids)
+    exercises: Dict[str, List[tuple]] = {}
+    for workout_id, *exercise in c.fetchall():
+        exercises.setdefault(workout_id, []).append(tuple(exercise))
+    c.execute(f"""
+        SELECT workout_id, exercise_index, reps, weight FROM exercise_sets
+        WHERE workout_id IN ({placeholders}) ORDER BY workout_id, exercise_index, set_number
+    """, ids)
+    sets: Dict[str, Dict[int, List[Tuple[Any, Any]]]] = {}
+    for workout_id, index, reps, weight in c.fetchall():
+        sets.setdefault(workout_id, {}).setdefault(index, []).append((reps, weight))
+
+    archived = []
+    for row in rows:
+        exercise_rows, sets_by_index = exercises.get(row[0], []), sets.get(row[0], {})
+        archived.append(row + _summary(exercise_rows, sets_by_index) + (_pack(exercise_rows, sets_by_index),))
+    c.executemany("""
+        INSERT OR REPLACE INTO archived_workouts
+            (id, username, name, type, date, duration_minutes, distance_mi, updated_at, content_hash,
+             exercise_types, set_count, total_reps, total_volume, cardio_minutes, cardio_miles, payload)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, archived)
+
+    c.execute(f"DELETE FROM exercise_sets WHERE workout_id IN ({placeholders})", ids)
+    c.execute(f"DELETE FROM workout_exercises WHERE workout_id IN ({placeholders})", ids)
+    c.execute(f"DELETE FROM workouts WHERE id IN ({placeholders})", ids)
+    return len(rows)
+
+
+# ------------------ Archiving ------------------
+
+def archive_connection(conn: sqlite3.Connection, before: date, batch: int = ARCHIVE_BATCH) -> int:
+    """
+    Archives every workout dated before `before` through an open connection, one short
+    transaction per batch. Returns the number of workouts moved.
+    Each transaction takes the write lock up front (writes.begin_immediate): a batch reads
+    before it writes, and under WAL a deferred one fails outright if another connection
+    commits in between.
+    """
+    cutoff = before.isoformat()
+    # Move the horizon first: a reader that sees the new horizon looks in the archive for
+    # anything older, so it never misses a workout that is moved while it reads
+    begin_immediate(conn, "archive")
+    conn.execute("""
+        INSERT INTO archive_meta (key, value) VALUES ('archived_before', ?)
+        ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)
+    """, (cutoff,))
+    conn.commit()
+
+    moved = 0
+    while True:
+        begin_immediate(conn, "archive")
+        try:
+            n = _archive_batch(conn.cursor(), cutoff, batch)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        moved += n
+        if n < batch:
+            return moved
+
+
+def archive_workouts(db_path: Optional[str] = None, days: int = 365, batch: int = ARCHIVE_BATCH) -> int:
+    """Archives workouts older than `days` days in one database file."""
+    started = time.perf_counter()
+    conn = get_connection(db_path)
+    try:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        moved = archive_connection(conn, date.today() - timedelta(days=days), batch)
+    finally:
+        conn.close()
+    print(f"[ARCHIVE] Archived {moved} workouts older than {days} days "
+          f"in {time.perf_counter() - started:.1f} s")
+    return moved
+
+
+def archive_stats(db_path: Optional[str] = None) -> Dict[str, object]:
+    conn = get_connection(db_path)
+    try:
+        c = conn.cursor()
+        hot = c.execute("SELECT COUNT(*) FROM workouts").fetchone()[0]
+        archived, payload_bytes = c.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM archived_workouts"
+        ).fetchone()
+        return {
+            "hot_workouts": hot,
+            "archived_workouts": archived,
+            "payload_kb": payload_bytes / 1024,
+            "archived_before": _archived_before(c),
+        }
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old workouts out of the hot tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="archive workouts older than the horizon")
+    run.add_argument("--days", type=int, default=archive_days() or 365)
+    run.add_argument("--batch", type=int, default=ARCHIVE_BATCH)
+
+    commands.add_parser("stats", help="hot and archived workouts per database")
+
+    args = parser.parse_args()
+
+    for name, path in fitness_databases().items():
+        if args.command == "run":
+            print(f"{name}:")
+            archive_workouts(path, args.days, args.batch)
+        elif args.command == "stats":
+            stats = archive_stats(path)
+            print(f"{name}: {stats['hot_workouts']} hot, {stats['archived_workouts']} archived "
+                  f"({stats['payload_kb']:.0f} KB of sets), horizon {stats['archived_before'] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# backend/db_fitness/changes.py
+#
+# Change log (outbox) for fitness data. Every write helper in workouts.py and templates.py
+# appends a row to change_log in the same transaction as the write itself, so the log never
+# misses a committed change and never records one that rolled back. Caches, aggregates and
+# exports read the log from their last position instead of reloading everything.
+#
+#   changes = read_changes("search-index", db_path)
+#   for change in changes: ...
+#   ack_changes("search-index", changes[-1].seq, db_path)
+#
+# Sequence numbers are per database file (per shard when FITNESS_SHARDS is set), so a
+# consumer keeps one position per file; consume_all() walks every file.
+
+import argparse
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from backend.db_fitness.connection import get_connection
+from backend.db_fitness.sharding import fitness_databases
+
+DEFAULT_BATCH = 500
+
+
+@dataclass
+class Change:
+    seq: int
+    entity: str      # "workout" or "template"
+    entity_id: str
+    username: str
+    op: str          # insert, update or delete
+    created_at: str
+
+
+# ------------------ Cursor-level helpers ------------------
+
+def _record_change(c, entity: str, entity_id: str, username: str, op: str):
+    """Appends one change inside the caller's transaction."""
+    c.execute(
+        "INSERT INTO change_log (entity, entity_id, username, op) VALUES (?, ?, ?, ?)",
+        (entity, entity_id, username, op),
+    )
+
+
+def _user_seq(c, username: str) -> Optional[int]:
+    """The user's latest change-log seq; any write of theirs moves it."""
+    c.execute("SELECT MAX(seq) FROM change_log WHERE username = ?", (username,))
+    return c.fetchone()[0]
+
+
+def _changes_since(c, since: int, limit: int, username: Optional[str] = None) -> List[Change]:
+    if username is None:
+        c.execute("""
+            SELECT seq, entity, entity_id, username, op, created_at FROM change_log
+            WHERE seq > ? ORDER BY seq LIMIT ?
+        """, (since, limit))
+    else:
+        c.execute("""
+            SELECT seq, entity, entity_id, username, op, created_at FROM change_log
+            WHERE username = ? AND seq > ? ORDER BY seq LIMIT ?
+        """, (username, since, limit))
+    return [Change(*row) for row in c.fetchall()]
+
+
+def _latest_seq(c) -> int:
+    # sqlite_sequence still holds the last seq after the log has been pruned empty
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    row = c.fetchone()
+    return row[0] if row else 0
+
+
+def _consumer_position(c, consumer: str) -> int:
+    c.execute("SELECT seq FROM change_consumers WHERE consumer = ?", (consumer,))
+    row = c.fetchone()
+    return row[0] if row else 0
+
+
+# ------------------ Reading changes ------------------
+
+def get_changes(since: int = 0, limit: int = DEFAULT_BATCH, username: Optional[str] = None,
+                db_path: Optional[str] = None) -> List[Change]:
+    """
+    Changes with seq > since, oldest first. With username (and no db_path) only that user's
+    changes, read from the user's shard.
+    """
+    conn = get_connection(db_path, username=username)
+    try:
+        return _changes_since(conn.cursor(), since, limit, username)
+    finally:
+        conn.close()
+
+
+def latest_seq(db_path: Optional[str] = None, username: Optional[str] = None) -> int:
+    """The newest seq in a database file (0 when nothing has changed yet)."""
+    conn = get_connection(db_path, username=username)
+    try:
+        return _latest_seq(conn.cursor())
+    finally:
+        conn.close()
+
+
+# ------------------ Named consumers ------------------
+
+def read_changes(consumer: str, db_path: Optional[str] = None, limit: int = DEFAULT_BATCH) -> List[Change]:
+    """The next batch of changes a consumer hasn't acknowledged yet."""
+    conn = get_connection(db_path)
+    try:
+        c = conn.cursor()
+        return _changes_since(c, _consumer_position(c, consumer), limit)
+    finally:
+        conn.close()
+
+
+def ack_changes(consumer: str, seq: int, db_path: Optional[str] = None):
+    """Moves a consumer's position forward to seq (never backwards)."""
+    conn = get_connection(db_path)
+    try:
+        conn.execute("""
+            INSERT INTO change_consumers (consumer, seq) VALUES (?, ?)
+            ON CONFLICT (consumer) DO UPDATE SET seq = MAX(seq, excluded.seq)
+        """, (consumer, seq))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def consume(consumer: str, handler: Callable[[List[Change]], None], db_path: Optional[str] = None,
+            batch: int = DEFAULT_BATCH) -> int:
+    """
+    Feeds every unacknowledged change to handler in batches, acknowledging each batch once
+    handler returns. If handler raises, the batch is delivered again next time, so handlers
+    should be idempotent. Returns the number of changes handled.
+    """
+    handled = 0
+    while True:
+        changes = read_changes(consumer, db_path, batch)
+        if not changes:
+            return handled
+        handler(changes)
+        ack_changes(consumer, changes[-1].seq, db_path)
+        handled += len(changes)
+
+
+def consume_all(consumer: str, handler: Callable[[List[Change]], None], batch: int = DEFAULT_BATCH) -> int:
+    """consume() on every fitness database file (each shard keeps its own position)."""
+    return sum(consume(consumer, handler, path, batch) for path in fitness_databases().values())
+
+
+def consumer_positions(db_path: Optional[str] = None) -> Dict[str, int]:
+    conn = get_connection(db_path)
+    try:
+        return dict(conn.execute("SELECT consumer, seq FROM change_consumers ORDER BY consumer").fetchall())
+    finally:
+        conn.close()
+
+
+def prune_changes(db_path: Optional[str] = None) -> int:
+    """
+    Deletes changes every registered consumer has acknowledged. Nothing is pruned while no
+    consumer is registered, so a new consumer can still start from the beginning.
+    """
+    conn = get_connection(db_path)
+    try:
+        oldest = conn.execute("SELECT MIN(seq) FROM change_consumers").fetchone()[0]
+        if oldest is None:
+            return 0
+        deleted = conn.execute("DELETE FROM change_log WHERE seq <= ?", (oldest,)).rowcount
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the fitness change log")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    tail = commands.add_parser("tail", help="print changes after a sequence number")
+    tail.add_argument("--since", type=int, default=0)
+    tail.add_argument("--limit", type=int, default=50)
+    tail.add_argument("--user")
+
+    commands.add_parser("status", help="latest seq and consumer positions per database")
+    commands.add_parser("prune", help="delete changes every consumer has acknowledged")
+
+    args = parser.parse_args()
+
+    for name, path in fitness_databases().items():
+        if not os.path.exists(path):
+            continue
+        if args.command == "tail":
+            db_path = None if args.user else path
+            for change in get_changes(args.since, args.limit, args.user, db_path):
+                print(name, change.seq, change.created_at, change.op, change.entity, change.entity_id,
+                      change.username, sep="\t")
+            if args.user:
+                break
+        elif args.command == "status":
+            positions = consumer_positions(path)
+            print(f"{name}: latest seq {latest_seq(path)}")
+            for consumer, seq in positions.items():
+                print(f"  {consumer:<24} {seq}")
+        elif args.command == "prune":
+            print(f"{name}: pruned {prune_changes(path)} changes")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,24 @@
 
 import os
 import sqlite3
+from typing import Optional
+from backend.instrumentation import connection_factory
 
-def init_db():
+def init_db(db_path: Optional[str] = None):
     """
-    Initializes the fitness.db database with all necessary tables:
-    workouts, workout_exercises, exercise_sets, templates, template_exercises, template_sets.
+    Initializes the fitness.db database (or db_path) with all necessary tables:
+    workouts, workout_exercises, exercise_sets, templates, template_exercises, template_sets,
+    plus archived_workouts/archive_meta, the change_log/change_consumers bookkeeping tables,
+    user_reports, activity_bitmaps, write_keys and the program tables
+    (program_enrollments, planned_workouts, planned_exercises, planned_sets).
     """
-    conn = get_connection()
+    conn = get_connection(db_path)
     c = conn.cursor()
 
+    # New databases return freed pages to the filesystem via backend/maintenance.py
+    # (has no effect once tables exist)
+    c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     # Workouts core table
     c.execute("""
         CREATE TABLE IF NOT EXISTS workouts (
@@ -21,7 +30,9 @@ def init_db():
             date TEXT,
             duration_minutes REAL,
             distance_mi REAL,
-            intensity TEXT
+            intensity TEXT,
+            updated_at TEXT,
+            content_hash TEXT
         )
     """)
 
@@ -32,10 +43,21 @@ def init_db():
             exercise_index INTEGER,
             name TEXT,
             type TEXT,
+            duration_minutes REAL,
+            distance_mi REAL,
             PRIMARY KEY (workout_id, exercise_index)
         )
     """)
 
+    # Older databases were created before cardio details were stored per exercise
+    _ensure_column(c, "workout_exercises", "duration_minutes", "REAL")
+    _ensure_column(c, "workout_exercises", "distance_mi", "REAL")
+
+    # Last-writer-wins sync (backend/db_fitness/sync.py) compares when rows were last written
+    _ensure_column(c, "workouts", "updated_at", "TEXT")
+    # Duplicate detection (backend/db_fitness/dedupe.py)
+    _ensure_column(c, "workouts", "content_hash", "TEXT")
+
     # Exercise sets table
     c.execute("""
         CREATE TABLE IF NOT EXISTS exercise_sets (
@@ -54,10 +76,13 @@ def init_db():
             id TEXT PRIMARY KEY,
             username TEXT NOT NULL,
             name TEXT NOT NULL,
-            type TEXT NOT NULL
+            type TEXT NOT NULL,
+            updated_at TEXT
         )
     """)
 
+    _ensure_column(c, "templates", "updated_at", "TEXT")
+
     # Template exercises table
     c.execute("""
         CREATE TABLE IF NOT EXISTS template_exercises (
@@ -65,9 +90,14 @@ def init_db():
             exercise_index INTEGER,
             name TEXT,
             type TEXT,
+            duration_minutes REAL,
+            distance_mi REAL,
             PRIMARY KEY (template_id, exercise_index)
         )
     """)
+    # Cardio targets, which programs carry into planned workouts (older files lack them)
+    _ensure_column(c, "template_exercises", "duration_minutes", "REAL")
+    _ensure_column(c, "template_exercises", "distance_mi", "REAL")
 
     # Template sets table
     c.execute("""
@@ -81,18 +111,202 @@ def init_db():
         )
     """)
 
+    # Workouts moved out of the hot tables by backend/db_fitness/archive.py: exercises and
+    # sets packed into payload, with per-workout totals so stats don't have to unpack them
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS archived_workouts (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            name TEXT,
+            type TEXT,
+            date TEXT,
+            duration_minutes REAL,
+            distance_mi REAL,
+            updated_at TEXT,
+            exercise_types TEXT NOT NULL DEFAULT '',
+            set_count INTEGER NOT NULL DEFAULT 0,
+            total_reps INTEGER NOT NULL DEFAULT 0,
+            total_volume REAL NOT NULL DEFAULT 0,
+            cardio_minutes REAL NOT NULL DEFAULT 0,
+            cardio_miles REAL NOT NULL DEFAULT 0,
+            payload BLOB NOT NULL,
+            content_hash TEXT
+        )
+    """)
+    _ensure_column(c, "archived_workouts", "content_hash", "TEXT")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS archive_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+    # Change log appended by every write, and how far each consumer has read it
+    # (see backend/db_fitness/changes.py). AUTOINCREMENT so a seq is never reused after pruning.
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            username TEXT NOT NULL,
+            op TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS change_consumers (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )
+    """)
+
+    # Latest per-user summary from the nightly report job (backend/db_fitness/reports.py);
+    # run_id marks which run wrote it so an interrupted run resumes where it stopped
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS user_reports (
+            username TEXT PRIMARY KEY,
+            run_id TEXT NOT NULL,
+            as_of TEXT NOT NULL,
+            generated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            total_workouts INTEGER NOT NULL,
+            current_streak INTEGER NOT NULL,
+            longest_streak INTEGER NOT NULL,
+            report TEXT NOT NULL
+        )
+    """)
+
+    # One bit per day with a workout, per user (see backend/db_fitness/activity.py)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS activity_bitmaps (
+            username TEXT PRIMARY KEY,
+            origin INTEGER NOT NULL,
+            bits BLOB NOT NULL
+        )
+    """)
+
+    # Results of writes made with an idempotency key, so repeating one returns the first
+    # result instead of writing again (see backend/db_fitness/writes.py)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS write_keys (
+            username TEXT NOT NULL,
+            key TEXT NOT NULL,
+            result TEXT,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            PRIMARY KEY (username, key)
+        )
+    """)
+
+    # Training programs (see backend/db_fitness/programs.py): who is enrolled in what, and the
+    # planned workouts enrolling wrote for them; workout_id is set once one is logged
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS program_enrollments (
+            username TEXT NOT NULL,
+            program_id TEXT NOT NULL,
+            program_name TEXT,
+            start_date TEXT NOT NULL,
+            weeks INTEGER NOT NULL,
+            enrolled_at TEXT,
+            PRIMARY KEY (username, program_id)
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS planned_workouts (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            program_id TEXT NOT NULL,
+            session_no INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            name TEXT,
+            type TEXT,
+            template_id TEXT,
+            workout_id TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS planned_exercises (
+            planned_id TEXT,
+            exercise_index INTEGER,
+            name TEXT,
+            type TEXT,
+            duration_minutes REAL,
+            distance_mi REAL,
+            PRIMARY KEY (planned_id, exercise_index)
+        )
+    """)
+    # Plans written before cardio targets were carried through
+    _ensure_column(c, "planned_exercises", "duration_minutes", "REAL")
+    _ensure_column(c, "planned_exercises", "distance_mi", "REAL")
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS planned_sets (
+            planned_id TEXT,
+            exercise_index INTEGER,
+            set_number INTEGER,
+            reps INTEGER,
+            weight REAL,
+            PRIMARY KEY (planned_id, exercise_index, set_number)
+        )
+    """)
+
+    # Timeline paging reads a user's workouts ORDER BY date DESC, id; an index in exactly that
+    # order pages without a sort (replaces the earlier (username, date) indexes)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_workouts_user_date_id ON workouts (username, date DESC, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_workouts_user_date_id ON archived_workouts (username, date DESC, id)")
+    c.execute("DROP INDEX IF EXISTS idx_workouts_user_date")
+    c.execute("DROP INDEX IF EXISTS idx_archived_workouts_user_date")
+    # Loading a user's templates, and finding one by name when it is saved again
+    c.execute("CREATE INDEX IF NOT EXISTS idx_templates_user ON templates (username)")
+    # Finding a user's workout with the same content before adding another
+    c.execute("CREATE INDEX IF NOT EXISTS idx_workouts_user_hash ON workouts (username, content_hash)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_archived_workouts_user_hash ON archived_workouts (username, content_hash)")
+    # A user's plan in date order, and one program's sessions per user (enrolling joins on it)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_planned_workouts_user_date ON planned_workouts (username, date, session_no)")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_planned_workouts_user_program "
+              "ON planned_workouts (username, program_id, session_no)")
+    # Per-user change feeds (the API's /changes)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_change_log_user_seq ON change_log (username, seq)")
+
     conn.commit()
     conn.close()
 
-def get_connection():
+
+def _ensure_column(c, table: str, column: str, column_type: str):
+    """
+    Adds a column to an existing table if it is missing (CREATE TABLE IF NOT EXISTS won't).
+    """
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def get_db_path() -> str:
     """
-    Connects to the fitness database located in `.db/fitness.db`. Creates the directory/file if missing.
+    Returns the path of fitness.db. Defaults to `.db/fitness.db`; the FITNESS_DB_PATH
+    environment variable points the app at another file (e.g. a temporary database).
     """
+    db_path = os.environ.get("FITNESS_DB_PATH")
+    if db_path:
+        return os.path.abspath(db_path)
+
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".db"))
-    os.makedirs(base_dir, exist_ok=True)
+    return os.path.join(base_dir, "fitness.db")
+
+
+def get_connection(db_path: Optional[str] = None, check_same_thread: bool = True,
+                   username: Optional[str] = None):
+    """
+    Connects to the fitness database located in `.db/fitness.db` (or db_path). Creates the directory/file if missing.
+    Pass username to get the shard holding that user's data when FITNESS_SHARDS is set
+    (see backend/db_fitness/sharding.py); unsharded, every user is in fitness.db.
+    Pass check_same_thread=False for long-lived connections that are closed by another thread.
+    """
+    if db_path is None and username is not None:
+        from backend.db_fitness.sharding import shard_path
+        db_path = shard_path(username)
+    db_path = db_path or get_db_path()
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-    db_path = os.path.join(base_dir, "fitness.db")
     if not os.path.exists(db_path):
         open(db_path, "a").close()
 
-    return sqlite3.connect(db_path)
+    return sqlite3.connect(db_path, check_same_thread=check_same_thread, factory=connection_factory())
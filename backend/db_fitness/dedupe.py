@@ -0,0 +1,203 @@
+# backend/db_fitness/dedupe.py
+#
+# Content hashes for workouts, so a double-clicked Save or a re-run import doesn't store the
+# same workout twice. Every workout row carries content_hash (indexed per user); adding a
+# workout whose hash the user already has returns the existing workout's id instead.
+#
+#   python -m backend.db_fitness.dedupe run            # hash older rows, remove duplicates
+#   python -m backend.db_fitness.dedupe run --dry-run
+#
+# Databases created before content hashes need one `run` so their older workouts are
+# recognised as duplicates too. A run hashes in batches of _BACKFILL_BATCH rows and removes
+# duplicates one user at a time (through run_write), so the app can keep writing meanwhile.
+
+import argparse
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+
+from backend.db_fitness.connection import get_connection, init_db
+from backend.db_fitness.sharding import fitness_databases
+from backend.db_fitness.writes import BUSY_TIMEOUT_MS, begin_immediate, run_write
+from backend.models import Workout
+
+_BACKFILL_BATCH = 500
+
+
+def _number(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def workout_hash(workout: Workout) -> str:
+    """
+    Hash of what a workout stores: date, name, type, totals and each exercise with its sets
+    (strength/bodyweight) or duration and distance (cardio). Names ignore case and extra
+    spaces, and 135 and 135.0 are the same weight.
+    """
+    exercises = []
+    for exercise in workout.exercises or []:
+        sets, duration, distance = [], None, None
+        if exercise.type in ["strength", "bodyweight"]:
+            sets = [[s.reps, _number(s.weight)] for s in exercise.sets or []]
+        elif exercise.type == "cardio":
+            duration, distance = _number(exercise.duration_minutes), _number(exercise.distance_mi)
+        exercises.append([" ".join((exercise.name or "").casefold().split()), exercise.type, sets, duration, distance])
+
+    canonical = [
+        workout.date.isoformat(),
+        " ".join((workout.name or "").casefold().split()),
+        workout.type,
+        _number(workout.duration_minutes),
+        _number(workout.distance_mi),
+        exercises,
+    ]
+    return hashlib.sha1(json.dumps(canonical, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+# ------------------ Cursor-level helpers ------------------
+
+def _find_duplicate(c, username: str, content_hash: str) -> Optional[str]:
+    """Id of the user's stored workout (hot or archived) with this content hash, if any."""
+    c.execute("""
+        SELECT id FROM workouts WHERE username = ? AND content_hash = ?
+        UNION ALL SELECT id FROM archived_workouts WHERE username = ? AND content_hash = ?
+        LIMIT 1
+    """, (username, content_hash, username, content_hash))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def _backfill_batch(c, table: str) -> int:
+    """
+    Fills content_hash for up to _BACKFILL_BATCH rows of workouts or archived_workouts
+    written before it existed. Returns how many it hashed.
+    """
+    from backend.db_fitness.workouts import _build_archived_workouts, _build_workouts
+    build = _build_workouts if table == "workouts" else _build_archived_workouts
+
+    c.execute(f"""
+        SELECT id, name, type, date, duration_minutes, distance_mi
+        FROM {table} WHERE content_hash IS NULL LIMIT ?
+    """, (_BACKFILL_BATCH,))
+    rows = c.fetchall()
+    c.executemany(f"UPDATE {table} SET content_hash = ? WHERE id = ?",
+                  [(workout_hash(w), w.id) for w in build(c, rows)])
+    return len(rows)
+
+
+def _backfill(c, table: str) -> int:
+    """Fills every missing content_hash of a table inside the caller's transaction."""
+    hashed = 0
+    while True:
+        n = _backfill_batch(c, table)
+        hashed += n
+        if n < _BACKFILL_BATCH:
+            return hashed
+
+
+def _duplicates(c, username: Optional[str] = None) -> Dict[str, List[List[str]]]:
+    """
+    username -> groups of ids with the same content, the copy to keep first (oldest write),
+    for every user or just `username`.
+    """
+    where, params = ("WHERE username = ?", (username, username)) if username else ("", ())
+    c.execute(f"""
+        SELECT username, content_hash, id FROM (
+            SELECT username, content_hash, id, updated_at FROM workouts
+            UNION ALL SELECT username, content_hash, id, updated_at FROM archived_workouts
+        )
+        WHERE (username, content_hash) IN (
+            SELECT username, content_hash FROM (
+                SELECT username, content_hash FROM workouts {where}
+                UNION ALL SELECT username, content_hash FROM archived_workouts {where}
+            )
+            GROUP BY username, content_hash HAVING COUNT(*) > 1
+        )
+        ORDER BY username, content_hash, updated_at IS NOT NULL, updated_at, id
+    """, params)
+    groups: Dict[tuple, List[str]] = {}
+    for username, content_hash, workout_id in c.fetchall():
+        groups.setdefault((username, content_hash), []).append(workout_id)
+    by_user: Dict[str, List[List[str]]] = {}
+    for (username, _), ids in groups.items():
+        by_user.setdefault(username, []).append(ids)
+    return by_user
+
+
+# ------------------ Deduplicating a database ------------------
+
+def _remove_duplicates(c, username: str) -> int:
+    """Deletes all but the first-written copy of each of the user's duplicated workouts."""
+    from backend.db_fitness.workouts import _delete_workout
+
+    removed = 0
+    for ids in _duplicates(c, username).get(username, []):
+        for workout_id in ids[1:]:
+            _delete_workout(c, username, workout_id)
+            removed += 1
+    return removed
+
+
+def dedupe_database(db_path: Optional[str] = None, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Hashes workouts that have no content_hash yet, in short transactions, then deletes every
+    duplicate but the one written first, one transaction per user. Deletions go through the
+    normal delete helper, so they reach the change log (and sync peers) like any other delete.
+    A dry run hashes and counts in one transaction that it rolls back.
+    """
+    init_db(db_path)  # older files may lack content_hash
+    conn = get_connection(db_path)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        c = conn.cursor()
+        hashed = 0
+        if dry_run:
+            begin_immediate(conn, "dedupe")
+            try:
+                hashed = _backfill(c, "workouts") + _backfill(c, "archived_workouts")
+                duplicates = _duplicates(c)
+            finally:
+                conn.rollback()
+        else:
+            for table in ("workouts", "archived_workouts"):
+                while True:
+                    begin_immediate(conn, "dedupe")
+                    try:
+                        n = _backfill_batch(c, table)
+                        conn.commit()
+                    except BaseException:
+                        conn.rollback()
+                        raise
+                    hashed += n
+                    if n < _BACKFILL_BATCH:
+                        break
+            duplicates = _duplicates(c)
+    finally:
+        conn.close()
+
+    if dry_run:
+        removed = sum(len(ids) - 1 for groups in duplicates.values() for ids in groups)
+    else:
+        # Each user's groups are found again inside their own write, in case they changed since
+        removed = sum(run_write(username, _remove_duplicates, username, db_path=db_path) for username in duplicates)
+    return {"hashed": hashed, "groups": sum(len(groups) for groups in duplicates.values()), "removed": removed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find and remove duplicate workouts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="hash older workouts and delete duplicates")
+    run.add_argument("--dry-run", action="store_true", help="report what would be removed without changing anything")
+    args = parser.parse_args()
+
+    for name, path in fitness_databases().items():
+        started = time.perf_counter()
+        result = dedupe_database(path, args.dry_run)
+        verb = "would remove" if args.dry_run else "removed"
+        print(f"[DEDUPE] {name}: hashed {result['hashed']} workouts, {verb} {result['removed']} duplicates "
+              f"in {result['groups']} groups ({time.perf_counter() - started:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
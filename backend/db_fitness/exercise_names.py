@@ -0,0 +1,243 @@
+# backend/db_fitness/exercise_names.py
+#
+# In-memory autocomplete for exercise names, so "Bench press", "bench Press" and "Bench Pres"
+# don't each start their own history. Each user's distinct names are loaded from the database
+# and tagged with the user's latest change-log seq; an index whose seq no longer matches (a
+# write by another process, a sync, an edit or delete) is rebuilt on next use. Workouts added
+# in this process are applied in place once their write commits, moving the index's seq along.
+#
+#   suggest_exercises("alice", "ben")   # ["Bench Press", "Bent-over Row", ...]
+#
+# Names whose words start with the typed text come first; then fuzzy matches by shared
+# trigrams, which catch typos. Within each group, names used often and recently rank higher.
+
+import heapq
+import math
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from functools import partial
+from itertools import chain
+from typing import Dict, List, Optional, Set
+
+from backend.db_fitness.archive import _archive_reached, _unpack
+from backend.db_fitness.changes import _user_seq
+from backend.db_fitness.replica import get_read_connection
+from backend.db_fitness.writes import on_commit
+from backend.models import Workout
+
+MAX_USERS = 256          # per-user indexes kept in memory (least recently used dropped first)
+FUZZY_MIN_SIMILARITY = 0.3  # trigram overlap (Jaccard) that counts as a match on its own
+FUZZY_CANDIDATES = 20       # names sharing the most trigrams that are considered at all
+RECENCY_DAYS = 30.0      # a name last used this many days ago counts half as much
+
+
+@dataclass
+class _Entry:
+    name: str        # display form: the most recent spelling saved
+    count: int       # times logged
+    last_used: int   # date ordinal
+
+
+def _key(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_edits(a: str, b: str, limit: int) -> bool:
+    """Whether a and b are at most `limit` edits apart (a swap of neighbouring letters is one edit)."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if previous2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return False
+        previous2, previous = previous, current
+    return previous[-1] <= limit
+
+
+class ExerciseIndex:
+    """One user's distinct exercise names with word-prefix and trigram lookups."""
+
+    def __init__(self):
+        self.entries: Dict[str, _Entry] = {}
+        self._prefixes: Dict[str, Set[str]] = {}   # word prefix -> keys
+        self._grams: Dict[str, Set[str]] = {}      # trigram -> keys
+        self._gram_counts: Dict[str, int] = {}     # key -> number of trigrams
+        self._scores: Dict[str, float] = {}        # key -> rank score, for _scores_day
+        self._scores_day = 0
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None         # the user's change-log seq it reflects
+
+    def add(self, name: str, count: int = 1, used_on: Optional[date] = None):
+        key = _key(name)
+        if not key:
+            return
+        ordinal = (used_on or date.today()).toordinal()
+        with self._lock:
+            self._scores.pop(key, None)
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry.count += count
+                if ordinal >= entry.last_used:
+                    entry.name, entry.last_used = name.strip(), ordinal
+                return
+            self.entries[key] = _Entry(name.strip(), count, ordinal)
+            for word in key.split():
+                for i in range(1, len(word) + 1):
+                    self._prefixes.setdefault(word[:i], set()).add(key)
+            grams = _trigrams(key)
+            self._gram_counts[key] = len(grams)
+            for gram in grams:
+                self._grams.setdefault(gram, set()).add(key)
+
+    def _score(self, key: str) -> float:
+        """Higher for names logged often and recently (cached for the day)."""
+        score = self._scores.get(key)
+        if score is None:
+            entry = self.entries[key]
+            age = max(self._scores_day - entry.last_used, 0)
+            score = self._scores[key] = math.log1p(entry.count) * RECENCY_DAYS / (RECENCY_DAYS + age)
+        return score
+
+    def _fuzzy(self, query: str, exclude: Set[str], limit: int) -> List[str]:
+        """Names sharing enough trigrams with query, or within a typo or two of it."""
+        query_grams = _trigrams(query)
+        shared = Counter(chain.from_iterable(self._grams.get(gram, ()) for gram in query_grams))
+        similarity = {
+            key: common / (len(query_grams) + self._gram_counts[key] - common)
+            for key, common in shared.most_common(FUZZY_CANDIDATES + len(exclude))
+            if key not in exclude
+        }
+        allowed = 1 if len(query) <= 5 else 2
+        matches = []
+        for key in sorted(similarity, key=lambda k: (-similarity[k], -self._score(k), k)):
+            if similarity[key] < FUZZY_MIN_SIMILARITY:
+                # Typos in short words share few trigrams ("sqaut"); compare spellings instead
+                targets = [key, key[:len(query)]] + key.split()
+                if not any(_within_edits(query, target, allowed) for target in targets):
+                    continue
+            matches.append(key)
+            if len(matches) == limit:
+                break
+        return matches
+
+    def suggest(self, text: str, limit: int = 5) -> List[str]:
+        query = _key(text)
+        if not query:
+            return []
+        today = date.today().toordinal()
+        with self._lock:
+            if today != self._scores_day:
+                self._scores, self._scores_day = {}, today
+            # Every typed word must start some word of the name ("b pr" -> "Bench Press")
+            prefix_keys = set.intersection(*(self._prefixes.get(word, set()) for word in query.split()))
+            ranked = heapq.nsmallest(
+                limit, prefix_keys, key=lambda k: (not k.startswith(query), -self._score(k), k),
+            )
+            if len(ranked) < limit:
+                ranked += self._fuzzy(query, prefix_keys, limit - len(ranked))
+            return [self.entries[key].name for key in ranked]
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted((e.name for e in self.entries.values()), key=str.casefold)
+
+
+_indexes: "OrderedDict[str, ExerciseIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _build_index(c, username: str) -> ExerciseIndex:
+    """Loads a user's names with how often and when they were last logged (hot and archived)."""
+    index = ExerciseIndex()
+    c.execute("""
+        SELECT e.name, COUNT(*), MAX(w.date)
+        FROM workout_exercises e JOIN workouts w ON w.id = e.workout_id
+        WHERE w.username = ? AND e.name IS NOT NULL
+        GROUP BY e.name
+    """, (username,))
+    for name, count, last_day in c.fetchall():
+        index.add(name, count, date.fromisoformat(last_day))
+    if _archive_reached(c, None):
+        c.execute("SELECT date, payload FROM archived_workouts WHERE username = ?", (username,))
+        for day, payload in c.fetchall():
+            for row in _unpack(payload)[0]:
+                if row[1]:
+                    index.add(row[1], 1, date.fromisoformat(day))
+    return index
+
+
+def get_exercise_index(username: str) -> ExerciseIndex:
+    """The user's index, (re)built from the database unless the one in memory is current."""
+    conn = get_read_connection(username)
+    try:
+        c = conn.cursor()
+        version = _user_seq(c, username)
+        with _indexes_lock:
+            index = _indexes.get(username)
+            if index is not None and index.version == version:
+                _indexes.move_to_end(username)
+                return index
+        index = _build_index(c, username)
+        if _user_seq(c, username) != version:
+            return index  # a write committed while this was read; build again next time
+        index.version = version
+    finally:
+        conn.close()
+
+    with _indexes_lock:
+        current = _indexes.get(username)
+        if current is None or current.version != version:
+            _indexes[username] = index
+        _indexes.move_to_end(username)
+        if len(_indexes) > MAX_USERS:
+            _indexes.popitem(last=False)
+        return _indexes[username]
+
+
+def suggest_exercises(username: str, text: str, limit: int = 5) -> List[str]:
+    """Up to `limit` of the user's exercise names matching what they've typed so far."""
+    return get_exercise_index(username).suggest(text, limit)
+
+
+def _add_names(username: str, names: List[str], used_on: date, previous: Optional[int], seq: int):
+    with _indexes_lock:
+        index = _indexes.get(username)
+        if index is None or index.version != previous:
+            return  # not loaded, or missing other changes; rebuilt from the database on next use
+        index.version = seq
+    for name in names:
+        index.add(name, 1, used_on)
+
+
+def _drop_index(username: str):
+    with _indexes_lock:
+        _indexes.pop(username, None)
+
+
+def _note_exercises(c, username: str, workout: Workout):
+    """
+    Adds a new workout's exercise names to the user's index once the write commits.
+    Runs after the workout's change-log row, whose seq the index then moves to.
+    """
+    c.execute("SELECT seq FROM change_log WHERE username = ? ORDER BY seq DESC LIMIT 2", (username,))
+    seqs = [row[0] for row in c.fetchall()]
+    previous = seqs[1] if len(seqs) > 1 else None
+    names = [exercise.name for exercise in workout.exercises or [] if exercise.name]
+    on_commit(partial(_add_names, username, names, workout.date, previous, seqs[0]))  # not the whole workout
+
+
+def _forget_exercises(username: str):
+    """Drops the user's index once the write commits: an edit or delete may have removed names."""
+    on_commit(partial(_drop_index, username))
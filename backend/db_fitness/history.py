@@ -0,0 +1,113 @@
+# backend/db_fitness/history.py
+#
+# Memory-budget mode for long workout histories. With FITNESS_MEMORY_BUDGET_WORKOUTS=N set,
+# get_all_workouts returns a PagedWorkouts instead of a list for users with more than N
+# workouts: a read-only sequence (len, indexing, slicing, iteration) that holds only a couple
+# of pages of Workout objects and loads the others from the database when they are reached,
+# so a power user's history is never in memory all at once.
+#
+# AsyncFitnessDB.get_all_workouts returns an AsyncPagedWorkouts instead, read with `async for`,
+# whose pages load through the async reader pool rather than on the event loop.
+#
+# Paged histories are ordered newest first, like the timeline. They read the database as it
+# is when each page loads; a write in between can shift later pages by the workouts it added
+# or removed.
+
+import os
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+
+from backend.db_fitness.replica import get_read_connection
+from backend.models import Workout
+
+PAGE_SIZE = 200
+CACHED_PAGES = 2
+
+
+def memory_budget() -> Optional[int]:
+    """Workout count above which get_all_workouts pages, or None when the mode is off."""
+    value = os.environ.get("FITNESS_MEMORY_BUDGET_WORKOUTS")
+    return int(value) if value else None
+
+
+class PagedWorkouts(Sequence):
+    """A user's workouts, newest first, loaded PAGE_SIZE at a time."""
+
+    def __init__(self, username: str, total: int, page_size: int = PAGE_SIZE):
+        self.username = username
+        self.total = total
+        self.page_size = page_size
+        self._pages: "OrderedDict[int, List[Workout]]" = OrderedDict()
+        self.pages_loaded = 0
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.total))]
+        if index < 0:
+            index += self.total
+        if not 0 <= index < self.total:
+            raise IndexError("workout index out of range")
+        page = self._page(index // self.page_size)
+        offset = index % self.page_size
+        if offset >= len(page):
+            raise IndexError("workout index out of range (the history shrank since it was counted)")
+        return page[offset]
+
+    def __iter__(self) -> Iterator[Workout]:
+        for number in range((self.total + self.page_size - 1) // self.page_size):
+            yield from self._page(number)
+
+    def __repr__(self) -> str:
+        return f"PagedWorkouts({self.username!r}, {self.total} workouts, {len(self._pages)} pages in memory)"
+
+    def _page(self, number: int) -> List[Workout]:
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+
+        from backend.db_fitness.workouts import _get_workouts_page
+        conn = get_read_connection(self.username)
+        try:
+            page = _get_workouts_page(conn.cursor(), self.username, self.page_size, number * self.page_size)
+        finally:
+            conn.close()
+        self.pages_loaded += 1
+        self._pages[number] = page
+        if len(self._pages) > CACHED_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+
+class AsyncPagedWorkouts:
+    """
+    A user's workouts, newest first, for async code: `async for` (or `await page(n)`) reads
+    them page_size at a time through load_page(limit, offset).
+    """
+
+    def __init__(self, username: str, total: int, load_page: Callable[[int, int], Awaitable[List[Workout]]],
+                 page_size: int = PAGE_SIZE):
+        self.username = username
+        self.total = total
+        self.page_size = page_size
+        self._load_page = load_page
+        self.pages_loaded = 0
+
+    def __len__(self) -> int:
+        return self.total
+
+    async def __aiter__(self) -> AsyncIterator[Workout]:
+        for number in range((self.total + self.page_size - 1) // self.page_size):
+            for workout in await self.page(number):
+                yield workout
+
+    def __repr__(self) -> str:
+        return f"AsyncPagedWorkouts({self.username!r}, {self.total} workouts)"
+
+    async def page(self, number: int) -> List[Workout]:
+        self.pages_loaded += 1
+        return await self._load_page(self.page_size, number * self.page_size)
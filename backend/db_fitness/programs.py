@@ -0,0 +1,419 @@
+# backend/db_fitness/programs.py
+#
+# Multi-week training programs. A Program is a list of sessions, each a Template on a fixed
+# day of the program week, with progressive overload: lbs (and/or reps) added to every set
+# each week, optionally a different step per exercise.
+#
+# Enrolling users materializes the whole program as planned workouts. The program is expanded
+# once into per-week session, exercise and set rows, with each week's weights and reps worked
+# out a column at a time; those rows go into temp tables and are copied to every enrolled
+# user of a database by INSERT ... SELECT, a handful of statements per batch of ENROLL_BATCH
+# users instead of an add_workout per planned workout.
+#
+# Planned workouts have their own tables (planned_workouts, planned_exercises, planned_sets)
+# and don't count as done: streaks, stats and the timeline only change once one is logged
+# with log_planned_workout, which saves it as a normal workout. They are not in the change
+# log, so offline sync doesn't carry them.
+#
+#   python -m backend.db_fitness.programs enroll program.json --coach coach --users alice,bob --start 2026-11-02
+#   python -m backend.db_fitness.programs show alice
+#
+# program.json names the coach's templates:
+#
+#   {"id": "novice-lp", "name": "Novice LP", "weeks": 12, "sessions": [
+#       {"template": "Push Day", "day": 0, "weight_step": 5},
+#       {"template": "Leg Day", "day": 2, "weight_step": 5, "exercise_steps": {"Squat": 10}}]}
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.db_fitness.replica import get_read_connection, note_write
+from backend.db_fitness.sharding import shard_path
+from backend.db_fitness.writes import run_write
+from backend.instrumentation import instrumented
+from backend.models import Exercise, Template, Workout, WorkoutSet
+
+# Users materialized per transaction: big enough to amortize the statements, small enough
+# that other writers never wait long for the lock
+ENROLL_BATCH = 200
+
+
+@dataclass
+class ProgramSession:
+    template: Template
+    day: int = 0                # day of the program week, 0-6 (0 = the start date's weekday)
+    weight_step: float = 0.0    # lbs added to each strength set per week
+    reps_step: int = 0          # reps added to each strength/bodyweight set per week
+    exercise_steps: Dict[str, float] = field(default_factory=dict)  # exercise name -> lbs per week, overriding weight_step
+
+
+@dataclass
+class Program:
+    id: str
+    name: str
+    weeks: int
+    sessions: List[ProgramSession]
+
+
+@dataclass
+class PlannedWorkout:
+    id: str
+    program_id: str
+    week: int  # 0-based
+    date: date
+    name: str
+    type: str
+    exercises: List[Exercise]
+    workout_id: Optional[str] = None  # the logged workout, once there is one
+
+    def to_workout(self, day: Optional[date] = None) -> Workout:
+        """A new Workout with this plan's exercises and sets, dated day (default: as planned)."""
+        exercises = [
+            Exercise(name=e.name, type=e.type, sets=[WorkoutSet(s.reps, s.weight) for s in e.sets or []],
+                     duration_minutes=e.duration_minutes, distance_mi=e.distance_mi)
+            for e in self.exercises
+        ]
+        return Workout.create(type=self.type, date=day or self.date, name=self.name, exercises=exercises)
+
+
+@dataclass
+class _Plan:
+    """A program expanded week by week; rows are keyed by session_no, shared by every user."""
+    sessions: List[tuple]   # (session_no, week, day_offset, name, type, template_id)
+    exercises: List[tuple]  # (session_no, exercise_index, name, type, duration_minutes, distance_mi)
+    sets: List[tuple]       # (session_no, exercise_index, set_number, reps, weight)
+
+
+def _expand(program: Program) -> _Plan:
+    """
+    Expands program into its planned sessions. Each template's sets are laid out once as
+    columns (exercise index, set number, base reps and weight, weekly steps); a week is then
+    the base columns plus week times the step columns.
+    """
+    if program.weeks < 1 or not program.sessions:
+        raise ValueError("a program needs at least one week and one session")
+
+    plan = _Plan([], [], [])
+    per_week = len(program.sessions)
+    for k, session in enumerate(program.sessions):
+        if not 0 <= session.day <= 6:
+            raise ValueError(f"session day must be 0-6, got {session.day}")
+        template = session.template
+        exercises = template.exercises or []
+
+        ex_index, set_number, reps, weight, weight_steps, reps_steps = [], [], [], [], [], []
+        for i, exercise in enumerate(exercises):
+            if exercise.type not in ["strength", "bodyweight"]:
+                continue
+            step = session.exercise_steps.get(exercise.name, session.weight_step) if exercise.type == "strength" else 0.0
+            for j, s in enumerate(exercise.sets or []):
+                ex_index.append(i)
+                set_number.append(j)
+                reps.append(s.reps)
+                weight.append(s.weight)
+                weight_steps.append(step)
+                reps_steps.append(session.reps_step)
+
+        for week in range(program.weeks):
+            session_no = week * per_week + k
+            plan.sessions.append((session_no, week, week * 7 + session.day, template.name, template.type, template.id))
+            plan.exercises.extend((session_no, i, e.name, e.type, e.duration_minutes, e.distance_mi)
+                                  for i, e in enumerate(exercises))
+            week_reps = [None if r is None else r + week * step for r, step in zip(reps, reps_steps)]
+            week_weight = [None if w is None else round(w + week * step, 2) for w, step in zip(weight, weight_steps)]
+            plan.sets.extend(zip(repeat(session_no), ex_index, set_number, week_reps, week_weight))
+    return plan
+
+
+@instrumented
+def enroll(program: Program, usernames: Iterable[str], start_date: date) -> Dict[str, int]:
+    """
+    Enrolls users in program from start_date, writing every planned workout of every week.
+    Enrolling a user in the same program again replaces their plan of it.
+    Returns counts of users, planned workouts and planned sets written.
+    """
+    started = time.perf_counter()
+    plan = _expand(program)
+
+    # Group users by database so each batch is one transaction on one file
+    by_db: Dict[str, List[str]] = {}
+    for username in dict.fromkeys(usernames):
+        by_db.setdefault(shard_path(username), []).append(username)
+
+    users = planned = 0
+    for batch_users in by_db.values():
+        for i in range(0, len(batch_users), ENROLL_BATCH):
+            batch = batch_users[i:i + ENROLL_BATCH]
+            # run_write picks the database from a username; the whole batch shares it
+            planned += run_write(batch[0], _enroll, program, plan, batch, start_date)
+            users += len(batch)
+
+    print(f"[PROGRAMS] Enrolled {users} users in {program.name!r}: {planned} planned workouts "
+          f"in {time.perf_counter() - started:.1f} s")
+    return {"users": users, "planned_workouts": planned, "planned_sets": users * len(plan.sets)}
+
+
+@instrumented
+def get_planned_workouts(
+    username: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    include_logged: bool = False,
+) -> List[PlannedWorkout]:
+    """
+    A user's planned workouts between start_date and end_date inclusive, soonest first.
+    Ones already logged are left out unless include_logged.
+    """
+    conn = get_read_connection(username)
+    try:
+        return _get_planned_workouts(conn.cursor(), username, start_date, end_date, include_logged)
+    finally:
+        conn.close()
+
+
+@instrumented
+def log_planned_workout(username: str, planned_id: str, day: Optional[date] = None) -> Optional[str]:
+    """
+    Saves a planned workout as a workout (dated day, default as planned) and marks it logged.
+    Returns the stored workout's id, or None if the user has no such planned workout.
+    """
+    return run_write(username, _log_planned_workout, username, planned_id, day)
+
+
+@instrumented
+def unenroll(username: str, program_id: str) -> int:
+    """Removes a user's plan of a program; workouts already logged stay. Returns planned workouts removed."""
+    return run_write(username, _unenroll, username, program_id)
+
+
+# ------------------ Cursor-level helpers ------------------
+
+def _load_plan(c, plan: _Plan, usernames: List[str], start_date: date):
+    c.execute("CREATE TEMP TABLE IF NOT EXISTS plan_users (username TEXT PRIMARY KEY)")
+    c.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS plan_sessions (
+            session_no INTEGER PRIMARY KEY, week INTEGER, date TEXT, name TEXT, type TEXT, template_id TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS plan_exercises (
+            session_no INTEGER, exercise_index INTEGER, name TEXT, type TEXT,
+            duration_minutes REAL, distance_mi REAL,
+            PRIMARY KEY (session_no, exercise_index)
+        )
+    """)
+    c.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS plan_sets (
+            session_no INTEGER, exercise_index INTEGER, set_number INTEGER, reps INTEGER, weight REAL,
+            PRIMARY KEY (session_no, exercise_index, set_number)
+        )
+    """)
+    for table in ("plan_users", "plan_sessions", "plan_exercises", "plan_sets"):
+        c.execute(f"DELETE FROM temp.{table}")
+
+    c.executemany("INSERT INTO temp.plan_users (username) VALUES (?)", [(u,) for u in usernames])
+    c.executemany(
+        "INSERT INTO temp.plan_sessions (session_no, week, date, name, type, template_id) VALUES (?, ?, ?, ?, ?, ?)",
+        [(no, week, (start_date + timedelta(days=offset)).isoformat(), name, type_, template_id)
+         for no, week, offset, name, type_, template_id in plan.sessions],
+    )
+    c.executemany(
+        "INSERT INTO temp.plan_exercises (session_no, exercise_index, name, type, duration_minutes, distance_mi) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        plan.exercises,
+    )
+    c.executemany(
+        "INSERT INTO temp.plan_sets (session_no, exercise_index, set_number, reps, weight) VALUES (?, ?, ?, ?, ?)",
+        plan.sets,
+    )
+
+
+def _delete_plans(c, where: str, params: tuple) -> int:
+    """Deletes the planned workouts matching where (on planned_workouts) with their exercises and sets."""
+    c.execute(f"DELETE FROM planned_sets WHERE planned_id IN (SELECT id FROM planned_workouts WHERE {where})", params)
+    c.execute(f"DELETE FROM planned_exercises WHERE planned_id IN (SELECT id FROM planned_workouts WHERE {where})", params)
+    c.execute(f"DELETE FROM planned_workouts WHERE {where}", params)
+    return c.rowcount
+
+
+def _enroll(c, program: Program, plan: _Plan, usernames: List[str], start_date: date) -> int:
+    for username in usernames:
+        note_write(username)
+    _load_plan(c, plan, usernames, start_date)
+
+    # Enrolling again replaces the plan
+    _delete_plans(c, "program_id = ? AND username IN (SELECT username FROM temp.plan_users)", (program.id,))
+    c.execute("""
+        INSERT OR REPLACE INTO program_enrollments (username, program_id, program_name, start_date, weeks, enrolled_at)
+        SELECT username, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now') FROM temp.plan_users
+    """, (program.id, program.name, start_date.isoformat(), program.weeks))
+
+    # Every user gets every session; exercises and sets follow their session by session_no.
+    # CROSS JOIN keeps the batch's users as the outer loop, so each is an index search on
+    # planned_workouts rather than a pass over every user's plans.
+    c.execute("""
+        INSERT INTO planned_workouts (id, username, program_id, session_no, week, date, name, type, template_id)
+        SELECT lower(hex(randomblob(16))), u.username, ?, s.session_no, s.week, s.date, s.name, s.type, s.template_id
+        FROM temp.plan_users u CROSS JOIN temp.plan_sessions s
+    """, (program.id,))
+    planned = c.rowcount
+    c.execute("""
+        INSERT INTO planned_exercises (planned_id, exercise_index, name, type, duration_minutes, distance_mi)
+        SELECT p.id, e.exercise_index, e.name, e.type, e.duration_minutes, e.distance_mi
+        FROM temp.plan_users u
+        CROSS JOIN planned_workouts p ON p.username = u.username AND p.program_id = ?
+        JOIN temp.plan_exercises e ON e.session_no = p.session_no
+    """, (program.id,))
+    c.execute("""
+        INSERT INTO planned_sets (planned_id, exercise_index, set_number, reps, weight)
+        SELECT p.id, s.exercise_index, s.set_number, s.reps, s.weight
+        FROM temp.plan_users u
+        CROSS JOIN planned_workouts p ON p.username = u.username AND p.program_id = ?
+        JOIN temp.plan_sets s ON s.session_no = p.session_no
+    """, (program.id,))
+    return planned
+
+
+def _get_planned_workouts(
+    c,
+    username: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    include_logged: bool = False,
+    planned_id: Optional[str] = None,
+) -> List[PlannedWorkout]:
+    clauses, params = ["p.username = ?"], [username]
+    if start_date:
+        clauses.append("p.date >= ?")
+        params.append(start_date.isoformat())
+    if end_date:
+        clauses.append("p.date <= ?")
+        params.append(end_date.isoformat())
+    if not include_logged:
+        clauses.append("p.workout_id IS NULL")
+    if planned_id is not None:
+        clauses.append("p.id = ?")
+        params.append(planned_id)
+    where = " AND ".join(clauses)
+
+    c.execute(f"""
+        SELECT p.id, p.program_id, p.week, p.date, p.name, p.type, p.workout_id
+        FROM planned_workouts p WHERE {where}
+        ORDER BY p.date, p.session_no
+    """, params)
+    planned = {
+        row[0]: PlannedWorkout(id=row[0], program_id=row[1], week=row[2], date=date.fromisoformat(row[3]),
+                               name=row[4], type=row[5], exercises=[], workout_id=row[6])
+        for row in c.fetchall()
+    }
+    if not planned:
+        return []
+
+    # One user's plan is small: sorting its rows here saves SQLite a temp B-tree per query
+    c.execute(f"""
+        SELECT e.planned_id, e.exercise_index, e.name, e.type, e.duration_minutes, e.distance_mi
+        FROM planned_workouts p JOIN planned_exercises e ON e.planned_id = p.id
+        WHERE {where}
+    """, params)
+    for planned_workout_id, _, name, type_, duration, distance in sorted(c.fetchall(), key=lambda row: row[:2]):
+        planned[planned_workout_id].exercises.append(
+            Exercise(name=name, type=type_, sets=[], duration_minutes=duration, distance_mi=distance))
+
+    c.execute(f"""
+        SELECT s.planned_id, s.exercise_index, s.set_number, s.reps, s.weight
+        FROM planned_workouts p JOIN planned_sets s ON s.planned_id = p.id
+        WHERE {where}
+    """, params)
+    for planned_workout_id, ex_index, _, reps, weight in sorted(c.fetchall(), key=lambda row: row[:3]):
+        planned[planned_workout_id].exercises[ex_index].sets.append(WorkoutSet(reps=reps, weight=weight))
+
+    return list(planned.values())
+
+
+def _log_planned_workout(c, username: str, planned_id: str, day: Optional[date] = None) -> Optional[str]:
+    from backend.db_fitness.workouts import _add_workout
+
+    found = _get_planned_workouts(c, username, include_logged=True, planned_id=planned_id)
+    if not found:
+        return None
+    workout_id = _add_workout(c, username, found[0].to_workout(day))
+    c.execute("UPDATE planned_workouts SET workout_id = ? WHERE id = ? AND username = ?",
+              (workout_id, planned_id, username))
+    return workout_id
+
+
+def _unenroll(c, username: str, program_id: str) -> int:
+    note_write(username)
+    removed = _delete_plans(c, "username = ? AND program_id = ?", (username, program_id))
+    c.execute("DELETE FROM program_enrollments WHERE username = ? AND program_id = ?", (username, program_id))
+    return removed
+
+
+# ------------------ Program files ------------------
+
+def load_program(path: str, coach: str) -> Program:
+    """Reads a program definition (see the top of this file), resolving template names in coach's templates."""
+    from backend.db_fitness.templates import get_templates
+
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    templates = {t.name.strip().lower(): t for t in get_templates(coach)}
+    sessions = []
+    for entry in spec["sessions"]:
+        template = templates.get(entry["template"].strip().lower())
+        if template is None:
+            raise ValueError(f"{coach} has no template named {entry['template']!r}")
+        sessions.append(ProgramSession(
+            template=template,
+            day=int(entry.get("day", 0)),
+            weight_step=float(entry.get("weight_step", 0.0)),
+            reps_step=int(entry.get("reps_step", 0)),
+            exercise_steps={name: float(step) for name, step in entry.get("exercise_steps", {}).items()},
+        ))
+    return Program(id=spec["id"], name=spec.get("name", spec["id"]), weeks=int(spec["weeks"]), sessions=sessions)
+
+
+def _describe(planned: PlannedWorkout) -> Tuple[str, str]:
+    parts = []
+    for exercise in planned.exercises:
+        sets = ", ".join(f"{s.reps}x{s.weight:g}" if s.weight is not None else f"{s.reps}" for s in exercise.sets or [])
+        parts.append(f"{exercise.name} {sets}".strip())
+    return f"{planned.date.isoformat()} {planned.name} (week {planned.week + 1})", "; ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll users in multi-week training programs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enroll_cmd = commands.add_parser("enroll", help="write a program's planned workouts for users")
+    enroll_cmd.add_argument("program", help="program definition (JSON)")
+    enroll_cmd.add_argument("--coach", required=True, help="user whose templates the program names")
+    enroll_cmd.add_argument("--users", required=True, help="comma-separated usernames, or @file with one per line")
+    enroll_cmd.add_argument("--start", type=date.fromisoformat, default=date.today(), help="first day (YYYY-MM-DD)")
+
+    show = commands.add_parser("show", help="a user's upcoming planned workouts")
+    show.add_argument("username")
+    show.add_argument("--days", type=int, default=14)
+    args = parser.parse_args()
+
+    if args.command == "enroll":
+        if args.users.startswith("@"):
+            with open(args.users[1:], encoding="utf-8") as f:
+                usernames = [line.strip() for line in f if line.strip()]
+        else:
+            usernames = [u.strip() for u in args.users.split(",") if u.strip()]
+        enroll(load_program(args.program, args.coach), usernames, args.start)
+    else:
+        today = date.today()
+        for planned in get_planned_workouts(args.username, today, today + timedelta(days=args.days)):
+            heading, detail = _describe(planned)
+            print(f"{heading}\n    {detail}")
+
+
+if __name__ == "__main__":
+    main()
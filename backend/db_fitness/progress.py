@@ -0,0 +1,252 @@
+# backend/db_fitness/progress.py
+#
+# Chart data for one exercise's progress over time. A multi-year history can hold hundreds of
+# thousands of sets, far more points than a chart has pixels, so the series is downsampled to
+# the requested width before it leaves the backend:
+#
+#   lttb     Largest-Triangle-Three-Buckets: at most `width` of the original points, chosen
+#            to keep the line's visual shape (peaks, dips)
+#   minmax   width / 2 equal-time buckets, each with min, max, avg and count
+#
+# Results are cached per (user, exercise, metric, range, width, mode) and reused until the
+# user's change-log seq moves (see backend/db_fitness/changes.py), i.e. until they next write.
+
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.db_fitness.archive import _archive_reached, _unpack
+from backend.db_fitness.changes import _user_seq
+from backend.db_fitness.exercise_names import get_exercise_index
+from backend.db_fitness.replica import get_read_connection
+from backend.instrumentation import instrumented
+
+# Per-set metrics, and per-entry metrics of cardio exercises
+SET_METRICS = ("weight", "reps", "volume")
+EXERCISE_METRICS = ("duration", "distance")
+METRICS = SET_METRICS + EXERCISE_METRICS
+MODES = ("lttb", "minmax")
+
+DEFAULT_WIDTH = 600
+MIN_WIDTH, MAX_WIDTH = 10, 4000
+
+_CACHE: "OrderedDict[tuple, Dict[str, object]]" = OrderedDict()
+_CACHE_SIZE = 256
+_cache_lock = threading.Lock()
+_cache_hits = 0
+_cache_misses = 0
+
+
+# ------------------ Downsampling ------------------
+# Points are (x, y) with x a date ordinal; several sets on one day share an x.
+
+def lttb(points: List[Tuple[float, float]], threshold: int) -> List[Tuple[float, float]]:
+    """Largest-Triangle-Three-Buckets downsampling to at most `threshold` points (keeps first and last)."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # index of the last point kept
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # The next bucket's average is the third corner of the triangle
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        count = next_end - next_start
+        avg_x = sum(p[0] for p in points[next_start:next_end]) / count
+        avg_y = sum(p[1] for p in points[next_start:next_end]) / count
+
+        ax, ay = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def minmax_buckets(points: List[Tuple[float, float]], buckets: int, lo: float, hi: float) -> List[Dict[str, float]]:
+    """Splits [lo, hi] into equal-time buckets; returns min/max/avg/count for each non-empty one."""
+    if not points or buckets < 1:
+        return []
+    span = max(hi - lo + 1, 1)
+    stats: Dict[int, List[float]] = {}
+    for x, y in points:
+        b = min(int((x - lo) * buckets / span), buckets - 1)
+        s = stats.get(b)
+        if s is None:
+            stats[b] = [y, y, y, 1]
+        else:
+            if y < s[0]:
+                s[0] = y
+            if y > s[1]:
+                s[1] = y
+            s[2] += y
+            s[3] += 1
+    return [
+        {"x": lo + b * span / buckets, "min": s[0], "max": s[1], "avg": s[2] / s[3], "count": s[3]}
+        for b, s in sorted(stats.items())
+    ]
+
+
+# ------------------ Exercise history ------------------
+
+def _set_value(metric: str, reps, weight) -> Optional[float]:
+    if metric == "weight":
+        return weight
+    if metric == "reps":
+        return reps
+    return reps * weight if reps is not None and weight is not None else None
+
+
+def _history(c, username: str, exercise: str, metric: str,
+             start: Optional[date], end: Optional[date]) -> Iterator[Tuple[int, float]]:
+    """Streams (date ordinal, value) for every set (or cardio entry) of one exercise, hot and archived."""
+    date_clause, date_params = "", []
+    if start:
+        date_clause += " AND date >= ?"
+        date_params.append(start.isoformat())
+    if end:
+        date_clause += " AND date <= ?"
+        date_params.append(end.isoformat())
+    params = [username, *date_params, exercise]
+
+    if metric in SET_METRICS:
+        rows = c.execute(f"""
+            SELECT w.date, s.reps, s.weight
+            FROM (SELECT id, date FROM workouts WHERE username = ?{date_clause}) w
+            JOIN workout_exercises e ON e.workout_id = w.id
+            JOIN exercise_sets s ON s.workout_id = e.workout_id AND s.exercise_index = e.exercise_index
+            WHERE e.name = ? COLLATE NOCASE
+        """, params)
+        for day, reps, weight in rows:
+            value = _set_value(metric, reps, weight)
+            if value is not None:
+                yield date.fromisoformat(day).toordinal(), value
+    else:
+        column = "e.duration_minutes" if metric == "duration" else "e.distance_mi"
+        rows = c.execute(f"""
+            SELECT w.date, {column}
+            FROM (SELECT id, date FROM workouts WHERE username = ?{date_clause}) w
+            JOIN workout_exercises e ON e.workout_id = w.id
+            WHERE e.name = ? COLLATE NOCASE AND {column} IS NOT NULL
+        """, params)
+        for day, value in rows:
+            yield date.fromisoformat(day).toordinal(), value
+
+    if not _archive_reached(c, start):
+        return
+    wanted = exercise.casefold()
+    rows = c.execute(f"SELECT date, payload FROM archived_workouts WHERE username = ?{date_clause}",
+                     [username, *date_params])
+    for day, payload in rows:
+        exercise_rows, sets_by_index = _unpack(payload)
+        ordinal = date.fromisoformat(day).toordinal()
+        for index, name, _, minutes, miles in exercise_rows:
+            if (name or "").casefold() != wanted:
+                continue
+            if metric in SET_METRICS:
+                for reps, weight in sets_by_index.get(index, ()):
+                    value = _set_value(metric, reps, weight)
+                    if value is not None:
+                        yield ordinal, value
+            else:
+                value = minutes if metric == "duration" else miles
+                if value is not None:
+                    yield ordinal, value
+
+
+# ------------------ Cursor-level helpers ------------------
+
+def _get_progress_series(c, username: str, exercise: str, metric: str = "weight",
+                         start: Optional[date] = None, end: Optional[date] = None,
+                         width: int = DEFAULT_WIDTH, mode: str = "lttb") -> Dict[str, object]:
+    global _cache_hits, _cache_misses
+    if metric not in METRICS:
+        raise ValueError(f"Invalid metric: {metric}")
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode: {mode}")
+    width = max(MIN_WIDTH, min(int(width), MAX_WIDTH))
+
+    key = (username, exercise.casefold(), metric, start, end, width, mode)
+    version = _user_seq(c, username)
+    with _cache_lock:
+        cached = _CACHE.get(key)
+        if cached is not None and cached["version"] == version:
+            _CACHE.move_to_end(key)
+            _cache_hits += 1
+            return cached["series"]
+        _cache_misses += 1
+
+    points = sorted(_history(c, username, exercise, metric, start, end))
+    series: Dict[str, object] = {
+        "exercise": exercise,
+        "metric": metric,
+        "mode": mode,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "total_points": len(points),
+    }
+    if mode == "lttb":
+        series["points"] = [
+            {"date": date.fromordinal(int(x)).isoformat(), "value": y} for x, y in lttb(points, width)
+        ]
+    else:
+        lo = start.toordinal() if start else (points[0][0] if points else 0)
+        hi = end.toordinal() if end else (points[-1][0] if points else 0)
+        series["buckets"] = [
+            {"date": date.fromordinal(int(b["x"])).isoformat(), "min": b["min"], "max": b["max"],
+             "avg": round(b["avg"], 2), "count": b["count"]}
+            for b in minmax_buckets(points, width // 2, lo, hi)
+        ]
+
+    with _cache_lock:
+        _CACHE[key] = {"version": version, "series": series}
+        _CACHE.move_to_end(key)
+        if len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return series
+
+
+# ------------------ Public API ------------------
+
+@instrumented
+def get_progress_series(username: str, exercise: str, metric: str = "weight",
+                        start: Optional[date] = None, end: Optional[date] = None,
+                        width: int = DEFAULT_WIDTH, mode: str = "lttb") -> Dict[str, object]:
+    """
+    One exercise's history as a chart series of at most `width` points (lttb) or width / 2
+    buckets (minmax), whatever the history's length. metric is weight, reps or volume per set,
+    or duration or distance per cardio entry.
+    """
+    conn = get_read_connection(username)
+    try:
+        return _get_progress_series(conn.cursor(), username, exercise, metric, start, end, width, mode)
+    finally:
+        conn.close()
+
+
+@instrumented
+def get_exercise_names(username: str) -> List[str]:
+    """
+    Every exercise name the user has logged, for picking a chart. Served from the in-memory
+    autocomplete index (backend/db_fitness/exercise_names.py), so a rerun costs one change-log
+    lookup rather than a scan of the user's exercises and archive.
+    """
+    return get_exercise_index(username).names()
+
+
+def cache_stats() -> Dict[str, int]:
+    with _cache_lock:
+        return {"entries": len(_CACHE), "hits": _cache_hits, "misses": _cache_misses}
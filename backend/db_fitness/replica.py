@@ -0,0 +1,209 @@
+# backend/db_fitness/replica.py
+#
+# Optional read replica for heavy read-only functions (full history, templates, stats).
+# A background thread copies the live database with the backup API into a replica, either
+# a separate file or a shared in-memory database, so long scans never hold a read
+# transaction on the file the app writes to.
+#
+#   FITNESS_READ_REPLICA=file       replica file in a replicas/ folder next to each database
+#   FITNESS_READ_REPLICA=memory     replica in a shared-cache in-memory database
+#   FITNESS_REPLICA_MAX_STALENESS=30
+#
+# Reads fall back to the primary whenever the replica is older than the staleness bound or
+# the user has written since the replica was taken, so users always see their own changes.
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import Dict, List, Optional
+
+from backend.backup import copy_database
+from backend.db_fitness.connection import get_connection
+from backend.db_fitness.sharding import shard_path
+from backend.db_fitness.writes import on_commit
+from backend.instrumentation import connection_factory
+
+DEFAULT_MAX_STALENESS = 30.0  # seconds
+
+# A write is noted once its transaction commits and a replica's time is taken when its copy
+# starts, so any copy started after the note has the write; the grace is a safety margin
+_WRITE_GRACE = 5.0
+
+_replica_ids = itertools.count()
+
+
+class ReadReplica:
+    """
+    A periodically refreshed copy of one database file. It is refreshed every half staleness
+    bound, so a healthy replica is never older than the bound.
+    """
+
+    def __init__(self, source_path: str, mode: str = "file", max_staleness: float = DEFAULT_MAX_STALENESS):
+        if mode not in ("file", "memory"):
+            raise ValueError(f"unknown replica mode {mode!r}; use file or memory")
+        self.source_path = source_path
+        self.mode = mode
+        self.max_staleness = max_staleness
+
+        self.snapshot_time = 0.0   # wall-clock time the current copy was taken (0 = none yet)
+        self.refreshes = 0
+        self.last_refresh_ms = 0.0
+
+        if mode == "file":
+            replica_dir = os.path.join(os.path.dirname(source_path), "replicas")
+            os.makedirs(replica_dir, exist_ok=True)
+            self.replica_path = os.path.join(replica_dir, os.path.basename(source_path))
+        else:
+            # Each refresh copies into a new shared-cache database. A database in shared-cache
+            # memory lives as long as one connection to it is open: the anchor keeps the current
+            # copy alive, and an older copy goes away once its last reader closes. Copying into
+            # a buffer readers still had open would fail with "database table is locked".
+            self._name = f"fitness-replica-{next(_replica_ids)}"
+            self._generation = itertools.count()
+            self._uri: Optional[str] = None
+            self._anchor: Optional[sqlite3.Connection] = None
+            self._swap_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="fitness-replica", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except sqlite3.Error as e:
+                print(f"[ERROR] Could not refresh read replica of {self.source_path}: {e}")
+            self._stop.wait(self.max_staleness / 2)
+
+    def refresh(self):
+        """Copies the source into the replica and switches readers over to the new copy."""
+        taken_at = time.time()
+        started = time.perf_counter()
+        if self.mode == "file":
+            tmp_path = self.replica_path + ".tmp"
+            dest = sqlite3.connect(tmp_path)
+            try:
+                copy_database(self.source_path, dest)
+                # The copy inherits WAL mode; a -wal/-shm pair left by the previous copy
+                # must never be paired with the new file, so replicas use a rollback journal
+                dest.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                dest.close()
+            os.replace(tmp_path, self.replica_path)  # open readers keep the old copy until they close
+        else:
+            uri = f"file:{self._name}-{next(self._generation)}?mode=memory&cache=shared"
+            anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            try:
+                copy_database(self.source_path, anchor)
+            except BaseException:
+                anchor.close()
+                raise
+            with self._swap_lock:
+                old_anchor, self._uri, self._anchor = self._anchor, uri, anchor
+            if old_anchor is not None:
+                old_anchor.close()  # readers still on the old copy keep it until they close
+
+        self.snapshot_time = taken_at
+        self.refreshes += 1
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+
+    def age(self) -> float:
+        return time.time() - self.snapshot_time
+
+    def is_fresh(self) -> bool:
+        return self.snapshot_time > 0 and self.age() <= self.max_staleness
+
+    def connect(self) -> sqlite3.Connection:
+        """A read-only connection to the current copy."""
+        if self.mode == "file":
+            conn = get_connection(self.replica_path)
+        else:
+            # Under the lock, so the copy can't be dropped between choosing it and connecting
+            with self._swap_lock:
+                if self._uri is None:
+                    raise sqlite3.OperationalError("the in-memory replica has not been copied yet")
+                conn = sqlite3.connect(self._uri, uri=True, factory=connection_factory())
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        if self.mode == "memory":
+            with self._swap_lock:
+                anchor, self._uri, self._anchor = self._anchor, None, None
+            if anchor is not None:
+                anchor.close()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "source": os.path.basename(self.source_path),
+            "mode": self.mode,
+            "age_seconds": round(self.age(), 1) if self.snapshot_time else None,
+            "fresh": self.is_fresh(),
+            "refreshes": self.refreshes,
+            "last_refresh_ms": round(self.last_refresh_ms, 1),
+        }
+
+
+_replicas: Dict[str, ReadReplica] = {}
+_replicas_lock = threading.Lock()
+_last_write: Dict[str, float] = {}
+
+
+def replica_mode() -> Optional[str]:
+    """file, memory, or None when reads should all go to the primary."""
+    return os.environ.get("FITNESS_READ_REPLICA") or None
+
+
+def get_replica(db_path: str) -> Optional[ReadReplica]:
+    """The process-wide replica of a database file, started on first use (None when disabled)."""
+    mode = replica_mode()
+    if mode is None:
+        return None
+    with _replicas_lock:
+        if db_path not in _replicas:
+            max_staleness = float(os.environ.get("FITNESS_REPLICA_MAX_STALENESS", DEFAULT_MAX_STALENESS))
+            _replicas[db_path] = ReadReplica(db_path, mode, max_staleness)
+        return _replicas[db_path]
+
+
+def note_write(username: str):
+    """
+    For write helpers: once the caller's write transaction commits, records that the user
+    wrote, so their reads skip replicas taken before the commit.
+    """
+    on_commit(partial(_record_write, username))
+
+
+def _record_write(username: str):
+    _last_write[username] = time.time()
+
+
+def get_read_connection(username: str) -> sqlite3.Connection:
+    """
+    A connection for read-only functions: the replica of the user's database when it is
+    fresh and has the user's latest writes, otherwise the primary.
+    """
+    db_path = shard_path(username)
+    replica = get_replica(db_path)
+    last_write = _last_write.get(username, 0.0)
+    if replica is not None and replica.is_fresh() and last_write + _WRITE_GRACE < replica.snapshot_time:
+        return replica.connect()
+    return get_connection(db_path)
+
+
+def replica_stats() -> List[Dict[str, object]]:
+    with _replicas_lock:
+        return [replica.stats() for replica in _replicas.values()]
+
+
+def close_replicas():
+    with _replicas_lock:
+        for replica in _replicas.values():
+            replica.close()
+        _replicas.clear()
@@ -0,0 +1,354 @@
+# backend/db_fitness/reports.py
+#
+# Nightly per-user summaries (weekly totals, personal records, streaks) for the whole user
+# base, written to the user_reports table of the database holding each user.
+#
+#   python -m backend.db_fitness.reports run --workers 8
+#   python -m backend.db_fitness.reports status
+#   python -m backend.db_fitness.reports show alice
+#
+# Users are split into chunks and spread over a process pool. Each worker reads through its
+# own read-only connection and streams a user's rows instead of building Workout objects; the
+# parent process is the only writer and stores each chunk in one transaction. A run is keyed
+# by its run id (the as-of date by default), so rerunning after a crash only computes the
+# users that run hasn't stored yet.
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.db_fitness.archive import _archive_reached, _unpack
+from backend.db_fitness.connection import get_connection, init_db
+from backend.db_fitness.sharding import fitness_databases, shard_path
+
+REPORT_WEEKS = 12    # weekly totals kept per report, ending with the as-of week
+CHUNK_USERS = 50     # users per task handed to a worker
+PROGRESS_EVERY = 5.0  # seconds between progress lines
+
+
+@dataclass
+class ReportRun:
+    run_id: str
+    users: int = 0       # reports written by this invocation
+    skipped: int = 0     # already written by an earlier, interrupted invocation of the run
+    seconds: float = 0.0
+
+
+# ------------------ Computing one user's report ------------------
+
+class _UserSummary:
+    """Accumulates one user's rows as they stream past."""
+
+    def __init__(self, as_of: date):
+        self.as_of = as_of
+        self.first_week = _week_start(as_of) - timedelta(weeks=REPORT_WEEKS - 1)
+        self.workouts = 0
+        self.days = set()
+        self.weeks: Dict[date, List[float]] = {}  # week start -> [workouts, sets, reps, volume, minutes, miles]
+        self.records: Dict[str, Tuple[float, int, str]] = {}  # exercise -> (weight, reps, date)
+
+    def _week(self, day: str) -> Optional[List[float]]:
+        week = _week_start(date.fromisoformat(day))
+        if week < self.first_week or week > self.as_of:
+            return None
+        return self.weeks.setdefault(week, [0, 0, 0, 0.0, 0.0, 0.0])
+
+    def workout(self, day: str, minutes, miles):
+        self.workouts += 1
+        self.days.add(day)
+        week = self._week(day)
+        if week is not None:
+            week[0] += 1
+            week[4] += minutes or 0
+            week[5] += miles or 0
+
+    def cardio(self, day: str, minutes, miles):
+        week = self._week(day)
+        if week is not None:
+            week[4] += minutes or 0
+            week[5] += miles or 0
+
+    def set(self, day: str, exercise: str, reps, weight):
+        week = self._week(day)
+        if week is not None:
+            week[1] += 1
+            week[2] += reps or 0
+            if reps is not None and weight is not None:
+                week[3] += reps * weight
+        if weight is not None and reps and exercise:
+            best = self.records.get(exercise)
+            # Heaviest weight lifted for at least one rep; more reps at that weight breaks a tie,
+            # and an exact repeat keeps the day it was first done
+            if best is None or (weight, reps) > best[:2] or ((weight, reps) == best[:2] and day < best[2]):
+                self.records[exercise] = (weight, reps, day)
+
+    def report(self) -> Dict[str, object]:
+        current, longest, longest_end = _streaks(sorted(self.days), self.as_of)
+        weeks = []
+        for i in range(REPORT_WEEKS):
+            week = self.first_week + timedelta(weeks=i)
+            workouts, sets, reps, volume, minutes, miles = self.weeks.get(week, [0, 0, 0, 0.0, 0.0, 0.0])
+            weeks.append({
+                "week": week.isoformat(),
+                "workouts": workouts,
+                "sets": sets,
+                "reps": reps,
+                "volume_lbs": round(volume, 1),
+                "cardio_minutes": round(minutes, 1),
+                "cardio_distance_mi": round(miles, 2),
+            })
+        return {
+            "as_of": self.as_of.isoformat(),
+            "total_workouts": self.workouts,
+            "first_workout_date": min(self.days) if self.days else None,
+            "last_workout_date": max(self.days) if self.days else None,
+            "current_streak_days": current,
+            "longest_streak_days": longest,
+            "longest_streak_end": longest_end,
+            "weeks": weeks,
+            "personal_records": {
+                name: {"weight": weight, "reps": reps, "date": day}
+                for name, (weight, reps, day) in sorted(self.records.items())
+            },
+        }
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _streaks(days: List[str], as_of: date) -> Tuple[int, int, Optional[str]]:
+    """(current streak, longest streak, day the longest ended) in consecutive workout days."""
+    current = longest = run = 0
+    longest_end = None
+    previous = None
+    for iso in days:
+        day = date.fromisoformat(iso)
+        if day > as_of:
+            break
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        if run > longest:
+            longest, longest_end = run, iso
+        previous = day
+    # The current streak is still alive if it reaches today or yesterday
+    if previous is not None and as_of - previous <= timedelta(days=1):
+        current = run
+    return current, longest, longest_end
+
+
+def _summarize_user(c, username: str, as_of: date) -> Dict[str, object]:
+    """Streams a user's workouts, cardio and sets (hot and archived) into a report."""
+    summary = _UserSummary(as_of)
+    for day, minutes, miles in c.execute(
+        "SELECT date, duration_minutes, distance_mi FROM workouts WHERE username = ?", (username,)
+    ):
+        summary.workout(day, minutes, miles)
+    for day, minutes, miles in c.execute("""
+        SELECT w.date, e.duration_minutes, e.distance_mi
+        FROM workout_exercises e JOIN workouts w ON w.id = e.workout_id
+        WHERE w.username = ? AND e.type = 'cardio'
+    """, (username,)):
+        summary.cardio(day, minutes, miles)
+    for day, exercise, reps, weight in c.execute("""
+        SELECT w.date, e.name, s.reps, s.weight
+        FROM exercise_sets s
+        JOIN workouts w ON w.id = s.workout_id
+        JOIN workout_exercises e ON e.workout_id = s.workout_id AND e.exercise_index = s.exercise_index
+        WHERE w.username = ?
+    """, (username,)):
+        summary.set(day, exercise, reps, weight)
+
+    if _archive_reached(c, None):
+        for day, minutes, miles, payload in c.execute(
+            "SELECT date, duration_minutes, distance_mi, payload FROM archived_workouts WHERE username = ?",
+            (username,),
+        ):
+            summary.workout(day, minutes, miles)
+            exercise_rows, sets_by_index = _unpack(payload)
+            for index, exercise, type_, ex_minutes, ex_miles in exercise_rows:
+                if type_ == "cardio":
+                    summary.cardio(day, ex_minutes, ex_miles)
+                for reps, weight in sets_by_index.get(index, ()):
+                    summary.set(day, exercise, reps, weight)
+    return summary.report()
+
+
+# ------------------ Workers ------------------
+
+# One read-only connection per database file, kept for the life of a worker process
+_worker_connections: Dict[str, sqlite3.Connection] = {}
+
+
+def _read_only(db_path: str) -> sqlite3.Connection:
+    conn = _worker_connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        _worker_connections[db_path] = conn
+    return conn
+
+
+def _report_chunk(db_path: str, usernames: List[str], as_of: date) -> Tuple[str, List[tuple]]:
+    """Runs in a worker: (db_path, [(username, total, current streak, longest streak, report JSON)])."""
+    c = _read_only(db_path).cursor()
+    rows = []
+    for username in usernames:
+        report = _summarize_user(c, username, as_of)
+        rows.append((username, report["total_workouts"], report["current_streak_days"],
+                     report["longest_streak_days"], json.dumps(report, separators=(",", ":"))))
+    return db_path, rows
+
+
+# ------------------ Running a report job ------------------
+
+def _pending_users(conn: sqlite3.Connection, run_id: str) -> List[str]:
+    return [row[0] for row in conn.execute("""
+        SELECT username FROM workouts UNION SELECT username FROM archived_workouts
+        EXCEPT SELECT username FROM user_reports WHERE run_id = ?
+        ORDER BY 1
+    """, (run_id,))]
+
+
+def _chunks(databases: Dict[str, List[str]], size: int) -> Iterator[Tuple[str, List[str]]]:
+    for db_path, usernames in databases.items():
+        for i in range(0, len(usernames), size):
+            yield db_path, usernames[i:i + size]
+
+
+def run_reports(as_of: Optional[date] = None, run_id: Optional[str] = None, workers: Optional[int] = None,
+                chunk: int = CHUNK_USERS, databases: Optional[Dict[str, str]] = None) -> ReportRun:
+    """
+    Computes and stores a report for every user who doesn't have one from this run yet.
+    workers=1 computes in this process; the default is one worker per CPU.
+    """
+    started = time.perf_counter()
+    as_of = as_of or date.today()
+    run = ReportRun(run_id or as_of.isoformat())
+    workers = workers or os.cpu_count() or 1
+
+    writers: Dict[str, sqlite3.Connection] = {}
+    pending: Dict[str, List[str]] = {}
+    try:
+        for db_path in (databases or fitness_databases()).values():
+            init_db(db_path)  # older files may lack user_reports
+            conn = get_connection(db_path)
+            conn.execute("PRAGMA busy_timeout = 5000")
+            writers[db_path] = conn
+            pending[db_path] = _pending_users(conn, run.run_id)
+            run.skipped += conn.execute(
+                "SELECT COUNT(*) FROM user_reports WHERE run_id = ?", (run.run_id,)
+            ).fetchone()[0]
+
+        total = sum(len(usernames) for usernames in pending.values())
+        print(f"[REPORTS] Run {run.run_id}: {total} users to report"
+              + (f" ({run.skipped} already done)" if run.skipped else "")
+              + f", {workers} worker{'s' if workers != 1 else ''}")
+
+        last_progress = time.perf_counter()
+
+        def store(db_path: str, rows: List[tuple]):
+            nonlocal last_progress
+            conn = writers[db_path]
+            with conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO user_reports
+                        (username, run_id, as_of, total_workouts, current_streak, longest_streak, report)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [(username, run.run_id, as_of.isoformat(), *rest) for username, *rest in rows])
+            run.users += len(rows)
+            if time.perf_counter() - last_progress >= PROGRESS_EVERY:
+                last_progress = time.perf_counter()
+                elapsed = last_progress - started
+                print(f"[REPORTS] {run.users}/{total} users ({run.users / elapsed:.0f}/s)")
+
+        tasks = _chunks(pending, chunk)
+        if workers == 1:
+            for db_path, usernames in tasks:
+                store(*_report_chunk(db_path, usernames, as_of))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep a couple of chunks queued per worker rather than submitting every user up front
+                running = set()
+                for db_path, usernames in tasks:
+                    running.add(pool.submit(_report_chunk, db_path, usernames, as_of))
+                    if len(running) >= workers * 2:
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            store(*future.result())
+                for future in wait(running).done:
+                    store(*future.result())
+    finally:
+        for conn in writers.values():
+            conn.close()
+
+    run.seconds = time.perf_counter() - started
+    print(f"[REPORTS] Run {run.run_id}: wrote {run.users} reports in {run.seconds:.1f} s")
+    return run
+
+
+# ------------------ Reading reports ------------------
+
+def get_user_report(username: str, db_path: Optional[str] = None) -> Optional[Dict[str, object]]:
+    """The latest stored report for a user, or None if the job hasn't covered them yet."""
+    conn = get_connection(db_path or shard_path(username))
+    try:
+        row = conn.execute("SELECT report, run_id, generated_at FROM user_reports WHERE username = ?",
+                           (username,)).fetchone()
+    except sqlite3.OperationalError:
+        return None  # user_reports is created by init_db; older files may not have it yet
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    report = json.loads(row[0])
+    report["run_id"], report["generated_at"] = row[1], row[2]
+    return report
+
+
+def report_status(db_path: Optional[str] = None) -> Dict[str, int]:
+    """Reports stored per run id in one database."""
+    conn = get_connection(db_path)
+    try:
+        return dict(conn.execute("SELECT run_id, COUNT(*) FROM user_reports GROUP BY run_id ORDER BY run_id"))
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nightly per-user workout reports")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="compute reports for every user not yet covered by this run")
+    run.add_argument("--as-of", type=date.fromisoformat, help="report date (default today)")
+    run.add_argument("--run-id", help="resume key (default the as-of date); a new id recomputes everyone")
+    run.add_argument("--workers", type=int, help="worker processes (default one per CPU)")
+    run.add_argument("--chunk", type=int, default=CHUNK_USERS, help="users per worker task")
+
+    commands.add_parser("status", help="stored reports per run and database")
+
+    show = commands.add_parser("show", help="print one user's latest report")
+    show.add_argument("username")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_reports(args.as_of, args.run_id, args.workers, args.chunk)
+    elif args.command == "status":
+        for name, path in fitness_databases().items():
+            runs = report_status(path)
+            print(f"{name}: " + (", ".join(f"{run_id} {count} users" for run_id, count in runs.items()) or "no reports"))
+    elif args.command == "show":
+        report = get_user_report(args.username)
+        print(json.dumps(report, indent=2) if report else f"No report for {args.username} yet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# backend/db_fitness/sharding.py
+#
+# Storage routing for fitness data. By default every user lives in the one fitness.db; with
+# FITNESS_SHARDS set, users are spread over several files so writes from different users stop
+# contending on a single lock and each file's indexes only hold its own users' rows.
+#
+#   FITNESS_SHARDS=hash:8      users hashed into shards/fitness-000.db ... fitness-007.db
+#   FITNESS_SHARDS=per-user    one file per user under shards/users/
+#
+# Shard files live next to fitness.db (or in FITNESS_SHARD_DIR) and are created on first use.
+# Move existing data between layouts with:
+#
+#   python -m backend.db_fitness.sharding migrate --from single --to hash:8
+#   python -m backend.db_fitness.sharding stats
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Tables holding per-user data, with how to select one user's rows from each
+_USER_ROWS = {
+    "workouts": "username = :username",
+    "workout_exercises": "workout_id IN (SELECT id FROM src.workouts WHERE username = :username)",
+    "exercise_sets": "workout_id IN (SELECT id FROM src.workouts WHERE username = :username)",
+    "templates": "username = :username",
+    "template_exercises": "template_id IN (SELECT id FROM src.templates WHERE username = :username)",
+    "template_sets": "template_id IN (SELECT id FROM src.templates WHERE username = :username)",
+    "archived_workouts": "username = :username",
+    "user_reports": "username = :username",
+    "activity_bitmaps": "username = :username",
+    "program_enrollments": "username = :username",
+    "planned_workouts": "username = :username",
+    "planned_exercises": "planned_id IN (SELECT id FROM src.planned_workouts WHERE username = :username)",
+    "planned_sets": "planned_id IN (SELECT id FROM src.planned_workouts WHERE username = :username)",
+    "write_keys": "username = :username",
+    # Only changes newer than the target already holds for the user, so re-running adds nothing
+    "change_log": "username = :username AND created_at > "
+                  "(SELECT COALESCE(MAX(created_at), '') FROM main.change_log WHERE username = :username)",
+}
+# Tables whose key is a per-file sequence: rows are appended in order and numbered afresh by
+# the target, since users from different source files may have used the same numbers
+_RENUMBERED = {"change_log": "seq"}
+
+
+def get_shard_dir() -> str:
+    shard_dir = os.environ.get("FITNESS_SHARD_DIR")
+    if shard_dir:
+        return os.path.abspath(shard_dir)
+    from backend.db_fitness.connection import get_db_path
+    return os.path.join(os.path.dirname(get_db_path()), "shards")
+
+
+class Router:
+    """Maps a username to the database file holding that user's data."""
+
+    sharded = True
+
+    def db_path_for(self, username: str) -> str:
+        raise NotImplementedError
+
+    def all_db_paths(self) -> List[str]:
+        """Every database file that currently exists in this layout."""
+        raise NotImplementedError
+
+
+class SingleFileRouter(Router):
+    """Everyone in fitness.db (the original layout)."""
+
+    sharded = False
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path
+
+    def _path(self) -> str:
+        from backend.db_fitness.connection import get_db_path
+        return self.db_path or get_db_path()
+
+    def db_path_for(self, username: str) -> str:
+        return self._path()
+
+    def all_db_paths(self) -> List[str]:
+        return [self._path()] if os.path.exists(self._path()) else []
+
+    def __repr__(self):
+        return "single"
+
+
+class HashRouter(Router):
+    """A fixed number of shard files; crc32 keeps a user's shard stable across processes."""
+
+    def __init__(self, shards: int, shard_dir: Optional[str] = None):
+        if shards < 1:
+            raise ValueError("shard count must be at least 1")
+        self.shards = shards
+        self.shard_dir = shard_dir or get_shard_dir()
+
+    def shard_for(self, username: str) -> int:
+        return zlib.crc32(username.encode("utf-8")) % self.shards
+
+    def db_path_for(self, username: str) -> str:
+        return os.path.join(self.shard_dir, f"fitness-{self.shard_for(username):03d}.db")
+
+    def all_db_paths(self) -> List[str]:
+        paths = [os.path.join(self.shard_dir, f"fitness-{i:03d}.db") for i in range(self.shards)]
+        return [p for p in paths if os.path.exists(p)]
+
+    def __repr__(self):
+        return f"hash:{self.shards}"
+
+
+class PerUserRouter(Router):
+    """One file per user. The name keeps readable characters plus a hash so it stays unique."""
+
+    def __init__(self, shard_dir: Optional[str] = None):
+        self.shard_dir = os.path.join(shard_dir or get_shard_dir(), "users")
+
+    def db_path_for(self, username: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", username)[:64]
+        return os.path.join(self.shard_dir, f"{safe}-{zlib.crc32(username.encode('utf-8')):08x}.db")
+
+    def all_db_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.shard_dir, "*.db")))
+
+    def __repr__(self):
+        return "per-user"
+
+
+def parse_router(spec: Optional[str], shard_dir: Optional[str] = None) -> Router:
+    """Builds a router from a FITNESS_SHARDS value: single (or empty), hash:N or per-user."""
+    spec = (spec or "single").strip().lower()
+    if spec in ("single", "1", "hash:1"):
+        return SingleFileRouter()
+    if spec.startswith("hash:"):
+        return HashRouter(int(spec[len("hash:"):]), shard_dir)
+    if spec == "per-user":
+        return PerUserRouter(shard_dir)
+    raise ValueError(f"unknown shard layout {spec!r}; use single, hash:N or per-user")
+
+
+_router: Optional[Router] = None
+_router_key: Optional[Tuple] = None
+_initialized: set = set()
+_init_lock = threading.Lock()
+
+
+def get_router() -> Router:
+    """The router for the current FITNESS_SHARDS / FITNESS_SHARD_DIR settings."""
+    global _router, _router_key
+    key = (os.environ.get("FITNESS_SHARDS"), os.environ.get("FITNESS_SHARD_DIR"), os.environ.get("FITNESS_DB_PATH"))
+    if _router is None or key != _router_key:
+        _router, _router_key = parse_router(key[0]), key
+    return _router
+
+
+def shard_path(username: str) -> str:
+    """The database file for a user, creating and initializing a new shard on first use."""
+    router = get_router()
+    path = router.db_path_for(username)
+    if router.sharded and path not in _initialized:
+        with _init_lock:
+            if path not in _initialized:
+                from backend.db_fitness.connection import init_db
+                init_db(path)
+                _initialized.add(path)
+    return path
+
+
+# ------------------ Cross-shard admin queries ------------------
+
+def fitness_databases() -> Dict[str, str]:
+    """
+    Name -> path for every fitness database file in the current layout
+    (used by maintenance and backups).
+    """
+    router = get_router()
+    if not router.sharded:
+        from backend.db_fitness.connection import get_db_path
+        return {"fitness": get_db_path()}
+    return {os.path.basename(path)[:-len(".db")]: path for path in router.all_db_paths()}
+
+
+def query_all_shards(sql: str, params: Sequence = (), router: Optional[Router] = None) -> Iterator[Tuple[str, tuple]]:
+    """Runs a read-only query on every shard, yielding (shard path, row)."""
+    for path in (router or get_router()).all_db_paths():
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            for row in conn.execute(sql, params):
+                yield path, row
+        finally:
+            conn.close()
+
+
+def list_usernames(router: Optional[Router] = None) -> List[str]:
+    """Every user with workouts, templates or a training program, across all shards."""
+    return sorted({row[0] for _, row in query_all_shards(
+        "SELECT username FROM workouts UNION SELECT username FROM archived_workouts "
+        "UNION SELECT username FROM templates UNION SELECT username FROM program_enrollments", router=router)})
+
+
+def shard_stats(router: Optional[Router] = None) -> List[Dict[str, object]]:
+    """Users, workouts, templates and file size per shard."""
+    stats = []
+    for path in (router or get_router()).all_db_paths():
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            users = conn.execute(
+                "SELECT COUNT(*) FROM (SELECT username FROM workouts UNION SELECT username FROM templates)"
+            ).fetchone()[0]
+            workouts = conn.execute("SELECT COUNT(*) FROM workouts").fetchone()[0]
+            templates = conn.execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+        finally:
+            conn.close()
+        stats.append({
+            "shard": os.path.basename(path),
+            "users": users,
+            "workouts": workouts,
+            "templates": templates,
+            "mb": os.path.getsize(path) / 2**20,
+        })
+    return stats
+
+
+# ------------------ Migration ------------------
+
+def _user_counts(path: str, username: str) -> Tuple[int, int]:
+    conn = sqlite3.connect(path)
+    try:
+        return (
+            conn.execute("SELECT COUNT(*) FROM workouts WHERE username = ?", (username,)).fetchone()[0],
+            conn.execute("SELECT COUNT(*) FROM templates WHERE username = ?", (username,)).fetchone()[0],
+        )
+    finally:
+        conn.close()
+
+
+def migrate(source: Router, target: Router, verify: bool = True) -> Dict[str, int]:
+    """
+    Copies every user's rows from the source layout into the target layout with
+    INSERT ... SELECT through ATTACH, one transaction per (source, target) file pair: their
+    workouts, templates, archive, reports, plans, idempotency keys and change log (appended
+    in order under the target's own seq numbers). Re-running is safe (rows are upserted by
+    primary key, and only newer changes are appended); the source is left untouched.
+    """
+    from backend.db_fitness.connection import init_db
+
+    started = time.perf_counter()
+    for path in source.all_db_paths():
+        init_db(path)  # older files may lack newer tables or columns
+
+    pairs: Dict[Tuple[str, str], List[str]] = {}
+    for username in list_usernames(source):
+        src_path, dest_path = source.db_path_for(username), target.db_path_for(username)
+        if os.path.abspath(src_path) != os.path.abspath(dest_path):
+            pairs.setdefault((src_path, dest_path), []).append(username)
+
+    moved = 0
+    for (src_path, dest_path), usernames in sorted(pairs.items()):
+        init_db(dest_path)
+        conn = sqlite3.connect(dest_path)
+        try:
+            conn.execute("ATTACH DATABASE ? AS src", (src_path,))
+            # Explicit column lists: older files may have columns in a different order
+            columns = {
+                table: ", ".join(row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")
+                                 if row[1] != _RENUMBERED.get(table))
+                for table in _USER_ROWS
+            }
+            for username in usernames:
+                for table, where in _USER_ROWS.items():
+                    if table in _RENUMBERED:
+                        sql = (f"INSERT INTO main.{table} ({columns[table]}) SELECT {columns[table]} "
+                               f"FROM src.{table} WHERE {where} ORDER BY {_RENUMBERED[table]}")
+                    else:
+                        sql = (f"INSERT OR REPLACE INTO main.{table} ({columns[table]}) "
+                               f"SELECT {columns[table]} FROM src.{table} WHERE {where}")
+                    conn.execute(sql, {"username": username})
+            # Archived rows are only read once the destination's archive horizon covers them
+            conn.execute("""
+                INSERT INTO main.archive_meta (key, value)
+                SELECT key, value FROM src.archive_meta WHERE key = 'archived_before'
+                ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)
+            """)
+            conn.commit()
+            conn.execute("DETACH DATABASE src")
+        finally:
+            conn.close()
+
+        for username in usernames:
+            if verify and _user_counts(src_path, username) != _user_counts(dest_path, username):
+                raise RuntimeError(f"row counts for {username} differ after copying to {dest_path}")
+        moved += len(usernames)
+        print(f"[SHARDING] {len(usernames)} users {os.path.basename(src_path)} -> {os.path.basename(dest_path)}")
+
+    print(f"[SHARDING] Migrated {moved} users from {source!r} to {target!r} "
+          f"in {time.perf_counter() - started:.1f} s")
+    return {"users": moved, "files": len({dest for _, dest in pairs})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and migrate fitness database shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser("stats", help="users, workouts and size per shard")
+    stats.add_argument("--layout", help="layout to inspect (default: FITNESS_SHARDS)")
+
+    migrate_cmd = commands.add_parser("migrate", help="copy all users from one layout to another")
+    migrate_cmd.add_argument("--from", dest="source", default="single", help="single, hash:N or per-user")
+    migrate_cmd.add_argument("--to", dest="target", required=True, help="single, hash:N or per-user")
+    migrate_cmd.add_argument("--no-verify", action="store_true", help="skip the per-user row count check")
+
+    query = commands.add_parser("query", help="run a read-only SQL query on every shard")
+    query.add_argument("sql")
+
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        router = parse_router(args.layout) if args.layout else get_router()
+        print(f"{'shard':<32} {'users':>7} {'workouts':>10} {'templates':>10} {'MB':>9}")
+        for row in shard_stats(router):
+            print(f"{row['shard']:<32} {row['users']:7d} {row['workouts']:10d} {row['templates']:10d} {row['mb']:9.1f}")
+
+    elif args.command == "migrate":
+        migrate(parse_router(args.source), parse_router(args.target), verify=not args.no_verify)
+        print(f"Set FITNESS_SHARDS={args.target} to use the new layout.")
+
+    elif args.command == "query":
+        for path, row in query_all_shards(args.sql):
+            print(os.path.basename(path), *row, sep="\t")
+
+
+if __name__ == "__main__":
+    main()
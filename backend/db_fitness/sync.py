@@ -0,0 +1,423 @@
+# backend/db_fitness/sync.py
+#
+# Delta sync between two fitness databases (e.g. an offline laptop copy and the server).
+# Instead of shipping the whole fitness.db, one side exports the workouts and templates that
+# changed into a small gzip'd JSON batch and the other side applies it:
+#
+#   python -m backend.db_fitness.sync export laptop.db out.json.gz --peer server
+#   python -m backend.db_fitness.sync apply server.db out.json.gz
+#
+# What changed comes from the change log (backend/db_fitness/changes.py): everything after the
+# last export to that peer, or after --since. When the log can't be trusted for a peer (first
+# sync, log pruned), compare content hashes against the other side instead:
+#
+#   python -m backend.db_fitness.sync manifest server.db server-manifest.json.gz
+#   python -m backend.db_fitness.sync export laptop.db out.json.gz --manifest server-manifest.json.gz
+#
+# A workout or template moves as a unit (its row plus its exercise and set rows). Conflicts are
+# last-writer-wins on updated_at, ties broken by content hash so both sides pick the same
+# winner; applying the same batch twice changes nothing. Deletions travel as tombstones
+# timed by the change log.
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.db_fitness.activity import _drop_activity
+from backend.db_fitness.archive import _archived_entity_rows
+from backend.db_fitness.changes import _changes_since, _consumer_position, _latest_seq, _record_change, ack_changes
+from backend.db_fitness.connection import get_connection, init_db
+from backend.db_fitness.exercise_names import _forget_exercises
+from backend.db_fitness.replica import note_write
+from backend.db_fitness.writes import _drop_commit_hooks, _run_commit_hooks, begin_immediate
+
+BATCH_FORMAT = 1
+
+# entity -> (main table, child tables keyed by the entity id column)
+ENTITIES = {
+    "workout": ("workouts", ("workout_exercises", "exercise_sets"), "workout_id"),
+    "template": ("templates", ("template_exercises", "template_sets"), "template_id"),
+}
+
+_SCAN_BATCH = 5000
+
+# Bookkeeping columns that don't count as content when comparing copies
+_UNHASHED = ("updated_at", "content_hash")
+
+
+@dataclass
+class SyncReport:
+    applied: int = 0      # entities inserted or replaced
+    deleted: int = 0
+    skipped: int = 0      # already identical, or the local copy is newer
+    conflicts: int = 0    # both sides changed; the local copy won
+
+
+# ------------------ Reading entities ------------------
+
+def _columns(c, table: str) -> List[str]:
+    c.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in c.fetchall()]
+
+
+def _entity_rows(c, entity: str, entity_id: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """The main row and child rows of one workout/template as dicts, or None if it doesn't exist."""
+    table, children, key = ENTITIES[entity]
+    c.execute(f"SELECT * FROM {table} WHERE id = ?", (entity_id,))
+    row = c.fetchone()
+    if row is None:
+        # Archived workouts sync as the rows they had before archiving
+        return _archived_entity_rows(c, entity_id) if entity == "workout" else None
+    names = [d[0] for d in c.description]
+    rows = {table: [dict(zip(names, row))]}
+    for child in children:
+        c.execute(f"SELECT * FROM {child} WHERE {key} = ?", (entity_id,))
+        names = [d[0] for d in c.description]
+        rows[child] = [dict(zip(names, r)) for r in c.fetchall()]
+    return rows
+
+
+def content_hash(rows: Dict[str, List[Dict[str, Any]]]) -> str:
+    """
+    Hash of an entity's content. Bookkeeping and NULL columns are left out, and rows and
+    columns are sorted, so the same data hashes the same in both databases (even if one has
+    a column the other lacks, or holds the workout in the archive).
+    """
+    canonical = {
+        table: sorted(
+            json.dumps({k: v for k, v in r.items() if k not in _UNHASHED and v is not None}, sort_keys=True)
+            for r in table_rows
+        )
+        for table, table_rows in rows.items()
+        if table_rows  # a workout without sets hashes the same whether or not the table is listed
+    }
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _last_delete(c, entity: str, entity_id: str) -> Optional[Tuple[str, str]]:
+    """(username, deleted_at) of the entity's last deletion here, according to the change log."""
+    c.execute("""
+        SELECT username, created_at FROM change_log
+        WHERE entity = ? AND entity_id = ? AND op = 'delete'
+        ORDER BY seq DESC LIMIT 1
+    """, (entity, entity_id))
+    return c.fetchone()
+
+
+# ------------------ Batches ------------------
+
+def _new_batch(source: str, from_seq: int, to_seq: int) -> Dict[str, Any]:
+    return {
+        "format": BATCH_FORMAT,
+        "source": source,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "from_seq": from_seq,
+        "to_seq": to_seq,
+        "tables": {},      # table -> {"columns": [...], "rows": [[...], ...]}
+        "deleted": [],     # [entity, id, username, deleted_at]
+    }
+
+
+def _add_entity(batch: Dict[str, Any], rows: Dict[str, List[Dict[str, Any]]]):
+    # Column names are stored once per table; rows are plain lists
+    for table, table_rows in rows.items():
+        section = batch["tables"].setdefault(table, {"columns": None, "rows": []})
+        for r in table_rows:
+            if section["columns"] is None:
+                section["columns"] = list(r)
+            section["rows"].append([r.get(col) for col in section["columns"]])
+
+
+def write_batch(batch: Dict[str, Any], path: str) -> int:
+    """Writes a batch as gzip'd JSON; returns the file size in bytes."""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(batch, f, separators=(",", ":"))
+    return os.path.getsize(path)
+
+
+def read_batch(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        batch = json.load(f)
+    if batch.get("format") != BATCH_FORMAT:
+        raise ValueError(f"{path} is not a version {BATCH_FORMAT} sync batch")
+    return batch
+
+
+# ------------------ Export ------------------
+
+def _peer_consumer(peer: str) -> str:
+    return f"sync:{peer}"
+
+
+def export_changes(db_path: str, since: Optional[int] = None, peer: Optional[str] = None) -> Dict[str, Any]:
+    """
+    A batch holding every workout and template changed after `since` (default: after the
+    last export to `peer`, or everything). Each changed entity appears once, in its current
+    state, or as a tombstone if it no longer exists.
+    """
+    conn = get_connection(db_path)
+    try:
+        c = conn.cursor()
+        if since is None:
+            since = _consumer_position(c, _peer_consumer(peer)) if peer else 0
+        batch = _new_batch(os.path.basename(db_path), since, _latest_seq(c))
+
+        # Only the latest change per entity matters
+        latest: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        position = since
+        while True:
+            changes = _changes_since(c, position, _SCAN_BATCH)
+            if not changes:
+                break
+            for ch in changes:
+                latest[(ch.entity, ch.entity_id)] = (ch.username, ch.created_at)
+            position = changes[-1].seq
+        batch["to_seq"] = max(batch["to_seq"], position)
+
+        for (entity, entity_id), (username, changed_at) in latest.items():
+            rows = _entity_rows(c, entity, entity_id)
+            if rows is None:
+                batch["deleted"].append([entity, entity_id, username, changed_at])
+            else:
+                _add_entity(batch, rows)
+        return batch
+    finally:
+        conn.close()
+
+
+def content_manifest(db_path: str) -> Dict[str, Dict[str, List[Optional[str]]]]:
+    """entity -> {id: [content hash, updated_at]} for every workout and template in a database."""
+    conn = get_connection(db_path)
+    try:
+        c = conn.cursor()
+        manifest: Dict[str, Dict[str, List[Optional[str]]]] = {}
+        for entity, (table, _, _) in ENTITIES.items():
+            ids = [row[0] for row in c.execute(f"SELECT id FROM {table}").fetchall()]
+            if entity == "workout":
+                ids += [row[0] for row in c.execute("SELECT id FROM archived_workouts").fetchall()]
+            manifest[entity] = {}
+            for entity_id in ids:
+                rows = _entity_rows(c, entity, entity_id)
+                manifest[entity][entity_id] = [content_hash(rows), rows[table][0].get("updated_at")]
+        return manifest
+    finally:
+        conn.close()
+
+
+def export_against(db_path: str, manifest: Dict[str, Dict[str, List[Optional[str]]]]) -> Dict[str, Any]:
+    """
+    A batch holding what the other side (described by its content manifest) lacks or holds
+    in a different version, plus tombstones for entities it has that were deleted here.
+    """
+    local = content_manifest(db_path)
+    conn = get_connection(db_path)
+    try:
+        c = conn.cursor()
+        batch = _new_batch(os.path.basename(db_path), 0, _latest_seq(c))
+        for entity in ENTITIES:
+            theirs = manifest.get(entity, {})
+            for entity_id, (digest, _) in local[entity].items():
+                if entity_id not in theirs or theirs[entity_id][0] != digest:
+                    _add_entity(batch, _entity_rows(c, entity, entity_id))
+            for entity_id in theirs.keys() - local[entity].keys():
+                deletion = _last_delete(c, entity, entity_id)
+                if deletion is not None:
+                    batch["deleted"].append([entity, entity_id, *deletion])
+        return batch
+    finally:
+        conn.close()
+
+
+def mark_exported(db_path: str, peer: str, seq: int):
+    """Records that everything up to seq has been sent to peer."""
+    ack_changes(_peer_consumer(peer), seq, db_path)
+
+
+# ------------------ Apply ------------------
+
+def _group_rows(batch: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]]:
+    """entity -> id -> {table: [row dicts]} from a batch's column/row lists."""
+    grouped: Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]] = {}
+    for entity, (table, children, key) in ENTITIES.items():
+        entities = grouped.setdefault(entity, {})
+        for t, id_column in [(table, "id")] + [(child, key) for child in children]:
+            section = batch["tables"].get(t)
+            if not section:
+                continue
+            for values in section["rows"]:
+                row = dict(zip(section["columns"], values))
+                entities.setdefault(row[id_column], {}).setdefault(t, []).append(row)
+    return grouped
+
+
+def _delete_entity(c, entity: str, entity_id: str):
+    table, children, key = ENTITIES[entity]
+    for child in children:
+        c.execute(f"DELETE FROM {child} WHERE {key} = ?", (entity_id,))
+    c.execute(f"DELETE FROM {table} WHERE id = ?", (entity_id,))
+    if entity == "workout":
+        c.execute("DELETE FROM archived_workouts WHERE id = ?", (entity_id,))
+
+
+def _insert_entity(c, rows: Dict[str, List[Dict[str, Any]]], local_columns: Dict[str, List[str]]):
+    for table, table_rows in rows.items():
+        for r in table_rows:
+            # Only columns both databases know (either side may have an older schema)
+            cols = [col for col in r if col in local_columns[table]]
+            c.execute(
+                f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                [r[col] for col in cols],
+            )
+
+
+def _apply(c, batch: Dict[str, Any]) -> SyncReport:
+    report = SyncReport()
+    local_columns = {
+        t: _columns(c, t) for table, children, _ in ENTITIES.values() for t in (table,) + children
+    }
+
+    for entity, entities in _group_rows(batch).items():
+        table = ENTITIES[entity][0]
+        for entity_id, rows in entities.items():
+            if table not in rows:
+                continue  # child rows without their parent: not a well-formed batch entry
+            incoming = rows[table][0]
+            incoming_key = (incoming.get("updated_at") or "", content_hash(rows))
+
+            local = _entity_rows(c, entity, entity_id)
+            if local is not None:
+                local_key = (local[table][0].get("updated_at") or "", content_hash(local))
+                if incoming_key[1] == local_key[1]:
+                    report.skipped += 1
+                    continue
+                if incoming_key < local_key:
+                    report.skipped += 1
+                    report.conflicts += 1
+                    continue
+            else:
+                deletion = _last_delete(c, entity, entity_id)
+                if deletion is not None and deletion[1] >= incoming_key[0]:
+                    report.skipped += 1  # deleted here after the incoming edit
+                    continue
+
+            username = incoming["username"]
+            note_write(username)
+            _delete_entity(c, entity, entity_id)
+            _insert_entity(c, rows, local_columns)
+            if entity == "workout":
+                # Rebuilt from the tables on next read
+                _drop_activity(c, username)
+                _forget_exercises(username)
+                if local is not None:
+                    _drop_activity(c, local[table][0]["username"])
+                    _forget_exercises(local[table][0]["username"])
+            _record_change(c, entity, entity_id, username, "update" if local is not None else "insert")
+            report.applied += 1
+
+    for entity, entity_id, username, deleted_at in batch["deleted"]:
+        local = _entity_rows(c, entity, entity_id)
+        if local is None:
+            report.skipped += 1
+            continue
+        if (local[ENTITIES[entity][0]][0].get("updated_at") or "") > deleted_at:
+            report.skipped += 1  # edited here after the incoming delete
+            report.conflicts += 1
+            continue
+        note_write(username)
+        _delete_entity(c, entity, entity_id)
+        if entity == "workout":
+            _drop_activity(c, username)
+            _forget_exercises(username)
+        _record_change(c, entity, entity_id, username, "delete")
+        report.deleted += 1
+
+    return report
+
+
+def apply_batch(db_path: str, batch: Dict[str, Any]) -> SyncReport:
+    """
+    Applies a batch in one transaction. Each entity in it replaces the local copy only if
+    its updated_at is newer (or equal with a greater content hash); tombstones delete only
+    local copies last written before the delete.
+    """
+    init_db(db_path)
+    conn = get_connection(db_path)
+    conn.isolation_level = None  # explicit BEGIN below
+    try:
+        c = conn.cursor()
+        begin_immediate(conn, "apply_batch")
+        try:
+            report = _apply(c, batch)
+            c.execute("COMMIT")
+        except BaseException:
+            _drop_commit_hooks()
+            c.execute("ROLLBACK")
+            raise
+        _run_commit_hooks()
+        return report
+    finally:
+        conn.close()
+
+
+def sync_files(source_path: str, target_path: str, peer: Optional[str] = None) -> SyncReport:
+    """One-way sync of two local files: exports source's changes for peer and applies them to target."""
+    peer = peer or os.path.basename(target_path)
+    batch = export_changes(source_path, peer=peer)
+    report = apply_batch(target_path, batch)
+    mark_exported(source_path, peer, batch["to_seq"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta sync between two fitness databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write changed workouts/templates to a batch file")
+    export.add_argument("db")
+    export.add_argument("out")
+    export.add_argument("--peer", help="export what changed since the last export to this peer, and remember it")
+    export.add_argument("--since", type=int, help="export changes after this change-log seq")
+    export.add_argument("--manifest", help="export what differs from the database described by this manifest")
+
+    apply = commands.add_parser("apply", help="apply a batch file to a database")
+    apply.add_argument("db")
+    apply.add_argument("batch")
+
+    manifest = commands.add_parser("manifest", help="write content hashes of a database for --manifest")
+    manifest.add_argument("db")
+    manifest.add_argument("out")
+
+    args = parser.parse_args()
+    db_path = os.path.abspath(args.db)
+
+    if args.command == "export":
+        if args.manifest:
+            with gzip.open(args.manifest, "rt", encoding="utf-8") as f:
+                batch = export_against(db_path, json.load(f))
+        else:
+            batch = export_changes(db_path, args.since, args.peer)
+        size = write_batch(batch, args.out)
+        rows = sum(len(section["rows"]) for section in batch["tables"].values())
+        print(f"[SYNC] Exported {rows} rows and {len(batch['deleted'])} deletions "
+              f"(seq {batch['from_seq']}..{batch['to_seq']}) to {args.out}: {size / 1024:.1f} KB")
+        if args.peer and not args.manifest:
+            mark_exported(db_path, args.peer, batch["to_seq"])
+
+    elif args.command == "apply":
+        report = apply_batch(db_path, read_batch(args.batch))
+        print(f"[SYNC] Applied {report.applied}, deleted {report.deleted}, skipped {report.skipped} "
+              f"({report.conflicts} conflicts kept the local copy)")
+
+    elif args.command == "manifest":
+        with gzip.open(args.out, "wt", encoding="utf-8") as f:
+            json.dump(content_manifest(db_path), f, separators=(",", ":"))
+        print(f"[SYNC] Wrote manifest of {args.db} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
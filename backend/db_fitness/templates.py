@@ -1,66 +1,88 @@
 # backend/db_fitness/templates.py
 
-from typing import List
+from typing import List, Optional
 from backend.models import Template, Exercise, WorkoutSet
-from backend.db_fitness.connection import get_connection
+from backend.db_fitness.changes import _record_change
+from backend.db_fitness.replica import get_read_connection, note_write
+from backend.db_fitness.writes import run_write
+from backend.instrumentation import instrumented
 
 
-def add_template(username: str, template: Template):
+@instrumented
+def add_template(username: str, template: Template, idempotency_key: Optional[str] = None):
     """
     Adds a new workout template with its exercises and sets.
     """
-    conn = get_connection()
-    c = conn.cursor()
+    run_write(username, _add_template, username, template, idempotency_key=idempotency_key)
+
+
+@instrumented
+def delete_template(template_id: str, username: str, idempotency_key: Optional[str] = None):
+    """
+    Deletes a template and all its related exercises and sets.
+    """
+    run_write(username, _delete_template, template_id, username, idempotency_key=idempotency_key)
+
+
+@instrumented
+def get_templates(username: str) -> List[Template]:
+    """
+    Fetches all saved templates for the user, including nested exercises and sets.
+    Each template includes all of its exercises and their sets.
+    Served from the read replica when one is enabled (see backend/db_fitness/replica.py).
+    """
+    conn = get_read_connection(username)
+    templates = _get_templates(conn.cursor(), username)
+    conn.close()
+    return templates
+
+
+@instrumented
+def update_template(username: str, updated_template: Template, idempotency_key: Optional[str] = None):
+    """
+    Updates or replaces a template by name (case-insensitive).
+    Deletes old records and inserts updated template data.
+    Waits and retries while other processes hold the write lock (see backend/db_fitness/writes.py).
+    """
+    run_write(username, _update_template, username, updated_template, idempotency_key=idempotency_key)
+
+
+# ------------------ Cursor-level helpers ------------------
+# Same split as backend/db_fitness/workouts.py: the public functions own the connection
+# and commit, these run inside whatever transaction the caller has open.
+
+def _add_template(c, username: str, template: Template):
+    note_write(username)
 
     # Insert the main template record
     c.execute("""
-        INSERT INTO templates (id, username, name, type)
-        VALUES (?, ?, ?, ?)
+        INSERT INTO templates (id, username, name, type, updated_at)
+        VALUES (?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
     """, (template.id, username, template.name, template.type))
 
     # Insert exercises and their sets linked to this template
-    for i, exercise in enumerate(template.exercises or []):
-        c.execute("""
-            INSERT INTO template_exercises (template_id, exercise_index, name, type)
-            VALUES (?, ?, ?, ?)
-        """, (template.id, i, exercise.name, exercise.type))
+    _insert_template_exercises(c, template)
 
-        for j, s in enumerate(exercise.sets):
-            c.execute("""
-                INSERT INTO template_sets (template_id, exercise_index, set_number, reps, weight)
-                VALUES (?, ?, ?, ?, ?)
-            """, (template.id, i, j, s.reps, s.weight))
+    _record_change(c, "template", template.id, username, "insert")
 
-    conn.commit()
-    conn.close()
 
+def _delete_template(c, template_id: str, username: str):
+    note_write(username)
 
-def delete_template(template_id: str, username: str):
-    """
-    Deletes a template and all its related exercises and sets.
-    """
-    conn = get_connection()
-    c = conn.cursor()
+    # Delete the template record itself for the specified user
+    c.execute("DELETE FROM templates WHERE id = ? AND username = ?", (template_id, username))
+    if c.rowcount == 0:
+        return  # Not this user's template; leave its exercises alone
 
     # Delete all sets associated with this template
     c.execute("DELETE FROM template_sets WHERE template_id = ?", (template_id,))
     # Delete all exercises associated with this template
     c.execute("DELETE FROM template_exercises WHERE template_id = ?", (template_id,))
-    # Delete the template record itself for the specified user
-    c.execute("DELETE FROM templates WHERE id = ? AND username = ?", (template_id, username))
-
-    conn.commit()
-    conn.close()
 
+    _record_change(c, "template", template_id, username, "delete")
 
-def get_templates(username: str) -> List[Template]:
-    """
-    Fetches all saved templates for the user, including nested exercises and sets.
-    Each template includes all of its exercises and their sets.
-    """
-    conn = get_connection()
-    c = conn.cursor()
 
+def _get_templates(c, username: str) -> List[Template]:
     # Get all templates belonging to the user
     c.execute("SELECT id, name, type FROM templates WHERE username = ?", (username,))
     rows = c.fetchall()
@@ -70,23 +92,26 @@ def get_templates(username: str) -> List[Template]:
 
         # Load all exercises for the current template, ordered by exercise_index
         c.execute("""
-            SELECT exercise_index, name, type FROM template_exercises
+            SELECT exercise_index, name, type, duration_minutes, distance_mi FROM template_exercises
             WHERE template_id = ? ORDER BY exercise_index
         """, (template_id,))
         exercise_rows = c.fetchall()
 
-        exercises = []
-        for ex_index, ex_name, ex_type in exercise_rows:
-            # Load all sets for the current exercise, ordered by set_number
-            c.execute("""
-                SELECT reps, weight FROM template_sets
-                WHERE template_id = ? AND exercise_index = ?
-                ORDER BY set_number
-            """, (template_id, ex_index))
-            sets_data = c.fetchall()
-            sets = [WorkoutSet(reps=r, weight=w) for r, w in sets_data]
+        # Load all sets for the template at once, ordered by exercise and set_number
+        c.execute("""
+            SELECT exercise_index, reps, weight FROM template_sets
+            WHERE template_id = ?
+            ORDER BY exercise_index, set_number
+        """, (template_id,))
+        sets_by_exercise = {}
+        for ex_index, r, w in c.fetchall():
+            sets_by_exercise.setdefault(ex_index, []).append(WorkoutSet(reps=r, weight=w))
 
-            exercises.append(Exercise(name=ex_name, type=ex_type, sets=sets))
+        exercises = [
+            Exercise(name=ex_name, type=ex_type, sets=sets_by_exercise.get(ex_index, []),
+                     duration_minutes=duration, distance_mi=distance)
+            for ex_index, ex_name, ex_type, duration, distance in exercise_rows
+        ]
 
         # Append the fully constructed Template object to the list
         templates.append(Template(
@@ -96,17 +121,11 @@ def get_templates(username: str) -> List[Template]:
             exercises=exercises
         ))
 
-    conn.close()
     return templates
 
 
-def update_template(username: str, updated_template: Template):
-    """
-    Updates or replaces a template by name (case-insensitive).
-    Deletes old records and inserts updated template data.
-    """
-    conn = get_connection()
-    c = conn.cursor()
+def _update_template(c, username: str, updated_template: Template):
+    note_write(username)
 
     # Find existing template by name (case-insensitive) for this user
     c.execute("""
@@ -124,22 +143,28 @@ def update_template(username: str, updated_template: Template):
 
     # Insert the updated template record
     c.execute("""
-        INSERT INTO templates (id, username, name, type)
-        VALUES (?, ?, ?, ?)
+        INSERT INTO templates (id, username, name, type, updated_at)
+        VALUES (?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
     """, (updated_template.id, username, updated_template.name.strip(), updated_template.type))
 
     # Insert updated exercises and their sets
-    for i, exercise in enumerate(updated_template.exercises or []):
-        c.execute("""
-            INSERT INTO template_exercises (template_id, exercise_index, name, type)
-            VALUES (?, ?, ?, ?)
-        """, (updated_template.id, i, exercise.name, exercise.type))
+    _insert_template_exercises(c, updated_template)
 
-        for j, s in enumerate(exercise.sets):
-            c.execute("""
-                INSERT INTO template_sets (template_id, exercise_index, set_number, reps, weight)
-                VALUES (?, ?, ?, ?, ?)
-            """, (updated_template.id, i, j, s.reps, s.weight))
+    # Replacing under a new id reads downstream as the old template going away
+    if result and existing_id != updated_template.id:
+        _record_change(c, "template", existing_id, username, "delete")
+    op = "update" if result and existing_id == updated_template.id else "insert"
+    _record_change(c, "template", updated_template.id, username, op)
 
-    conn.commit()
-    conn.close()
+
+def _insert_template_exercises(c, template: Template):
+    for i, exercise in enumerate(template.exercises or []):
+        c.execute("""
+            INSERT INTO template_exercises (template_id, exercise_index, name, type, duration_minutes, distance_mi)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (template.id, i, exercise.name, exercise.type, exercise.duration_minutes, exercise.distance_mi))
+
+        c.executemany("""
+            INSERT INTO template_sets (template_id, exercise_index, set_number, reps, weight)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(template.id, i, j, s.reps, s.weight) for j, s in enumerate(exercise.sets or [])])
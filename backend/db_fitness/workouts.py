@@ -1,142 +1,204 @@
 # backend/db_fitness/workouts.py
 
-from typing import List
-from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import date, datetime
 from backend.models import Workout, WorkoutSet, Exercise
+from backend.db_fitness.activity import _mark_active, _refresh_day, _workout_day
+from backend.db_fitness.archive import _archive_reached, _archived_payloads, _remove_archived, _unpack
+from backend.db_fitness.changes import _record_change
+from backend.db_fitness.dedupe import _find_duplicate, workout_hash
+from backend.db_fitness.exercise_names import _forget_exercises, _note_exercises
+from backend.db_fitness.history import PagedWorkouts, memory_budget
 from backend.db_fitness.connection import get_connection
+from backend.db_fitness.replica import get_read_connection, note_write
+from backend.db_fitness.writes import run_write
+from backend.instrumentation import instrumented
 
+# Max workout ids bound into a single IN (...) query when loading exercises and sets
+_ID_BATCH_SIZE = 500
 
-def add_workout(username: str, workout: Workout):
+
+@instrumented
+def add_workout(username: str, workout: Workout, idempotency_key: Optional[str] = None) -> str:
     """
     Adds a workout including its exercises and sets to the database.
     Inserts cardio workouts with distance and duration, strength/bodyweight workouts with exercises and sets.
+    Returns the stored workout's id: workout.id, or the id of the user's existing workout with
+    the same content (a double submit or re-import), in which case nothing is added.
+    Waits and retries while other processes hold the write lock (see backend/db_fitness/writes.py).
     """
-    conn = get_connection()
-    c = conn.cursor()
+    return run_write(username, _add_workout, username, workout, idempotency_key=idempotency_key)
 
-    try:
-        # Insert main workout record
-        c.execute("""
-            INSERT INTO workouts (id, username, name, type, date, duration_minutes, distance_mi)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            workout.id,
-            username,
-            workout.name,
-            workout.type,
-            workout.date.isoformat(),
-            workout.duration_minutes,
-            workout.distance_mi,
-        ))
 
-        # Insert each exercise and its sets associated with this workout
-        if workout.exercises:
-            for i, exercise in enumerate(workout.exercises):
-                c.execute("""
-                    INSERT INTO workout_exercises (workout_id, exercise_index, name, type, duration_minutes, distance_mi)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (workout.id, 
-                      i, 
-                      exercise.name, 
-                      exercise.type, 
-                      exercise.duration_minutes if exercise.type == "cardio" else None, 
-                      exercise.distance_mi if exercise.type == "cardio" else None
-                    ))
-                
-                # Sets only for only strength/bodyweight workouts
-                if exercise.type in ["strength", "bodyweight"] and exercise.sets:
-                    for j, s in enumerate(exercise.sets):
-                        c.execute("""
-                            INSERT INTO exercise_sets (workout_id, exercise_index, set_number, reps, weight)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, (workout.id, i, j, s.reps, s.weight))
+@instrumented
+def add_workouts(username: str, workouts: List[Workout], idempotency_key: Optional[str] = None) -> List[str]:
+    """
+    Adds many workouts (an import) in one transaction, skipping any whose content the user
+    already has, including repeats within the batch. Returns the stored id for each workout.
+    """
+    return run_write(username, _add_workouts, username, workouts, idempotency_key=idempotency_key)
 
-        conn.commit()
 
-    except Exception as e:
-        # Propagate exceptions to calling code; no swallowing errors here
-        raise
+@instrumented
+def get_all_workouts(username: str) -> Sequence[Workout]:
+    """
+    Fetches all workouts for a user, including all nested exercises and sets.
+    Returns a list of fully constructed Workout objects in no particular order, or, in
+    memory-budget mode for a user with more workouts than the budget, a PagedWorkouts that
+    loads them a page at a time, newest first (see backend/db_fitness/history.py).
+    Served from the read replica when one is enabled (see backend/db_fitness/replica.py).
+    """
+    conn = get_read_connection(username)
+    workouts = _get_all_workouts_within(conn.cursor(), username, memory_budget())
+    conn.close()
+    return workouts
+
 
-    finally:
-        conn.close()
+def _get_all_workouts_within(c, username: str, budget: Optional[int]) -> Sequence[Workout]:
+    """All of a user's workouts as a list, or a PagedWorkouts if there are more than budget."""
+    if budget is not None:
+        total = _count_workouts(c, username)
+        if total > budget:
+            return PagedWorkouts(username, total)
+    return _get_all_workouts(c, username)
 
 
-def get_all_workouts(username: str) -> List[Workout]:
+@instrumented
+def get_workout(username: str, workout_id: str) -> Optional[Workout]:
     """
-    Fetches all workouts for a user, including all nested exercises and sets.
-    Returns a list of fully constructed Workout objects.
+    Fetches a single workout with its exercises and sets, or None if the user has no such workout.
     """
-    conn = get_connection()
-    c = conn.cursor()
+    conn = get_connection(username=username)
+    workout = _get_workout(conn.cursor(), username, workout_id)
+    conn.close()
+    return workout
 
-    # Get basic workout info for all workouts belonging to the user
-    c.execute("""
-        SELECT id, name, type, date, duration_minutes, distance_mi
-        FROM workouts WHERE username = ?
-    """, (username,))
-    workout_rows = c.fetchall()
 
-    workouts = []
-    for workout_id, name, type_, date_str, duration, distance in workout_rows:
-        # Fetch exercises for this workout ordered by index
-        c.execute("""
-            SELECT exercise_index, name, type, duration_minutes, distance_mi
-            FROM workout_exercises
-            WHERE workout_id = ? ORDER BY exercise_index
-        """, (workout_id,))
-        exercise_rows = c.fetchall()
+@instrumented
+def get_workouts_page(
+    username: str,
+    limit: int,
+    offset: int = 0,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    workout_type: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> List[Workout]:
+    """
+    Fetches one page of a user's workouts, newest first, with the same optional
+    date range and type filters as backend.filters, plus an optional case-insensitive
+    name keyword. Only the page's exercises and sets are loaded.
+    """
+    conn = get_connection(username=username)
+    workouts = _get_workouts_page(conn.cursor(), username, limit, offset, start_date, end_date, workout_type, keyword)
+    conn.close()
+    return workouts
 
-        exercises = []
-        for ex_index, ex_name, ex_type, dur_min, dist_mi in exercise_rows:
-            if ex_type in ["strength", "bodyweight"]:
-                # Fetch sets for each exercise ordered by set number
-                c.execute("""
-                    SELECT reps, weight FROM exercise_sets
-                    WHERE workout_id = ? AND exercise_index = ?
-                    ORDER BY set_number
-                """, (workout_id, ex_index))
-
-                sets = [WorkoutSet(reps=r, weight=w) for r, w in c.fetchall()]
-                exercises.append(Exercise(name=ex_name, type=ex_type, sets=sets))
-            
-            elif ex_type == "cardio":
-                # Cardio has no sets, add extra logic to store cardio details per exercise(not in DB schema)
-                # Assign none to sets here to avoid confusion
-                exercises.append(Exercise(
-                    name=ex_name,
-                    type=ex_type,
-                    sets=None,
-                    duration_minutes= dur_min,
-                    distance_mi= dist_mi,
-                    ))
-            else:
-                # Fallback: treat as strength/bodyweight with no sets
-                exercises.append(Exercise(name=ex_name, type=ex_type, sets=[]))
 
-        workouts.append(Workout(
-            id=workout_id,
-            name=name,
-            type=type_,
-            date=datetime.fromisoformat(date_str).date(),
-            exercises=exercises or None,
-            duration_minutes=duration,
-            distance_mi=distance
-        ))
+@instrumented
+def count_workouts(
+    username: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    workout_type: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> int:
+    """
+    Counts a user's workouts matching the same filters as get_workouts_page.
+    """
+    conn = get_connection(username=username)
+    total = _count_workouts(conn.cursor(), username, start_date, end_date, workout_type, keyword)
+    conn.close()
+    return total
 
+
+@instrumented
+def get_workout_period_summaries(
+    username: str,
+    period: str = "week",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    workout_type: Optional[str] = None,
+) -> List[Tuple[str, int]]:
+    """
+    Returns (period_start, workout_count) pairs, newest first, for the filtered workouts.
+    Weeks start on Monday and are keyed by their ISO date; months are keyed as YYYY-MM.
+    Served from the read replica when one is enabled.
+    """
+    conn = get_read_connection(username)
+    summaries = _get_workout_period_summaries(conn.cursor(), username, period, start_date, end_date, workout_type)
     conn.close()
-    return workouts
+    return summaries
 
 
-def update_workout(username: str, workout_id: str, workout: Workout):
+@instrumented
+def get_workout_stats(username: str) -> Dict[str, object]:
+    """
+    Returns aggregate stats over all of a user's workouts, computed in SQL:
+    workout counts (total and per type), date range, strength totals and cardio totals.
+    Served from the read replica when one is enabled.
+    """
+    conn = get_read_connection(username)
+    stats = _get_workout_stats(conn.cursor(), username)
+    conn.close()
+    return stats
+
+
+@instrumented
+def update_workout(username: str, workout_id: str, workout: Workout, idempotency_key: Optional[str] = None):
     """
     Updates an existing workout and all its nested exercises and sets.
     """
-    conn = get_connection()
-    c = conn.cursor()
+    run_write(username, _update_workout, username, workout_id, workout, idempotency_key=idempotency_key)
+
+
+@instrumented
+def delete_workout(username: str, workout_id: str, idempotency_key: Optional[str] = None):
+    """
+    Deletes a workout and all associated exercises and sets.
+    """
+    run_write(username, _delete_workout, username, workout_id, idempotency_key=idempotency_key)
+
+
+# ------------------ Cursor-level helpers ------------------
+# The public functions above open a connection and commit; these run on a caller's cursor
+# so other layers (async access, batched writes) can reuse the same SQL in their own transactions.
+# Write helpers call note_write so the user's own reads skip read replicas taken before the
+# write commits.
+
+def _add_workout(c, username: str, workout: Workout) -> str:
+    # The same content saved again (double-click, re-run import) keeps the first copy
+    content_hash = workout_hash(workout)
+    existing = _find_duplicate(c, username, content_hash)
+    if existing is not None:
+        return existing
+
+    note_write(username)
+
+    # Insert main workout record
+    _insert_workout_row(c, username, workout.id, workout, content_hash)
+
+    # Insert each exercise and its sets associated with this workout
+    _insert_exercises(c, workout.id, workout)
+
+    _mark_active(c, username, workout.date.isoformat())
+    _record_change(c, "workout", workout.id, username, "insert")
+    _note_exercises(c, username, workout)
+    return workout.id
+
+
+def _add_workouts(c, username: str, workouts: List[Workout]) -> List[str]:
+    return [_add_workout(c, username, workout) for workout in workouts]
+
+
+def _update_workout(c, username: str, workout_id: str, workout: Workout):
+    note_write(username)
+    old_day = _workout_day(c, username, workout_id)
 
     # Update core workout data
     c.execute("""
-        UPDATE workouts SET name = ?, type = ?, date = ?, duration_minutes = ?, distance_mi = ?
+        UPDATE workouts SET name = ?, type = ?, date = ?, duration_minutes = ?, distance_mi = ?,
+            updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), content_hash = ?
         WHERE id = ? AND username = ?
     """, (
         workout.name,
@@ -144,44 +206,403 @@ def update_workout(username: str, workout_id: str, workout: Workout):
         workout.date.isoformat(),
         workout.duration_minutes,
         workout.distance_mi,
+        workout_hash(workout),
         workout_id,
         username
     ))
+    if c.rowcount == 0:
+        # Editing an archived workout brings it back into the hot tables
+        if not _remove_archived(c, username, workout_id):
+            return  # Not this user's workout; leave its exercises alone
+        _insert_workout_row(c, username, workout_id, workout)
 
     # Delete existing exercises and sets for the workout to replace with updated data
     c.execute("DELETE FROM workout_exercises WHERE workout_id = ?", (workout_id,))
     c.execute("DELETE FROM exercise_sets WHERE workout_id = ?", (workout_id,))
 
     # Insert updated exercises and sets
+    _insert_exercises(c, workout_id, workout)
+
+    if old_day != workout.date.isoformat():
+        _refresh_day(c, username, old_day)
+        _mark_active(c, username, workout.date.isoformat())
+    _forget_exercises(username)
+    _record_change(c, "workout", workout_id, username, "update")
+
+
+def _delete_workout(c, username: str, workout_id: str):
+    note_write(username)
+    day = _workout_day(c, username, workout_id)
+
+    # Delete the workout record itself for this user
+    c.execute("DELETE FROM workouts WHERE id = ? AND username = ?", (workout_id, username))
+    if c.rowcount == 0:
+        if _remove_archived(c, username, workout_id):
+            _refresh_day(c, username, day)
+            _forget_exercises(username)
+            _record_change(c, "workout", workout_id, username, "delete")
+        return  # Archived (its sets went with it), or not this user's workout
+
+    # Delete all sets for this workout
+    c.execute("DELETE FROM exercise_sets WHERE workout_id = ?", (workout_id,))
+    # Delete all exercises for this workout
+    c.execute("DELETE FROM workout_exercises WHERE workout_id = ?", (workout_id,))
+
+    _refresh_day(c, username, day)
+    _forget_exercises(username)
+    _record_change(c, "workout", workout_id, username, "delete")
+
+
+def _insert_workout_row(c, username: str, workout_id: str, workout: Workout, content_hash: Optional[str] = None):
+    c.execute("""
+        INSERT INTO workouts (id, username, name, type, date, duration_minutes, distance_mi, updated_at, content_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'), ?)
+    """, (
+        workout_id,
+        username,
+        workout.name,
+        workout.type,
+        workout.date.isoformat(),
+        workout.duration_minutes,
+        workout.distance_mi,
+        content_hash or workout_hash(workout),
+    ))
+
+
+def _insert_exercises(c, workout_id: str, workout: Workout):
     for i, exercise in enumerate(workout.exercises or []):
         c.execute("""
             INSERT INTO workout_exercises (workout_id, exercise_index, name, type, duration_minutes, distance_mi)
             VALUES (?, ?, ?, ?, ?, ?)
-        """, (workout_id, i, exercise.name, exercise.type, exercise.duration_minutes, exercise.distance_mi))
+        """, (workout_id,
+              i,
+              exercise.name,
+              exercise.type,
+              exercise.duration_minutes if exercise.type == "cardio" else None,
+              exercise.distance_mi if exercise.type == "cardio" else None
+            ))
+
+        # Sets only for only strength/bodyweight workouts
         if exercise.type in ["strength", "bodyweight"] and exercise.sets:
-            for j, s in enumerate(exercise.sets):
-                c.execute("""
-                    INSERT INTO exercise_sets (workout_id, exercise_index, set_number, reps, weight)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (workout_id, i, j, s.reps, s.weight))
+            c.executemany("""
+                INSERT INTO exercise_sets (workout_id, exercise_index, set_number, reps, weight)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(workout_id, i, j, s.reps, s.weight) for j, s in enumerate(exercise.sets)])
 
-    conn.commit()
-    conn.close()
+
+def _get_all_workouts(c, username: str) -> List[Workout]:
+    # Get basic workout info for all workouts belonging to the user
+    c.execute("""
+        SELECT id, name, type, date, duration_minutes, distance_mi
+        FROM workouts WHERE username = ?
+    """, (username,))
+    workouts = _build_workouts(c, c.fetchall())
+
+    # Plus anything moved to the archive (see backend/db_fitness/archive.py)
+    if _archive_reached(c, None):
+        c.execute("""
+            SELECT id, name, type, date, duration_minutes, distance_mi
+            FROM archived_workouts WHERE username = ?
+        """, (username,))
+        workouts += _build_archived_workouts(c, c.fetchall())
+    return workouts
+
+
+def _get_workout(c, username: str, workout_id: str) -> Optional[Workout]:
+    c.execute("""
+        SELECT id, name, type, date, duration_minutes, distance_mi
+        FROM workouts WHERE id = ? AND username = ?
+    """, (workout_id, username))
+    workouts = _build_workouts(c, c.fetchall())
+    if not workouts and _archive_reached(c, None):
+        c.execute("""
+            SELECT id, name, type, date, duration_minutes, distance_mi
+            FROM archived_workouts WHERE id = ? AND username = ?
+        """, (workout_id, username))
+        workouts = _build_archived_workouts(c, c.fetchall())
+    return workouts[0] if workouts else None
+
+
+def _get_workouts_page(
+    c,
+    username: str,
+    limit: int,
+    offset: int = 0,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    workout_type: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> List[Workout]:
+    where, params = _workout_filters(username, start_date, end_date, workout_type, keyword)
+    if not _archive_reached(c, start_date):
+        c.execute(f"""
+            SELECT id, name, type, date, duration_minutes, distance_mi
+            FROM workouts WHERE {where}
+            ORDER BY date DESC, id
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+        return _build_workouts(c, c.fetchall())
+
+    # The range reaches the archive: page over both, each side read in (username, date) order
+    archived_where, archived_params = _workout_filters(username, start_date, end_date, workout_type, keyword, True)
+    c.execute(f"""
+        SELECT id, name, type, date, duration_minutes, distance_mi, 0 AS archived
+        FROM workouts WHERE {where}
+        UNION ALL
+        SELECT id, name, type, date, duration_minutes, distance_mi, 1 AS archived
+        FROM archived_workouts WHERE {archived_where}
+        ORDER BY date DESC, id
+        LIMIT ? OFFSET ?
+    """, params + archived_params + [limit, offset])
+    rows = c.fetchall()
+    built = {
+        w.id: w for w in
+        _build_workouts(c, [row[:6] for row in rows if not row[6]])
+        + _build_archived_workouts(c, [row[:6] for row in rows if row[6]])
+    }
+    return [built[row[0]] for row in rows]
+
+
+def _count_workouts(
+    c,
+    username: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    workout_type: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> int:
+    where, params = _workout_filters(username, start_date, end_date, workout_type, keyword)
+    c.execute(f"SELECT COUNT(*) FROM workouts WHERE {where}", params)
+    total = c.fetchone()[0]
+
+    if _archive_reached(c, start_date):
+        where, params = _workout_filters(username, start_date, end_date, workout_type, keyword, True)
+        c.execute(f"SELECT COUNT(*) FROM archived_workouts WHERE {where}", params)
+        total += c.fetchone()[0]
+    return total
 
 
-def delete_workout(username: str, workout_id: str):
+def _get_workout_period_summaries(
+    c,
+    username: str,
+    period: str = "week",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    workout_type: Optional[str] = None,
+) -> List[Tuple[str, int]]:
+    if period == "week":
+        period_expr = "date(date, '-6 days', 'weekday 1')"
+    elif period == "month":
+        period_expr = "substr(date, 1, 7)"
+    else:
+        raise ValueError(f"Invalid period: {period}")
+
+    where, params = _workout_filters(username, start_date, end_date, workout_type)
+    source = f"SELECT date FROM workouts WHERE {where}"
+    if _archive_reached(c, start_date):
+        archived_where, archived_params = _workout_filters(username, start_date, end_date, workout_type, None, True)
+        source += f" UNION ALL SELECT date FROM archived_workouts WHERE {archived_where}"
+        params = params + archived_params
+
+    c.execute(f"""
+        SELECT {period_expr} AS period_start, COUNT(*)
+        FROM ({source})
+        GROUP BY period_start
+        ORDER BY period_start DESC
+    """, params)
+    return c.fetchall()
+
+
+def _get_workout_stats(c, username: str) -> Dict[str, object]:
+    c.execute("""
+        SELECT COUNT(*), MIN(date), MAX(date),
+               COALESCE(SUM(duration_minutes), 0), COALESCE(SUM(distance_mi), 0)
+        FROM workouts WHERE username = ?
+    """, (username,))
+    total, first_date, last_date, workout_minutes, workout_miles = c.fetchone()
+
+    c.execute("SELECT type, COUNT(*) FROM workouts WHERE username = ? GROUP BY type", (username,))
+    by_type = dict(c.fetchall())
+
+    # Strength/bodyweight totals across every recorded set
+    c.execute("""
+        SELECT COUNT(*), COALESCE(SUM(s.reps), 0), COALESCE(SUM(s.reps * s.weight), 0)
+        FROM exercise_sets s JOIN workouts w ON w.id = s.workout_id
+        WHERE w.username = ?
+    """, (username,))
+    total_sets, total_reps, total_volume = c.fetchone()
+
+    # Cardio recorded per exercise inside workouts
+    c.execute("""
+        SELECT COALESCE(SUM(e.duration_minutes), 0), COALESCE(SUM(e.distance_mi), 0)
+        FROM workout_exercises e JOIN workouts w ON w.id = e.workout_id
+        WHERE w.username = ? AND e.type = 'cardio'
+    """, (username,))
+    exercise_minutes, exercise_miles = c.fetchone()
+
+    # Archived workouts carry their totals in columns, so their payloads stay packed
+    if _archive_reached(c, None):
+        c.execute("""
+            SELECT COUNT(*), MIN(date), MAX(date),
+                   COALESCE(SUM(duration_minutes), 0), COALESCE(SUM(distance_mi), 0),
+                   COALESCE(SUM(set_count), 0), COALESCE(SUM(total_reps), 0), COALESCE(SUM(total_volume), 0),
+                   COALESCE(SUM(cardio_minutes), 0), COALESCE(SUM(cardio_miles), 0)
+            FROM archived_workouts WHERE username = ?
+        """, (username,))
+        row = c.fetchone()
+        if row[0]:
+            total += row[0]
+            first_date = min(d for d in (first_date, row[1]) if d)
+            last_date = max(d for d in (last_date, row[2]) if d)
+            workout_minutes += row[3]
+            workout_miles += row[4]
+            total_sets += row[5]
+            total_reps += row[6]
+            total_volume += row[7]
+            exercise_minutes += row[8]
+            exercise_miles += row[9]
+
+            c.execute("SELECT type, COUNT(*) FROM archived_workouts WHERE username = ? GROUP BY type", (username,))
+            for type_, count in c.fetchall():
+                by_type[type_] = by_type.get(type_, 0) + count
+
+    return {
+        "total_workouts": total,
+        "workouts_by_type": by_type,
+        "first_workout_date": first_date,
+        "last_workout_date": last_date,
+        "total_sets": total_sets,
+        "total_reps": total_reps,
+        "total_volume_lbs": total_volume,
+        "cardio_minutes": workout_minutes + exercise_minutes,
+        "cardio_distance_mi": workout_miles + exercise_miles,
+    }
+
+
+def _workout_filters(
+    username: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    workout_type: Optional[str],
+    keyword: Optional[str] = None,
+    archived: bool = False,
+) -> Tuple[str, list]:
     """
-    Deletes a workout and all associated exercises and sets.
+    Builds the WHERE clause shared by the paged workout queries (on archived_workouts when archived).
+    The type filter mirrors filter_workouts_by_type: match any exercise's type,
+    or the workout's own type when it has no exercises.
     """
-    conn = get_connection()
-    c = conn.cursor()
+    clauses = ["username = ?"]
+    params: list = [username]
 
-    # Delete all sets for this workout
-    c.execute("DELETE FROM exercise_sets WHERE workout_id = ?", (workout_id,))
-    # Delete all exercises for this workout
-    c.execute("DELETE FROM workout_exercises WHERE workout_id = ?", (workout_id,))
-    # Delete the workout record itself for this user
-    c.execute("DELETE FROM workouts WHERE id = ? AND username = ?", (workout_id, username))
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date.isoformat())
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(end_date.isoformat())
+    if workout_type and archived:
+        # Archived rows list their exercise types as ",strength,cardio,"
+        clauses.append("(instr(exercise_types, ?) > 0 OR (exercise_types = '' AND type = ?))")
+        params.extend([f",{workout_type},", workout_type])
+    elif workout_type:
+        clauses.append("""(
+            EXISTS (SELECT 1 FROM workout_exercises e WHERE e.workout_id = workouts.id AND e.type = ?)
+            OR (NOT EXISTS (SELECT 1 FROM workout_exercises e WHERE e.workout_id = workouts.id) AND type = ?)
+        )""")
+        params.extend([workout_type, workout_type])
+    if keyword:
+        # LIKE is case-insensitive for ASCII; escape wildcards so the keyword matches literally
+        clauses.append("name LIKE ? ESCAPE '\\'")
+        escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
 
-    conn.commit()
-    conn.close()
+    return " AND ".join(clauses), params
+
+
+def _build_workouts(c, workout_rows) -> List[Workout]:
+    """
+    Turns workout rows into Workout objects, loading exercises and sets for all
+    of them in batched queries instead of one query per workout and exercise.
+    """
+    workout_ids = [row[0] for row in workout_rows]
+    exercises_by_workout: Dict[str, list] = {}
+    sets_by_exercise: Dict[Tuple[str, int], List[WorkoutSet]] = {}
+
+    for i in range(0, len(workout_ids), _ID_BATCH_SIZE):
+        batch = workout_ids[i:i + _ID_BATCH_SIZE]
+        placeholders = ", ".join("?" for _ in batch)
+
+        # Fetch exercises for this batch ordered by index
+        c.execute(f"""
+            SELECT workout_id, exercise_index, name, type, duration_minutes, distance_mi
+            FROM workout_exercises
+            WHERE workout_id IN ({placeholders}) ORDER BY workout_id, exercise_index
+        """, batch)
+        for workout_id, ex_index, ex_name, ex_type, dur_min, dist_mi in c.fetchall():
+            exercises_by_workout.setdefault(workout_id, []).append((ex_index, ex_name, ex_type, dur_min, dist_mi))
+
+        # Fetch sets for this batch ordered by set number
+        c.execute(f"""
+            SELECT workout_id, exercise_index, reps, weight FROM exercise_sets
+            WHERE workout_id IN ({placeholders})
+            ORDER BY workout_id, exercise_index, set_number
+        """, batch)
+        for workout_id, ex_index, r, w in c.fetchall():
+            sets_by_exercise.setdefault((workout_id, ex_index), []).append(WorkoutSet(reps=r, weight=w))
+
+    return _assemble_workouts(workout_rows, exercises_by_workout, sets_by_exercise)
+
+
+def _build_archived_workouts(c, workout_rows) -> List[Workout]:
+    """
+    Same as _build_workouts for rows of archived_workouts: exercises and sets come from
+    each workout's packed payload instead of the exercise tables.
+    """
+    exercises_by_workout: Dict[str, list] = {}
+    sets_by_exercise: Dict[Tuple[str, int], List[WorkoutSet]] = {}
+
+    workout_ids = [row[0] for row in workout_rows]
+    for i in range(0, len(workout_ids), _ID_BATCH_SIZE):
+        for workout_id, payload in _archived_payloads(c, workout_ids[i:i + _ID_BATCH_SIZE]).items():
+            exercise_rows, sets_by_index = _unpack(payload)
+            exercises_by_workout[workout_id] = exercise_rows
+            for ex_index, sets in sets_by_index.items():
+                sets_by_exercise[(workout_id, ex_index)] = [WorkoutSet(reps=r, weight=w) for r, w in sets]
+
+    return _assemble_workouts(workout_rows, exercises_by_workout, sets_by_exercise)
+
+
+def _assemble_workouts(workout_rows, exercises_by_workout, sets_by_exercise) -> List[Workout]:
+    workouts = []
+    for workout_id, name, type_, date_str, duration, distance in workout_rows:
+        exercises = []
+        for ex_index, ex_name, ex_type, dur_min, dist_mi in exercises_by_workout.get(workout_id, []):
+            if ex_type in ["strength", "bodyweight"]:
+                sets = sets_by_exercise.get((workout_id, ex_index), [])
+                exercises.append(Exercise(name=ex_name, type=ex_type, sets=sets))
+
+            elif ex_type == "cardio":
+                # Cardio has no sets; duration and distance are stored per exercise
+                exercises.append(Exercise(
+                    name=ex_name,
+                    type=ex_type,
+                    sets=None,
+                    duration_minutes=dur_min,
+                    distance_mi=dist_mi,
+                    ))
+            else:
+                # Fallback: treat as strength/bodyweight with no sets
+                exercises.append(Exercise(name=ex_name, type=ex_type, sets=[]))
+
+        workouts.append(Workout(
+            id=workout_id,
+            name=name,
+            type=type_,
+            date=datetime.fromisoformat(date_str).date(),
+            exercises=exercises or None,
+            duration_minutes=duration,
+            distance_mi=distance
+        ))
+
+    return workouts
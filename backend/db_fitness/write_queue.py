@@ -0,0 +1,252 @@
+# backend/db_fitness/write_queue.py
+#
+# Group-commit queue for workout writes. When many sessions save at once (a class finishing
+# together), their writes are coalesced into one transaction every few milliseconds instead
+# of each opening a connection and fighting over SQLite's single write lock.
+#
+#   from backend.db_fitness.write_queue import add_workout
+#   add_workout(username, workout)   # blocks until the batch holding this write commits
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.models import Workout
+from backend.db_fitness.connection import get_connection, get_db_path
+from backend.db_fitness.sharding import shard_path
+from backend.db_fitness.writes import (BUSY_TIMEOUT_MS, _commit_hooks_mark, _drop_commit_hooks,
+                                       _run_commit_hooks, begin_immediate)
+from backend.db_fitness import workouts as _workouts
+from backend.instrumentation import instrumented
+
+MAX_BATCH_SIZE = 256
+MAX_BATCH_DELAY = 0.005  # seconds to wait for more writes after the first one arrives
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    A single writer thread for one database. Pending writes from all callers are drained
+    into one BEGIN IMMEDIATE ... COMMIT transaction; each write runs inside its own SAVEPOINT,
+    so a failing write is rolled back alone and only its caller sees the error.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_batch: int = MAX_BATCH_SIZE,
+                 max_delay: float = MAX_BATCH_DELAY):
+        self.db_path = db_path or get_db_path()
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "queue.Queue" = queue.Queue()
+        # Set when the writer thread dies; submit fails straight away from then on
+        self._error: Optional[BaseException] = None
+        self._state_lock = threading.Lock()
+        self._batch: List[Tuple[Callable, tuple, Future]] = []
+
+        # Counters for diagnostics
+        self.batches = 0
+        self.writes = 0
+        self.largest_batch = 0
+
+        self._thread = threading.Thread(target=self._run, name="fitness-write-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable, *args) -> Future:
+        """
+        Queues func(cursor, *args) (a cursor-level helper such as workouts._add_workout).
+        The returned future resolves with its result once the batch commits, or with its error.
+        """
+        future: Future = Future()
+        with self._state_lock:
+            if self._error is not None:
+                future.set_exception(self._error)
+            else:
+                self._queue.put((func, args, future))
+        return future
+
+    def close(self):
+        """Commits everything already queued, then stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        try:
+            self._serve()
+        except BaseException as e:
+            print(f"[ERROR] Write queue for {self.db_path} stopped: {e}")
+            self._fail(e)
+
+    def _fail(self, error: BaseException):
+        """Fails the writes in hand and every queued or later one, and retires this queue."""
+        with self._state_lock:
+            self._error = error
+        with _queues_lock:
+            if _queues.get(self.db_path) is self:
+                del _queues[self.db_path]  # the next get_write_queue starts a fresh one
+
+        pending = list(self._batch)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item)
+        for func, args, future in pending:
+            if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                future.set_exception(error)
+
+    def _serve(self):
+        conn = get_connection(self.db_path)
+        conn.isolation_level = None  # transactions are managed explicitly below
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+
+            # Gather whatever else arrives within the batching window
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._batch = batch
+            self._commit_batch(conn, batch)
+            self._batch = []
+
+        conn.close()
+
+    def _commit_batch(self, conn, batch: List[Tuple[Callable, tuple, Future]]):
+        outcomes: List[Tuple[Future, object, Optional[BaseException]]] = []
+        c = conn.cursor()
+        try:
+            # Other processes may hold the lock; wait for it with backoff instead of failing the batch
+            begin_immediate(conn, "write_queue")
+            for func, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue  # caller cancelled before the write ran
+
+                c.execute("SAVEPOINT queued_write")
+                mark = _commit_hooks_mark()
+                try:
+                    result = func(c, *args)
+                    c.execute("RELEASE queued_write")
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    _drop_commit_hooks(mark)
+                    c.execute("ROLLBACK TO queued_write")
+                    c.execute("RELEASE queued_write")
+                    outcomes.append((future, None, e))
+            c.execute("COMMIT")
+            _run_commit_hooks()
+
+        except Exception as e:
+            # The transaction itself failed: nothing in this batch was saved
+            _drop_commit_hooks()
+            if conn.in_transaction:
+                conn.rollback()
+            for func, args, future in batch:
+                if future.running():
+                    future.set_exception(e)
+                elif not future.done():
+                    future.set_running_or_notify_cancel()
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.writes += len(outcomes)
+        self.largest_batch = max(self.largest_batch, len(outcomes))
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_queues: Dict[str, WriteQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(db_path: Optional[str] = None) -> WriteQueue:
+    """Returns the process-wide write queue for a database (or shard), starting it on first use."""
+    db_path = db_path or get_db_path()
+    with _queues_lock:
+        if db_path not in _queues or not _queues[db_path]._thread.is_alive():
+            _queues[db_path] = WriteQueue(db_path)
+        return _queues[db_path]
+
+
+def queue_stats() -> Dict[str, int]:
+    """Counters summed over every running queue (one per shard when sharded)."""
+    with _queues_lock:
+        queues = list(_queues.values())
+    return {
+        "queues": len(queues),
+        "batches": sum(q.batches for q in queues),
+        "writes": sum(q.writes for q in queues),
+        "largest_batch": max((q.largest_batch for q in queues), default=0),
+    }
+
+
+@atexit.register
+def close_all():
+    """Flushes and stops every write queue (runs automatically at interpreter exit)."""
+    with _queues_lock:
+        queues = list(_queues.values())
+        _queues.clear()
+    # Joined outside the lock: a writer thread that is failing takes it to retire its queue
+    for write_queue in queues:
+        write_queue.close()
+
+
+# ------------------ Queued versions of the workout writes ------------------
+# Same signatures as backend.db_fitness.workouts; each blocks until its batch commits
+# and raises whatever its own write raised. With sharding on, each shard has its own queue.
+
+@instrumented
+def add_workout(username: str, workout: Workout):
+    """
+    Adds a workout through the group-commit queue.
+    """
+    return get_write_queue(shard_path(username)).submit(_workouts._add_workout, username, workout).result()
+
+
+@instrumented
+def add_workouts(username: str, workouts: List[Workout]):
+    """
+    Adds many workouts (an import) through the group-commit queue, as one job.
+    """
+    return get_write_queue(shard_path(username)).submit(_workouts._add_workouts, username, workouts).result()
+
+
+@instrumented
+def update_workout(username: str, workout_id: str, workout: Workout):
+    """
+    Updates a workout through the group-commit queue.
+    """
+    return get_write_queue(shard_path(username)).submit(_workouts._update_workout, username, workout_id, workout).result()
+
+
+@instrumented
+def delete_workout(username: str, workout_id: str):
+    """
+    Deletes a workout through the group-commit queue.
+    """
+    return get_write_queue(shard_path(username)).submit(_workouts._delete_workout, username, workout_id).result()
@@ -0,0 +1,236 @@
+# backend/db_fitness/writes.py
+#
+# Write transactions that survive other processes holding the lock. Several Streamlit (or API)
+# processes can share one fitness.db; SQLite lets one write at a time, and a transaction that
+# started as a read and then tries to write can fail at once with "database is locked" instead
+# of waiting. Every write here therefore
+#
+#   - takes the write lock up front with BEGIN IMMEDIATE (waiting up to BUSY_TIMEOUT_MS),
+#   - retries a locked attempt with exponential backoff and full jitter, up to RETRY_ATTEMPTS,
+#   - with an idempotency key, stores the write's result in write_keys in the same transaction,
+#     so running it again (a retried request, a resubmitted form) returns that result instead
+#     of writing twice.
+#
+# Lock waits, retries and give-ups are counted per operation for the Diagnostics page.
+#
+# Write helpers that keep in-memory state in step with the database (the exercise name index)
+# register on_commit callbacks; every write transaction (run_write, the write queue, the async
+# writer) runs them after COMMIT and drops them when it rolls back. Code that runs the helpers
+# on a connection it commits itself (fixtures, one-off jobs) goes through transaction(conn),
+# or commit(conn) / rollback(conn), so their callbacks don't pile up on the thread.
+
+import json
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from backend.db_fitness.connection import get_connection
+from backend.instrumentation import Histogram
+
+RETRY_ATTEMPTS = 8
+BACKOFF_BASE = 0.02   # seconds; attempt n sleeps up to BACKOFF_BASE * 2 ** n ...
+BACKOFF_CAP = 1.0     # ... but never more than this
+BUSY_TIMEOUT_MS = 250  # SQLite's own wait for the lock on each attempt
+
+_lock = threading.Lock()
+_lock_waits: Dict[str, Histogram] = {}
+_retries: Dict[str, int] = {}
+_failures: Dict[str, int] = {}
+_replays: Dict[str, int] = {}
+_hooks = threading.local()  # after-commit callbacks of the transaction open on this thread
+
+
+def is_locked_error(error: BaseException) -> bool:
+    """Whether error is SQLite reporting the database as locked or busy (worth retrying)."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _operation(func: Callable) -> str:
+    return getattr(func, "__name__", "write").lstrip("_")
+
+
+def _count(counter: Dict[str, int], operation: str):
+    with _lock:
+        counter[operation] = counter.get(operation, 0) + 1
+
+
+# ------------------ After-commit callbacks ------------------
+
+def _hook_list() -> List[Callable[[], None]]:
+    hooks = getattr(_hooks, "pending", None)
+    if hooks is None:
+        hooks = _hooks.pending = []
+    return hooks
+
+
+def on_commit(callback: Callable[[], None]):
+    """Runs callback once this thread's write transaction commits; it is dropped if it rolls back."""
+    _hook_list().append(callback)
+
+
+def _commit_hooks_mark() -> int:
+    """Where the callbacks of the next write start (for dropping just its own after a SAVEPOINT rollback)."""
+    return len(_hook_list())
+
+
+def _drop_commit_hooks(mark: int = 0):
+    del _hook_list()[mark:]
+
+
+def _run_commit_hooks():
+    hooks, _hooks.pending = _hook_list(), []
+    for callback in hooks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"[ERROR] After-commit callback failed: {e}")
+
+
+def commit(conn: sqlite3.Connection):
+    """Commits conn, then runs the callbacks its writes registered."""
+    conn.commit()
+    _run_commit_hooks()
+
+
+def rollback(conn: sqlite3.Connection):
+    """Rolls conn back and drops the callbacks its writes registered."""
+    conn.rollback()
+    _drop_commit_hooks()
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    For write helpers run on a connection the caller manages: commits when the block ends
+    (call commit(conn) inside to commit in batches) and rolls back if it raises.
+    """
+    _drop_commit_hooks()
+    try:
+        yield conn
+    except BaseException:
+        rollback(conn)
+        raise
+    commit(conn)
+
+
+def begin_immediate(conn: sqlite3.Connection, operation: str):
+    """
+    Opens a write transaction on conn, retrying while another connection holds the lock.
+    Records how long it took under operation; raises the last error after RETRY_ATTEMPTS.
+    """
+    started = time.perf_counter()
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            break
+        except sqlite3.OperationalError as e:
+            if not is_locked_error(e) or attempt == RETRY_ATTEMPTS - 1:
+                _count(_failures, operation)
+                raise
+            _count(_retries, operation)
+            time.sleep(_backoff(attempt))
+    # Callbacks left by helpers run outside any of these transactions never ran; start clean
+    _drop_commit_hooks()
+    with _lock:
+        _lock_waits.setdefault(operation, Histogram()).observe(time.perf_counter() - started)
+
+
+# ------------------ Cursor-level helpers ------------------
+
+def _idempotent_write(c, username: str, key: str, func: Callable, *args):
+    """
+    Runs func(c, *args) once per (username, key): a later call with the same key returns the
+    first call's result without running func. Must run inside the write's transaction.
+    """
+    c.execute("SELECT result FROM write_keys WHERE username = ? AND key = ?", (username, key))
+    row = c.fetchone()
+    if row is not None:
+        _count(_replays, _operation(func))
+        return json.loads(row[0])
+    result = func(c, *args)
+    c.execute("INSERT INTO write_keys (username, key, result) VALUES (?, ?, ?)",
+              (username, key, json.dumps(result)))
+    return result
+
+
+def _prune_write_keys(c, hours: float) -> int:
+    c.execute("DELETE FROM write_keys WHERE created_at < strftime('%Y-%m-%dT%H:%M:%fZ', 'now', ?)",
+              (f"-{hours} hours",))
+    return c.rowcount
+
+
+# ------------------ Running a write ------------------
+
+def run_write(username: str, func: Callable, *args, idempotency_key: Optional[str] = None,
+              db_path: Optional[str] = None):
+    """
+    Runs the cursor-level write func(cursor, *args) in its own BEGIN IMMEDIATE transaction on
+    the user's database (or db_path) and returns its result. An attempt that fails because the
+    database is locked is rolled back and retried; any other error is raised at once.
+    """
+    operation = _operation(func)
+    conn = get_connection(db_path, username=username)
+    conn.isolation_level = None  # transactions are managed explicitly below
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    try:
+        for attempt in range(RETRY_ATTEMPTS):
+            begin_immediate(conn, operation)
+            try:
+                c = conn.cursor()
+                if idempotency_key is None:
+                    result = func(c, *args)
+                else:
+                    result = _idempotent_write(c, username, idempotency_key, func, *args)
+                conn.execute("COMMIT")
+                _run_commit_hooks()
+                return result
+            except Exception as e:
+                _drop_commit_hooks()
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                if not is_locked_error(e) or attempt == RETRY_ATTEMPTS - 1:
+                    if is_locked_error(e):
+                        _count(_failures, operation)
+                    raise
+                _count(_retries, operation)
+                time.sleep(_backoff(attempt))
+    finally:
+        conn.close()
+
+
+# ------------------ Metrics ------------------
+
+def lock_stats() -> List[Dict[str, object]]:
+    """Per-operation lock waits (ms), retries, give-ups and idempotent replays."""
+    with _lock:
+        operations = set(_lock_waits) | set(_failures) | set(_replays)
+        rows = []
+        for operation in sorted(operations):
+            h = _lock_waits.get(operation, Histogram())
+            rows.append({
+                "operation": operation,
+                "writes": h.count,
+                "avg_wait_ms": h.total_seconds / h.count * 1000 if h.count else 0.0,
+                "p95_wait_ms": h.percentile(95) * 1000,
+                "max_wait_ms": h.max_seconds * 1000,
+                "retries": _retries.get(operation, 0),
+                "gave_up": _failures.get(operation, 0),
+                "replayed": _replays.get(operation, 0),
+            })
+    return rows
+
+
+def reset_lock_stats():
+    with _lock:
+        for counter in (_lock_waits, _retries, _failures, _replays):
+            counter.clear()
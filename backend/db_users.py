@@ -2,21 +2,34 @@
 
 import os
 import sqlite3
+from backend.instrumentation import connection_factory, instrumented
+
+def get_db_path() -> str:
+    """
+    Returns the path of users.db. Defaults to the backend directory; the USERS_DB_PATH
+    environment variable points the app at another file (e.g. a temporary database).
+    """
+    db_path = os.environ.get("USERS_DB_PATH")
+    if db_path:
+        return os.path.abspath(db_path)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "users.db")
+
 
 def get_connection():
     """
     Connects to the users.db database inside the backend directory.
     Creates the file if it doesn't exist.
     """
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(base_dir, "users.db")
+    db_path = get_db_path()
 
     # Create the file if it doesn't exist
     if not os.path.exists(db_path):
         open(db_path, "a").close()
 
     try:
-        return sqlite3.connect(db_path)
+        return sqlite3.connect(db_path, factory=connection_factory())
     except Exception as e:
         print(f"[ERROR] Could not connect to users.db: {e}")
         raise
@@ -25,6 +38,7 @@ def get_connection():
 def init_db():
     conn = get_connection()
     c = conn.cursor()
+    c.execute("PRAGMA auto_vacuum = INCREMENTAL")  # only applies to a new, empty database
     c.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -37,6 +51,7 @@ def init_db():
 
 
 
+@instrumented
 def create_user(username: str):
     """
     Adds a new user to the users table.
@@ -49,6 +64,7 @@ def create_user(username: str):
     conn.close()
 
 
+@instrumented
 def get_user_by_username(username: str):
     """
     Returns the user if they exist, otherwise None.
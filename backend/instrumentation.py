@@ -0,0 +1,421 @@
+# backend/instrumentation.py
+#
+# Optional instrumentation for the backend: call counts, row counts and latency histograms
+# per data function and per normalized SQL statement, plus a slow-query log.
+#
+# Off by default. Turn it on with FITNESS_INSTRUMENT=1 (or enable() at runtime); while it is
+# off, data functions pay two boolean checks (this and backend/memory_profile.py) and
+# connections are plain sqlite3 connections.
+
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Sequence
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from backend import memory_profile
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+SLOW_LOG_SIZE = 200
+
+_enabled = os.environ.get("FITNESS_INSTRUMENT") == "1"
+_slow_query_seconds = float(os.environ.get("FITNESS_SLOW_QUERY_MS", "100")) / 1000
+_lock = threading.Lock()
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, plus call and row totals."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+
+    def observe(self, seconds: float, rows: int = 0):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += rows
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile: the upper bound of the bucket holding it."""
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.bucket_counts[:-1]):
+            seen += n
+            if seen >= target:
+                return BUCKETS[i]
+        return self.max_seconds
+
+
+_function_stats: Dict[str, Histogram] = {}
+_sql_stats: Dict[str, Histogram] = {}
+_slow_queries: Deque[Dict[str, object]] = deque(maxlen=SLOW_LOG_SIZE)
+# (database, normalized sql) -> (sql, parameters) of its first run, while capturing
+_captured: Optional[Dict[Tuple[str, str], Tuple[str, object]]] = None
+
+
+# ------------------ Switches ------------------
+
+def enable(slow_query_ms: Optional[float] = None):
+    """Turns instrumentation on. Connections opened from now on are timed."""
+    global _enabled
+    _enabled = True
+    if slow_query_ms is not None:
+        set_slow_query_threshold(slow_query_ms)
+
+
+def set_slow_query_threshold(slow_query_ms: float):
+    """Statements at least this slow are written to the slow-query log."""
+    global _slow_query_seconds
+    _slow_query_seconds = slow_query_ms / 1000
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def slow_query_threshold_ms() -> float:
+    return _slow_query_seconds * 1000
+
+
+def start_capture():
+    """
+    Keeps the first run (database, SQL and parameters) of every distinct statement on
+    instrumented connections until stop_capture(), e.g. to check their query plans.
+    """
+    global _captured
+    with _lock:
+        _captured = {}
+
+
+def stop_capture() -> List[Tuple[str, str, object]]:
+    """Stops capturing; returns (database, sql, parameters) in the order first seen."""
+    global _captured
+    with _lock:
+        captured, _captured = _captured or {}, None
+    return [(database, sql, params) for (database, _), (sql, params) in captured.items()]
+
+
+def reset():
+    """Clears every recorded stat and the slow-query log."""
+    with _lock:
+        _function_stats.clear()
+        _sql_stats.clear()
+        _slow_queries.clear()
+
+
+# ------------------ Data functions ------------------
+
+def instrumented(func: Callable) -> Callable:
+    """
+    Decorator for backend data functions: records call latency and rows returned
+    (list length, 1 for a single object, 0 for None) under the function's dotted name,
+    and memory use while backend.memory_profile is on.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled and not memory_profile.is_enabled():
+            return func(*args, **kwargs)
+
+        with memory_profile.profile(f"function:{name}"):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            started = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                if isinstance(result, Sequence) and not isinstance(result, (str, bytes)):
+                    rows = len(result)
+                else:
+                    rows = 0 if result is None or isinstance(result, bool) else 1
+                with _lock:
+                    _function_stats.setdefault(name, Histogram()).observe(elapsed, rows)
+
+    return wrapper
+
+
+# ------------------ SQL statements ------------------
+
+def connection_factory():
+    """
+    The sqlite3.connect(factory=...) to use for new connections:
+    InstrumentedConnection while instrumentation is on, the plain class otherwise.
+    """
+    return InstrumentedConnection if _enabled else sqlite3.Connection
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses a statement to its shape so the same query with different values or
+    IN-list lengths is counted together: "SELECT ... WHERE id IN (?, ?, ?)" -> "... IN (?...)".
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _record_statement(sql: str, seconds: float, rows: int, expanded: Optional[str]):
+    key = normalize_sql(sql)
+    with _lock:
+        _sql_stats.setdefault(key, Histogram()).observe(seconds, rows)
+        if seconds >= _slow_query_seconds:
+            _slow_queries.append({
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "ms": seconds * 1000,
+                "rows": rows,
+                "sql": key,
+                "expanded": _WHITESPACE.sub(" ", expanded or sql).strip(),
+            })
+    if seconds >= _slow_query_seconds:
+        print(f"[SLOW QUERY] {seconds * 1000:.1f} ms, {rows} rows: {key}")
+
+
+def _capture(conn, sql: str, args: tuple, many: bool):
+    params = args[0] if args else ()
+    if many:
+        # Only a list's first row can be kept without consuming the caller's iterator
+        params = params[0] if isinstance(params, (list, tuple)) and params else None
+    key = (getattr(conn, "database", ""), normalize_sql(sql))
+    with _lock:
+        if _captured is not None and key not in _captured:
+            _captured[key] = (sql, params)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Times each statement from execute() until its rows have been fetched, since SQLite
+    produces SELECT rows lazily while fetching. The statement is recorded once it is
+    exhausted, replaced by the next execute(), or its cursor/connection is closed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending: Optional[List] = None  # [sql, seconds so far, rows, expanded sql]
+
+    def _finish(self):
+        if self._pending is not None:
+            sql, seconds, rows, expanded = self._pending
+            self._pending = None
+            _record_statement(sql, seconds, rows, expanded)
+
+    def _run(self, method, sql, args):
+        self._finish()
+        if _captured is not None:
+            _capture(self.connection, sql, args, method.__name__ == "executemany")
+        started = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            # rowcount is -1 for SELECTs; their rows are counted as they are fetched
+            rows = max(self.rowcount, 0)
+            self._pending = [sql, elapsed, rows, getattr(self.connection, "last_traced_sql", None)]
+            if not self.description:
+                self._finish()  # nothing to fetch (INSERT/UPDATE/DELETE)
+
+    def execute(self, sql, *args):
+        return self._run(super().execute, sql, args)
+
+    def executemany(self, sql, *args):
+        return self._run(super().executemany, sql, args)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        if self._pending is not None:
+            self._pending[1] += time.perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._pending is not None:
+            self._pending[2] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._fetch(super().fetchmany, size)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        if self._pending is not None:
+            self._pending[2] += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._pending is not None:
+            self._pending[2] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors are InstrumentedCursors. COMMIT and ROLLBACK are timed too,
+    and set_trace_callback keeps the last statement with its bound values for the slow-query log.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.database = str(args[0] if args else kwargs.get("database", ""))
+        self.last_traced_sql: Optional[str] = None
+        self._cursors: "weakref.WeakSet[InstrumentedCursor]" = weakref.WeakSet()
+        self.set_trace_callback(self._trace)
+
+    def _trace(self, statement: str):
+        self.last_traced_sql = statement
+
+    def cursor(self, factory=InstrumentedCursor):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, InstrumentedCursor):
+            self._cursors.add(cursor)
+        return cursor
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+    def commit(self):
+        self._timed("COMMIT", super().commit)
+
+    def rollback(self):
+        self._timed("ROLLBACK", super().rollback)
+
+    def close(self):
+        for cursor in list(self._cursors):
+            cursor._finish()
+        super().close()
+
+    def _timed(self, name: str, method: Callable):
+        in_transaction = self.in_transaction
+        started = time.perf_counter()
+        method()
+        if in_transaction:
+            _record_statement(name, time.perf_counter() - started, 0, name)
+
+
+# ------------------ Reporting ------------------
+
+def function_stats() -> List[Dict[str, object]]:
+    """Per-function stats, slowest total time first."""
+    with _lock:
+        return _summaries(_function_stats, "function")
+
+
+def sql_stats() -> List[Dict[str, object]]:
+    """Per-statement stats, slowest total time first."""
+    with _lock:
+        return _summaries(_sql_stats, "statement")
+
+
+def slow_queries() -> List[Dict[str, object]]:
+    """The most recent slow statements, newest first."""
+    with _lock:
+        return list(reversed(_slow_queries))
+
+
+def _summaries(stats: Dict[str, Histogram], label: str) -> List[Dict[str, object]]:
+    rows = [
+        {
+            label: name,
+            "calls": h.count,
+            "rows": h.rows,
+            "total_ms": h.total_seconds * 1000,
+            "mean_ms": h.total_seconds / h.count * 1000 if h.count else 0.0,
+            "p95_ms": h.percentile(95) * 1000,
+            "max_ms": h.max_seconds * 1000,
+        }
+        for name, h in stats.items()
+    ]
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def prometheus_text() -> str:
+    """Renders every histogram in the Prometheus text exposition format."""
+    lines: List[str] = []
+    with _lock:
+        for metric, label, stats, help_text in (
+            ("fitness_function_duration_seconds", "function", _function_stats, "Backend data function latency."),
+            ("fitness_sql_duration_seconds", "statement", _sql_stats, "SQL statement latency, by normalized statement."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, h in sorted(stats.items()):
+                value = _label_value(name)
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.bucket_counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {h.count}')
+                lines.append(f'{metric}_sum{{{label}="{value}"}} {h.total_seconds}')
+                lines.append(f'{metric}_count{{{label}="{value}"}} {h.count}')
+
+            rows_metric = metric.replace("_duration_seconds", "_rows_total")
+            lines.append(f"# HELP {rows_metric} Rows returned or changed.")
+            lines.append(f"# TYPE {rows_metric} counter")
+            for name, h in sorted(stats.items()):
+                lines.append(f'{rows_metric}{{{label}="{_label_value(name)}"}} {h.rows}')
+
+        lines.append("# HELP fitness_slow_queries Slow statements currently held in the slow-query log.")
+        lines.append("# TYPE fitness_slow_queries gauge")
+        lines.append(f"fitness_slow_queries {len(_slow_queries)}")
+    return "\n".join(lines) + "\n"
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,325 @@
+# backend/maintenance.py
+#
+# In-process maintenance for fitness.db and users.db. A background thread keeps query plans
+# fresh (ANALYZE, PRAGMA optimize), checkpoints the WAL, hands free pages back to the
+# filesystem (incremental vacuum), prunes old idempotency keys and, with FITNESS_ARCHIVE_DAYS
+# set, moves old workouts to the archive (backend/db_fitness/archive.py), each on its own
+# interval. Heavier tasks wait until the database has been idle for a while, and every task
+# uses a short busy timeout so it gives way to the app's writers instead of stalling them.
+# A task that fails is logged and tried again on a later poll; it never stops the thread.
+#
+#   from backend.maintenance import start_maintenance
+#   start_maintenance()                                    # idempotent; called from frontend/main.py
+#
+#   python -m backend.maintenance --once                   # run every task now
+#   python -m backend.maintenance --enable-incremental-vacuum
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Deque, Dict, List, Optional
+
+from backend.db_fitness.archive import archive_connection, archive_days
+from backend.db_fitness.sharding import fitness_databases
+from backend.db_fitness.writes import _prune_write_keys
+from backend import db_users
+
+POLL_SECONDS = 30
+IDLE_SECONDS = 60           # no writes for this long counts as idle
+VACUUM_PAGE_BUDGET = 2000   # pages released per incremental_vacuum run
+VACUUM_STEP_PAGES = 200     # pages per write transaction, so writers can get in between steps
+BUSY_TIMEOUT_MS = 250       # maintenance backs off quickly when the app holds the lock
+HISTORY_SIZE = 100
+WRITE_KEY_HOURS = 24        # how long a write's idempotency key can be replayed
+
+
+@dataclass
+class MaintenanceTask:
+    name: str
+    interval_seconds: float
+    idle_only: bool
+    run: Callable[[sqlite3.Connection, "MaintenanceScheduler"], str]
+
+
+@dataclass
+class MaintenanceRun:
+    at: str
+    database: str
+    task: str
+    ms: float
+    reclaimed_bytes: int
+    details: str
+
+
+# ------------------ Tasks ------------------
+# Each takes an open connection and returns a short description of what it did.
+
+def _checkpoint(conn, scheduler) -> str:
+    # PASSIVE copies what it can without waiting on readers or writers
+    busy, wal_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    if wal_frames < 0:
+        return "not in WAL mode"
+    return f"checkpointed {checkpointed}/{wal_frames} WAL frames" + (" (busy)" if busy else "")
+
+
+def _optimize(conn, scheduler) -> str:
+    conn.execute("PRAGMA optimize")
+    return "ran PRAGMA optimize"
+
+
+def _analyze(conn, scheduler) -> str:
+    # analysis_limit samples each index instead of scanning all of it
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+    conn.commit()
+    return "refreshed planner statistics"
+
+
+def _incremental_vacuum(conn, scheduler) -> str:
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return "skipped: auto_vacuum is not INCREMENTAL (see --enable-incremental-vacuum)"
+
+    free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    released = 0
+    while released < scheduler.vacuum_pages and not scheduler.stopping:
+        step = min(VACUUM_STEP_PAGES, scheduler.vacuum_pages - released)
+        free_now = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_now == 0:
+            break
+        # execute() steps a statement only once, and incremental_vacuum frees one page per
+        # step; executescript runs it to completion (in its own short transaction)
+        conn.executescript(f"PRAGMA incremental_vacuum({int(step)})")
+        released += min(step, free_now)
+        time.sleep(0)  # let a waiting writer take the lock between steps
+
+    free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return f"released {free_before - free_after} of {free_before} free pages"
+
+
+def _archive(conn, scheduler) -> str:
+    days = archive_days()
+    if days is None:
+        return "skipped: FITNESS_ARCHIVE_DAYS is not set"
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'archived_workouts'").fetchone() is None:
+        return "skipped: no workouts in this database"
+    moved = archive_connection(conn, date.today() - timedelta(days=days))
+    return f"archived {moved} workouts older than {days} days"
+
+
+def _prune_keys(conn, scheduler) -> str:
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'write_keys'").fetchone() is None:
+        return "skipped: no write keys in this database"
+    pruned = _prune_write_keys(conn.cursor(), WRITE_KEY_HOURS)
+    conn.commit()
+    return f"pruned {pruned} write keys older than {WRITE_KEY_HOURS} hours"
+
+
+DEFAULT_TASKS = [
+    MaintenanceTask("wal_checkpoint", 5 * 60, idle_only=False, run=_checkpoint),
+    MaintenanceTask("optimize", 60 * 60, idle_only=False, run=_optimize),
+    MaintenanceTask("analyze", 24 * 60 * 60, idle_only=True, run=_analyze),
+    MaintenanceTask("incremental_vacuum", 30 * 60, idle_only=True, run=_incremental_vacuum),
+    MaintenanceTask("archive", 24 * 60 * 60, idle_only=True, run=_archive),
+    MaintenanceTask("prune_write_keys", 60 * 60, idle_only=False, run=_prune_keys),
+]
+
+
+# ------------------ Scheduler ------------------
+
+def default_databases() -> Dict[str, str]:
+    """users.db plus fitness.db, or every shard file when fitness data is sharded."""
+    return {**fitness_databases(), "users": db_users.get_db_path()}
+
+
+class MaintenanceScheduler:
+    """
+    Runs each task against each database once its interval has passed. Idle-only tasks also
+    wait until neither the database file nor its WAL has changed for idle_seconds.
+    """
+
+    def __init__(self, databases: Optional[Dict[str, str]] = None,
+                 tasks: Optional[List[MaintenanceTask]] = None,
+                 poll_seconds: float = POLL_SECONDS, idle_seconds: float = IDLE_SECONDS,
+                 vacuum_pages: int = VACUUM_PAGE_BUDGET):
+        self._databases = databases
+        self.tasks = tasks or DEFAULT_TASKS
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self.vacuum_pages = vacuum_pages
+        self.history: Deque[MaintenanceRun] = deque(maxlen=HISTORY_SIZE)
+        self.stopping = False
+
+        # Tasks are first due one interval after startup (or after a shard appears),
+        # not all at once on launch
+        self._last_run: Dict[tuple, float] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def databases(self) -> Dict[str, str]:
+        # Re-read each poll so shards created since startup are maintained too
+        return self._databases or default_databases()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="fitness-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self.stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        while not self.stopping:
+            try:
+                self.run_due()
+            except Exception as e:
+                # e.g. listing the shard files failed; try again next poll
+                print(f"[ERROR] Maintenance pass failed: {e!r}")
+            self._wake.wait(self.poll_seconds)
+
+    def run_due(self, force: bool = False) -> List[MaintenanceRun]:
+        """Runs every task that is due (or all of them with force=True)."""
+        runs = []
+        for db_name, db_path in self.databases.items():
+            if not os.path.exists(db_path):
+                continue
+            idle = force or self.is_idle(db_path)
+            for task in self.tasks:
+                if self.stopping:
+                    return runs
+                key = (db_name, task.name)
+                last_run = self._last_run.setdefault(key, time.monotonic())
+                due = time.monotonic() - last_run >= task.interval_seconds
+                if force or (due and (idle or not task.idle_only)):
+                    run = self.run_task(db_name, db_path, task)
+                    if run is not None:
+                        self._last_run[key] = time.monotonic()
+                        runs.append(run)
+        return runs
+
+    def is_idle(self, db_path: str) -> bool:
+        """True when neither the database nor its WAL has been written for idle_seconds."""
+        newest = 0.0
+        for path in (db_path, db_path + "-wal"):
+            try:
+                newest = max(newest, os.path.getmtime(path))
+            except OSError:
+                pass
+        return time.time() - newest >= self.idle_seconds
+
+    def run_task(self, db_name: str, db_path: str, task: MaintenanceTask) -> Optional[MaintenanceRun]:
+        """Runs one task. Returns None (to retry next poll) if the app was holding the lock."""
+        size_before = _file_size(db_path)
+        started = time.perf_counter()
+        conn = None
+        try:
+            conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+            details = task.run(conn, self)
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                print(f"[MAINTENANCE] {db_name}: {task.name} deferred, database busy")
+                return None
+            print(f"[ERROR] Maintenance task {task.name} failed on {db_name}: {e}")
+            return None
+        except Exception as e:
+            # IntegrityError/DatabaseError from the archive task, OSError, ...: log it, keep the thread
+            print(f"[ERROR] Maintenance task {task.name} failed on {db_name}: {e!r}")
+            return None
+        finally:
+            if conn is not None:
+                conn.close()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        reclaimed = max(0, size_before - _file_size(db_path))
+        run = MaintenanceRun(
+            at=time.strftime("%Y-%m-%d %H:%M:%S"),
+            database=db_name,
+            task=task.name,
+            ms=elapsed_ms,
+            reclaimed_bytes=reclaimed,
+            details=details,
+        )
+        self.history.append(run)
+        print(f"[MAINTENANCE] {db_name}: {task.name} {details}, "
+              f"reclaimed {reclaimed / 2**20:.2f} MB in {elapsed_ms:.1f} ms")
+        return run
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def enable_incremental_vacuum(db_path: str):
+    """
+    Switches an existing database to auto_vacuum=INCREMENTAL. This needs one full VACUUM,
+    which locks the database while it rewrites the file, so run it during a quiet period.
+    (Databases created by init_db are already INCREMENTAL.)
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+_scheduler: Optional[MaintenanceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def start_maintenance() -> Optional[MaintenanceScheduler]:
+    """
+    Starts the process-wide scheduler once; later calls return the running one.
+    Set FITNESS_MAINTENANCE=0 to turn it off.
+    """
+    global _scheduler
+    if os.environ.get("FITNESS_MAINTENANCE") == "0":
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = MaintenanceScheduler()
+            _scheduler.start()
+        return _scheduler
+
+
+def get_scheduler() -> Optional[MaintenanceScheduler]:
+    return _scheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run database maintenance for the Fitness Tracker")
+    parser.add_argument("--once", action="store_true", help="run every task now and exit")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="convert the databases to auto_vacuum=INCREMENTAL (runs a full VACUUM)")
+    parser.add_argument("--vacuum-pages", type=int, default=VACUUM_PAGE_BUDGET,
+                        help="page budget per incremental vacuum run")
+    args = parser.parse_args()
+
+    if args.enable_incremental_vacuum:
+        for db_name, db_path in default_databases().items():
+            if os.path.exists(db_path):
+                started = time.perf_counter()
+                enable_incremental_vacuum(db_path)
+                print(f"[MAINTENANCE] {db_name}: auto_vacuum=INCREMENTAL "
+                      f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    if args.once:
+        MaintenanceScheduler(vacuum_pages=args.vacuum_pages).run_due(force=True)
+
+
+if __name__ == "__main__":
+    main()
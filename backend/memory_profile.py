@@ -0,0 +1,164 @@
+# backend/memory_profile.py
+#
+# Optional memory profiling with tracemalloc: peak and retained allocation per page load and
+# per backend data function, to find what makes a worker's memory grow for power users.
+#
+# Off by default. Turn it on with FITNESS_MEMORY_PROFILE=1 (or enable() at runtime). Pages
+# are wrapped in profile("page:<name>") by the frontend; data functions decorated with
+# backend.instrumentation.instrumented are profiled as "function:<dotted name>".
+#
+# tracemalloc traces the whole process, so a page's peak includes whatever other sessions
+# allocated at the same time; profile one user at a time for exact numbers. Tracing itself
+# slows allocation-heavy code down noticeably.
+
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List
+
+_enabled = os.environ.get("FITNESS_MEMORY_PROFILE") == "1"
+_lock = threading.Lock()
+
+
+class MemoryStats:
+    """Peak (above the starting point) and retained bytes over every profiled run of one name."""
+
+    def __init__(self):
+        self.count = 0
+        self.last_peak = 0
+        self.max_peak = 0
+        self.total_peak = 0
+        self.total_retained = 0
+
+    def observe(self, peak: int, retained: int):
+        self.count += 1
+        self.last_peak = peak
+        self.max_peak = max(self.max_peak, peak)
+        self.total_peak += peak
+        self.total_retained += retained
+
+
+class _Frame:
+    """One profiled block that is still running: where it started and its peak so far."""
+
+    def __init__(self, start: int):
+        self.start = start
+        self.peak = start
+
+
+_stats: Dict[str, MemoryStats] = {}
+_open: List[_Frame] = []  # profiled blocks running now, in any thread
+
+
+# ------------------ Switches ------------------
+
+def enable():
+    """Turns profiling on (and starts tracemalloc if nothing else has)."""
+    global _enabled
+    _enabled = True
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """Turns profiling off and stops tracemalloc, freeing its traces."""
+    global _enabled
+    _enabled = False
+    with _lock:
+        running = bool(_open)
+    if tracemalloc.is_tracing() and not running:
+        tracemalloc.stop()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+# ------------------ Profiling ------------------
+
+def _absorb_peak():
+    """Credits the peak since the last reset to every open block, then resets it (call with _lock held)."""
+    _, peak = tracemalloc.get_traced_memory()
+    for frame in _open:
+        if peak > frame.peak:
+            frame.peak = peak
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def profile(name: str):
+    """
+    Records the peak and retained traced memory of the block under name. Blocks may nest
+    (a page calling data functions): tracemalloc has one peak, so it is shared out to every
+    open block before a nested one resets it.
+    """
+    if not _enabled:
+        yield
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    with _lock:
+        _absorb_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        frame = _Frame(current)
+        _open.append(frame)
+    try:
+        yield
+    finally:
+        with _lock:
+            _absorb_peak()
+            _open.remove(frame)
+            current, _ = tracemalloc.get_traced_memory()
+            _stats.setdefault(name, MemoryStats()).observe(frame.peak - frame.start, current - frame.start)
+
+
+# ------------------ Reporting ------------------
+
+def memory_stats() -> List[Dict[str, object]]:
+    """Per-name memory stats in KiB, largest peak first."""
+    with _lock:
+        rows = [
+            {
+                "name": name,
+                "calls": s.count,
+                "last_peak_kib": round(s.last_peak / 1024, 1),
+                "max_peak_kib": round(s.max_peak / 1024, 1),
+                "avg_peak_kib": round(s.total_peak / s.count / 1024, 1),
+                "avg_retained_kib": round(s.total_retained / s.count / 1024, 1),
+            }
+            for name, s in _stats.items()
+        ]
+    return sorted(rows, key=lambda row: row["max_peak_kib"], reverse=True)
+
+
+def traced_memory() -> Dict[str, float]:
+    """Memory currently traced and the peak since the last profiled block, in KiB."""
+    if not tracemalloc.is_tracing():
+        return {"current_kib": 0.0, "peak_kib": 0.0}
+    current, peak = tracemalloc.get_traced_memory()
+    return {"current_kib": round(current / 1024, 1), "peak_kib": round(peak / 1024, 1)}
+
+
+def top_allocations(limit: int = 15) -> List[Dict[str, object]]:
+    """The source lines holding the most traced memory right now (takes a snapshot; not cheap)."""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    return [
+        {"line": str(stat.traceback[0]), "kib": round(stat.size / 1024, 1), "blocks": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+if _enabled:
+    enable()
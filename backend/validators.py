@@ -1,7 +1,33 @@
 # backend/validators.py
 
-from typing import List, Optional
-from backend.models import Exercise
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+from backend.models import Exercise, Workout
+
+_SET_TYPES = ("strength", "bodyweight")
+
+
+@dataclass
+class ValidationError:
+    """
+    A single validation problem, located by workout, exercise and set index (0-based).
+    exercise_index and set_index are None when the error is about the workout or exercise itself.
+    """
+    workout_index: int
+    message: str
+    exercise_index: Optional[int] = None
+    set_index: Optional[int] = None
+
+    @property
+    def path(self) -> str:
+        path = f"workouts[{self.workout_index}]"
+        if self.exercise_index is not None:
+            path += f".exercises[{self.exercise_index}]"
+        if self.set_index is not None:
+            path += f".sets[{self.set_index}]"
+        return path
+
 
 def validate_workout(
     workout_type: str,
@@ -15,52 +41,106 @@ def validate_workout(
     Validates workout input based on its type.
     Returns an error string if invalid, otherwise None.
     """
+    errors = _validate_records([(workout_type, date, name, exercises, duration, distance)])
+    return errors[0].message if errors else None
+
+
+def validate_workouts(workouts: Iterable[Workout]) -> List[ValidationError]:
+    """
+    Validates a batch of workouts (imports, bulk edits) in one pass.
+    Returns every error found, ordered by workout, exercise and set, or an empty list if all are valid.
+    """
+    return _validate_records(
+        (w.type, w.date, w.name, w.exercises, w.duration_minutes, w.distance_mi)
+        for w in workouts
+    )
+
+
+def _validate_records(records: Iterable[tuple]) -> List[ValidationError]:
+    """
+    Validation engine shared by validate_workout and validate_workouts.
+    Workout and exercise level rules are checked while walking the records; set values
+    are gathered into flat columns and checked column by column afterwards.
+    Errors are sorted into the order validate_workout has always reported them in.
+    """
+    found: List[Tuple[tuple, ValidationError]] = []
+
+    # Set columns for the whole batch, kept separately per workout type since the weight
+    # rules differ. Each exercise's sets start at an offset into its type's columns.
+    columns = {t: {"reps": [], "weight": [], "starts": [], "exercises": []} for t in _SET_TYPES}
+
+    for w_i, (workout_type, date, name, exercises, duration, distance) in enumerate(records):
+        if not name:
+            found.append(((w_i, 0), ValidationError(w_i, "Workout name is required.")))
 
-    if not name:
-        return "Workout name is required."
+        if not date:
+            found.append(((w_i, 1), ValidationError(w_i, "Workout date is required.")))
 
-    if not date:
-        return "Workout date is required."
+        if workout_type in _SET_TYPES:
+            if not exercises or not isinstance(exercises, list):
+                found.append(((w_i, 2), ValidationError(w_i, "Exercises must be a non-empty list.")))
+                continue
 
-    if workout_type in ["strength", "bodyweight"]:
-        if not exercises or not isinstance(exercises, list):
-            return "Exercises must be a non-empty list."
+            for ex_i, ex in enumerate(exercises):
+                if ex.type in _SET_TYPES:
+                    if not ex.sets or not isinstance(ex.sets, list):
+                        found.append(((w_i, 2, ex_i, -1, 0), ValidationError(
+                            w_i, f"Exercise {ex_i + 1} ('{ex.name}') must have at least one set.", ex_i)))
+                        continue
 
-        for ex_i, ex in enumerate(exercises):
-            if ex.type in ["strength", "bodyweight"]:
-                if not ex.sets or not isinstance(ex.sets, list) or len(ex.sets) == 0:
-                    return f"Exercise {ex_i + 1} ('{ex.name}') must have at least one set."
+                    col = columns[workout_type]
+                    col["starts"].append(len(col["reps"]))
+                    col["exercises"].append((w_i, ex_i))
+                    col["reps"].extend([s.reps for s in ex.sets])
+                    col["weight"].extend([s.weight for s in ex.sets])
 
-                for set_i, s in enumerate(ex.sets):
-                    if not isinstance(s.reps, int) or s.reps <= 0:
-                        return f"Exercise {ex_i + 1}, Set {set_i + 1}: Reps must be a positive integer."
+                elif ex.type == "cardio":
+                    if ex.duration_minutes is None or ex.duration_minutes <= 0:
+                        found.append(((w_i, 2, ex_i, -1, 0), ValidationError(
+                            w_i, f"Exercise {ex_i + 1} ('{ex.name}') must have a positive duration for cardio workouts.", ex_i)))
+                    if ex.distance_mi is None or ex.distance_mi < 0:
+                        found.append(((w_i, 2, ex_i, -1, 1), ValidationError(
+                            w_i, f"Exercise {ex_i + 1} ('{ex.name}') must have a non-negative distance for cardio workouts.", ex_i)))
+                else:
+                    # If unknown exercise type either skip or add validation
+                    pass
 
-                    if not isinstance(s.weight, (int, float)):
-                        return f"Exercise {ex_i + 1}, Set {set_i + 1}: Weight must be a number."
+        elif workout_type == "cardio":
+            if duration is None or not isinstance(duration, (int, float)) or duration <= 0:
+                found.append(((w_i, 2, 0), ValidationError(w_i, "Cardio duration must be a positive number.")))
 
-                    if workout_type == "bodyweight" and s.weight < 50:
-                        return f"Exercise {ex_i + 1}, Set {set_i + 1}: Weight must be equivalent to your bodyweight workouts."
+            if distance is None or not isinstance(distance, (int, float)) or distance < 0:
+                found.append(((w_i, 2, 1), ValidationError(w_i, "Cardio distance must be 0 or more.")))
 
-                    if workout_type == "strength" and s.weight <= 0:
-                        return f"Exercise {ex_i + 1}, Set {set_i + 1}: Weight must be greater than 0 for strength workouts."
+        else:
+            found.append(((w_i, 2), ValidationError(w_i, f"Invalid workout type: {workout_type}")))
 
-            elif ex.type == "cardio":
-                if ex.duration_minutes is None or ex.duration_minutes <= 0:
-                    return f"Exercise {ex_i + 1} ('{ex.name}') must have a positive duration for cardio workouts."
-                if ex.distance_mi is None or ex.distance_mi < 0:
-                    return f"Exercise {ex_i + 1} ('{ex.name}') must have a non-negative distance for cardio workouts."
-            else:
-                # If unknown exercise type either skip or add validation
-                pass
-            
-    elif workout_type == "cardio":
-        if duration is None or not isinstance(duration, (int, float)) or duration <= 0:
-            return "Cardio duration must be a positive number."
+    # --- Column checks over every set in the batch ---
+    for workout_type, col in columns.items():
+        reps_col, weight_col = col["reps"], col["weight"]
 
-        if distance is None or not isinstance(distance, (int, float)) or distance < 0:
-            return "Cardio distance must be 0 or more."
+        bad_reps = [k for k, r in enumerate(reps_col) if not isinstance(r, int) or r <= 0]
+        weight_is_number = [isinstance(w, (int, float)) for w in weight_col]
+        bad_weight_type = [k for k, ok in enumerate(weight_is_number) if not ok]
+        if workout_type == "bodyweight":
+            bad_weight = [k for k, (ok, w) in enumerate(zip(weight_is_number, weight_col)) if ok and w < 50]
+            weight_message = "Weight must be equivalent to your bodyweight workouts."
+        else:
+            bad_weight = [k for k, (ok, w) in enumerate(zip(weight_is_number, weight_col)) if ok and w <= 0]
+            weight_message = "Weight must be greater than 0 for strength workouts."
 
-    else:
-        return f"Invalid workout type: {workout_type}"
+        for check, indexes, message in (
+            (0, bad_reps, "Reps must be a positive integer."),
+            (1, bad_weight_type, "Weight must be a number."),
+            (2, bad_weight, weight_message),
+        ):
+            for k in indexes:
+                # Map the column offset back to its workout, exercise and set
+                pos = bisect_right(col["starts"], k) - 1
+                w_i, ex_i = col["exercises"][pos]
+                set_i = k - col["starts"][pos]
+                found.append(((w_i, 2, ex_i, set_i, check), ValidationError(
+                    w_i, f"Exercise {ex_i + 1}, Set {set_i + 1}: {message}", ex_i, set_i)))
 
-    return None
+    found.sort(key=lambda item: item[0])
+    return [error for _, error in found]
@@ -0,0 +1,186 @@
+# benchmarks/codec_bench.py
+#
+# Compares backend/codec.py with pickle and JSON (backend/api/serialization.py) for encoding
+# and decoding workout histories: time per operation and encoded size. Every codec's output is
+# decoded and checked against the original before anything is timed, along with a set of edge
+# cases (None fields, empty lists, unicode, int vs float numbers), and objects the format
+# can't hold must be refused with ValueError. The repo has no test suite; --check runs just
+# these checks (exit status 1 on a failure) and is the codec's test after any change to it:
+#
+#   python -m benchmarks.codec_bench --check
+#   python -m benchmarks.codec_bench --sets 100k --repeat 5
+
+import argparse
+import json
+import pickle
+import random
+import statistics
+import sys
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.api.serialization import workout_from_dict, workout_to_dict
+from backend.codec import from_bytes, set_columns, to_bytes
+from backend.models import Exercise, Template, Workout, WorkoutSet
+from benchmarks.synthetic import generate_templates, generate_workouts, parse_scale
+
+
+def _json_encode(workouts: List[Workout]) -> bytes:
+    return json.dumps([workout_to_dict(w) for w in workouts], separators=(",", ":")).encode("utf-8")
+
+
+def _json_decode(data: bytes) -> List[Workout]:
+    return [workout_from_dict(d, d["id"]) for d in json.loads(data)]
+
+
+def _pickle_encode(workouts: List[Workout]) -> bytes:
+    return pickle.dumps(workouts, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "binary": (to_bytes, from_bytes),
+    "pickle": (_pickle_encode, pickle.loads),
+    "json": (_json_encode, _json_decode),
+}
+
+
+def edge_cases() -> List[Any]:
+    """Objects that exercise every optional branch of the binary layout."""
+    return [
+        Workout(id="w1", type="strength", date=date(2024, 2, 29), name="Ünïcode 💪",
+                exercises=[Exercise("Bench", "strength", [WorkoutSet(5, 135.0), WorkoutSet(None, None),
+                                                          WorkoutSet(8, 0.0), WorkoutSet(-1, -2.5)])]),
+        Workout(id="w2", type="cardio", date=date(1, 1, 1), name="", exercises=None,
+                duration_minutes=30, distance_mi=3.1),
+        Workout(id="w3", type="mixed", date=date(9999, 12, 31), name="legacy", sets=[WorkoutSet(10, 20)],
+                exercises=[], duration_minutes=45.5, distance_mi=None),
+        Workout(id="w4", type="cardio", date=date.today(), name="Run",
+                exercises=[Exercise("Run", "cardio", None, 25.0, 2.5), Exercise("Row", "cardio", [], 0, None)]),
+        Template(id="t1", name="Push", type="strength",
+                 exercises=[Exercise("Press", "strength", [WorkoutSet(5, None)]), Exercise("Dips", "bodyweight")]),
+        Template(id="t2", name="Empty", type="mixed", exercises=None),
+        Workout(id="w5", type="strength", date=date.today(), name=None,
+                exercises=[Exercise(None, "strength", [WorkoutSet(2**31 - 1, 1e300)]), Exercise("", None)]),
+        Template(id=None, name=None, type=None, exercises=[]),
+        Exercise("Squat", "strength", [WorkoutSet(3, 225.0)]),
+        WorkoutSet(12, 17.5),
+        [],
+    ]
+
+
+def unencodable() -> List[Any]:
+    """Objects to_bytes must refuse with ValueError."""
+    def workout(**fields) -> Workout:
+        return Workout(id="w", type="cardio", date=date.today(), name="Bad", **fields)
+    return [
+        WorkoutSet(2**31, 100.0),
+        WorkoutSet(-2**31, 100.0),
+        WorkoutSet(5.5, 100.0),
+        WorkoutSet("5", 100.0),
+        WorkoutSet(5, "heavy"),
+        workout(duration_minutes="30"),
+        workout(distance_mi=[1.0]),
+        workout(duration_minutes=2**60),
+        Exercise("Run", "cardio", None, "25", None),
+        Exercise("x" * 70000, "strength"),
+    ]
+
+
+def _check(ok: bool, message: str):
+    # Not an assert: the checks must run under python -O too
+    if not ok:
+        raise AssertionError(message)
+
+
+def check_round_trips(workouts: List[Workout], templates: List[Template]) -> int:
+    """Decodes every codec's output and compares it with the input; returns the number of checks."""
+    checks = 0
+    for obj in edge_cases() + templates + workouts[:200]:
+        decoded = from_bytes(to_bytes(obj))
+        _check(decoded == obj and type(decoded) is type(obj), f"binary round trip changed {obj!r}")
+        checks += 1
+    for obj in unencodable():
+        try:
+            to_bytes(obj)
+        except ValueError:
+            checks += 1
+            continue
+        _check(False, f"to_bytes accepted {obj!r}")
+    for name, (encode, decode) in CODECS.items():
+        decoded = decode(encode(workouts))
+        if name == "json":
+            # The API's JSON has no legacy top-level sets, so compare what it does carry
+            decoded, original = [workout_to_dict(w) for w in decoded], [workout_to_dict(w) for w in workouts]
+        else:
+            original = workouts
+        _check(decoded == original, f"{name} round trip changed the workouts")
+        checks += 1
+
+    # The zero-copy columns hold the same numbers as the decoded sets
+    columns = list(set_columns(to_bytes(workouts)))
+    expected = []
+    for w in workouts:
+        if w.sets is not None:
+            expected.append(("", w.sets))
+        expected.extend((e.name, e.sets) for e in w.exercises or [] if e.sets is not None)
+    _check(len(columns) == len(expected), "set_columns returned the wrong number of set lists")
+    for (name, reps, weights), (expected_name, sets) in zip(columns, expected):
+        _check(name == expected_name and list(reps) == [s.reps for s in sets],
+               f"set_columns changed the sets of {expected_name!r}")
+    return checks + 1
+
+
+def _median_ms(func: Callable, arg: Any, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary codec vs pickle vs JSON for workout histories")
+    parser.add_argument("--sets", default="100k", help="sets in the synthetic history (e.g. 10k, 100k, 1m)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--check", action="store_true", help="only run the round-trip checks (on 10k sets)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workouts = generate_workouts(parse_scale("10k" if args.check else args.sets), rng)
+    templates = generate_templates(rng, 20)
+    n_sets = sum(len(e.sets or []) for w in workouts for e in w.exercises or [])
+
+    print(f"{check_round_trips(workouts, templates)} round-trip checks passed", file=sys.stderr)
+    if args.check:
+        return
+    print(f"{len(workouts)} workouts, {n_sets} sets\n", file=sys.stderr)
+
+    rows = []
+    for name, (encode, decode) in CODECS.items():
+        data = encode(workouts)
+        rows.append({
+            "codec": name,
+            "bytes": len(data),
+            "encode_ms": _median_ms(encode, workouts, args.repeat),
+            "decode_ms": _median_ms(decode, data, args.repeat),
+        })
+    data = to_bytes(workouts)
+    rows.append({
+        "codec": "binary set_columns",
+        "bytes": len(data),
+        "encode_ms": None,
+        "decode_ms": _median_ms(lambda d: sum(sum(reps) for _, reps, _ in set_columns(d)), data, args.repeat),
+    })
+
+    print(f"{'codec':<20} {'KB':>9} {'encode ms':>10} {'decode ms':>10}", file=sys.stderr)
+    for row in rows:
+        encode_ms = f"{row['encode_ms']:10.1f}" if row["encode_ms"] is not None else f"{'-':>10}"
+        print(f"{row['codec']:<20} {row['bytes'] / 1024:9.1f} {encode_ms} {row['decode_ms']:10.1f}", file=sys.stderr)
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+# benchmarks/load_streamlit.py
+#
+# Concurrent-session load harness for the Streamlit app. Each simulated user is its own
+# process driving frontend/main.py headlessly through Streamlit's AppTest: it logs in, then
+# browses the Timeline, loads templates and saves workouts with think times in between.
+# Everything runs against temporary databases filled with synthetic history.
+#
+#   python -m benchmarks.load_streamlit --sessions 20 --actions 30 --think 0.5
+#
+# Reports per-page rerun latency percentiles, time spent waiting for SQLite's write lock
+# and memory per session process, as JSON (stdout or --out).
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.synthetic import SCALES, parse_scale, populate
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(PROJECT_ROOT, "frontend", "main.py")
+PASSWORD = "loadtest-password"
+
+# Session method for each user action -> its relative weight
+ACTIONS = {"browse_timeline": 5, "add_workout": 2, "browse_templates": 2}
+
+# Statements where the write queue / direct writers wait for SQLite's write lock
+LOCK_STATEMENTS = ("BEGIN IMMEDIATE", "COMMIT")
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process, in MB (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Session:
+    """One simulated user: an AppTest instance plus the rerun timings it has collected."""
+
+    def __init__(self, username: str, rng: random.Random, timeout: float):
+        from streamlit.testing.v1 import AppTest
+
+        self.username = username
+        self.rng = rng
+        self.timeout = timeout
+        self.at = AppTest.from_file(MAIN_SCRIPT, default_timeout=timeout)
+        self.timings: Dict[str, List[float]] = {}
+        self.errors: List[str] = []
+
+    def rerun(self, label: str, action=None):
+        """Applies a widget action (or a plain run) and times the rerun it triggers."""
+        started = time.perf_counter()
+        (action or self.at).run(timeout=self.timeout)
+        self.timings.setdefault(label, []).append(time.perf_counter() - started)
+        for exc in self.at.exception:
+            self.errors.append(f"{label}: {exc.value}")
+
+    def _widget(self, kind: str, label: str):
+        return next(w for w in getattr(self.at, kind) if w.label == label)
+
+    def _navigate(self, page: str):
+        self.rerun(page, self.at.sidebar.selectbox[0].select(page))
+
+    def login(self):
+        self.rerun("login_screen")
+        self._widget("text_input", "Username").input(self.username)
+        self._widget("text_input", "Password").input(PASSWORD)
+        self.rerun("login", self._widget("button", "Login").click())
+        if self.at.session_state["user"] != self.username:
+            raise RuntimeError(f"login failed for {self.username}")
+
+    def browse_timeline(self):
+        self._navigate("Timeline")
+        for _ in range(self.rng.randint(0, 3)):
+            older = [b for b in self.at.button if b.label == "Older ➡️" and not b.disabled]
+            if not older:
+                break
+            self.rerun("Timeline: older page", older[0].click())
+
+    def add_workout(self):
+        self._navigate("Add Workout")
+        self._widget("text_input", "Workout Name").input(f"Load test {self.rng.randint(1, 10**6)}")
+        self.at.number_input(key="reps_0_0").set_value(self.rng.randint(5, 12))
+        self.at.number_input(key="weight_0_0").set_value(float(self.rng.randrange(45, 225, 5)))
+        self.rerun("Add Workout: save", self._widget("button", "Save Workout").click())
+        if not self.at.success:
+            self.errors.append(f"save failed: {[e.value for e in self.at.error]}")
+
+    def browse_templates(self):
+        self._navigate("Templates")
+        selects = [s for s in self.at.selectbox if s.label == "Select Template:"]
+        if selects and len(selects[0].options) > 1:
+            choice = self.rng.randrange(len(selects[0].options))
+            self.rerun("Templates: select", selects[0].select_index(choice))
+
+
+def run_session(username: str, actions: int, think: float, seed: int, timeout: float, results) -> None:
+    """Process entry point: one user's whole visit, reported back through the results queue."""
+    from backend import instrumentation
+
+    # Times BEGIN IMMEDIATE / COMMIT, which is where writers queue for the write lock
+    instrumentation.enable()
+    rng = random.Random(seed)
+    rss_start = _rss_mb()
+    outcome = {"username": username, "timings": {}, "errors": [], "lock_waits": []}
+
+    try:
+        session = Session(username, rng, timeout)
+        session.login()
+        rss_logged_in = _rss_mb()
+
+        names, weights = zip(*ACTIONS.items())
+        for _ in range(actions):
+            if think > 0:
+                time.sleep(rng.expovariate(1 / think))
+            getattr(session, rng.choices(names, weights)[0])()
+
+        outcome["timings"] = session.timings
+        outcome["errors"] = session.errors
+        outcome["memory_mb"] = {
+            "rss_before_app": rss_start,
+            "rss_after_login": rss_logged_in,
+            "rss_end": _rss_mb(),
+            "rss_peak": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+    except Exception as e:
+        outcome["errors"].append(f"session aborted: {type(e).__name__}: {e}")
+
+    from backend.db_fitness.write_queue import close_all
+    close_all()
+    outcome["lock_waits"] = [s for s in instrumentation.sql_stats() if s["statement"] in LOCK_STATEMENTS]
+    results.put(outcome)
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "reruns": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def aggregate(outcomes: List[Dict]) -> Dict:
+    """Merges per-session outcomes into per-page latency, lock-wait and memory summaries."""
+    timings: Dict[str, List[float]] = {}
+    for outcome in outcomes:
+        for label, samples in outcome["timings"].items():
+            timings.setdefault(label, []).extend(samples)
+
+    locks: Dict[str, Dict[str, float]] = {}
+    for outcome in outcomes:
+        for stat in outcome["lock_waits"]:
+            merged = locks.setdefault(stat["statement"], {"calls": 0, "total_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0})
+            merged["calls"] += stat["calls"]
+            merged["total_ms"] += stat["total_ms"]
+            merged["p95_ms"] = max(merged["p95_ms"], stat["p95_ms"])  # worst session's p95 (bucket bound)
+            merged["max_ms"] = max(merged["max_ms"], stat["max_ms"])
+    for merged in locks.values():
+        merged["mean_ms"] = merged["total_ms"] / merged["calls"] if merged["calls"] else 0.0
+
+    memory = [o["memory_mb"] for o in outcomes if "memory_mb" in o]
+    memory_summary = {}
+    if memory:
+        growth = [m["rss_end"] - m["rss_before_app"] for m in memory]
+        memory_summary = {
+            "sessions": len(memory),
+            "mean_rss_end_mb": statistics.fmean(m["rss_end"] for m in memory),
+            "max_rss_peak_mb": max(m["rss_peak"] for m in memory),
+            "mean_growth_mb": statistics.fmean(growth),
+            "max_growth_mb": max(growth),
+        }
+
+    errors = [f"{o['username']}: {e}" for o in outcomes for e in o["errors"]]
+    return {
+        "pages": {label: _percentiles(samples) for label, samples in sorted(timings.items())},
+        "lock_waits": locks,
+        "memory": memory_summary,
+        "errors": errors,
+    }
+
+
+def run_load(sessions: int, actions: int, think: float, total_sets: int, ramp: float,
+             seed: int, timeout: float) -> Dict:
+    """Builds temporary databases, runs every session concurrently and aggregates the results."""
+    with tempfile.TemporaryDirectory(prefix="fitness-load-") as tmp:
+        saved_env = {k: os.environ.get(k) for k in ("FITNESS_DB_PATH", "USERS_DB_PATH")}
+        os.environ["FITNESS_DB_PATH"] = os.path.join(tmp, "fitness.db")
+        os.environ["USERS_DB_PATH"] = os.path.join(tmp, "users.db")
+        try:
+            from backend.auth import signup_user
+            from backend.db_users import init_db as init_user_db
+
+            counts = populate(os.environ["FITNESS_DB_PATH"], total_sets, sessions, seed)
+            init_user_db()
+            for username in counts:
+                signup_user(username, PASSWORD)
+            print(f"Populated {sum(counts.values())} workouts for {len(counts)} users", file=sys.stderr)
+
+            # Spawned (not forked) so each session's memory is its own
+            ctx = multiprocessing.get_context("spawn")
+            results = ctx.Queue()
+            processes = []
+            started = time.perf_counter()
+            for i, username in enumerate(counts):
+                p = ctx.Process(target=run_session, args=(username, actions, think, seed + i, timeout, results))
+                p.start()
+                processes.append(p)
+                if ramp > 0:
+                    time.sleep(ramp / sessions)
+
+            outcomes = [results.get() for _ in processes]
+            for p in processes:
+                p.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    summary = aggregate(outcomes)
+    reruns = sum(page["reruns"] for page in summary["pages"].values())
+    summary["meta"] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "sessions": sessions,
+        "actions_per_session": actions,
+        "think_seconds": think,
+        "total_sets": total_sets,
+        "elapsed_seconds": elapsed,
+        "reruns_per_sec": reruns / elapsed if elapsed else 0.0,
+    }
+    return summary
+
+
+def print_report(summary: Dict):
+    print(f"\n{'page':<24} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}", file=sys.stderr)
+    for label, page in summary["pages"].items():
+        print(f"{label:<24} {page['reruns']:7d} {page['p50_ms']:9.1f} {page['p95_ms']:9.1f}"
+              f" {page['p99_ms']:9.1f} {page['max_ms']:9.1f}", file=sys.stderr)
+    for statement, lock in summary["lock_waits"].items():
+        print(f"lock wait ({statement}): {lock['calls']} calls, mean {lock['mean_ms']:.2f} ms,"
+              f" max {lock['max_ms']:.1f} ms", file=sys.stderr)
+    if summary["memory"]:
+        print(f"memory per session: {summary['memory']['mean_rss_end_mb']:.0f} MB RSS"
+              f" (+{summary['memory']['mean_growth_mb']:.0f} MB for the app)", file=sys.stderr)
+    if summary["errors"]:
+        print(f"{len(summary['errors'])} error(s), first: {summary['errors'][0]}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent users against the Streamlit app")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent simulated users")
+    parser.add_argument("--actions", type=int, default=20, help="actions per user after logging in")
+    parser.add_argument("--think", type=float, default=1.0, help="mean think time between actions, seconds")
+    parser.add_argument("--scale", default="10k", help=f"synthetic history: a number or one of {', '.join(SCALES)}")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which sessions start")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-rerun timeout, seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    print(f"Starting {args.sessions} sessions x {args.actions} actions...", file=sys.stderr)
+    summary = run_load(args.sessions, args.actions, args.think, parse_scale(args.scale),
+                       args.ramp, args.seed, args.timeout)
+    print_report(summary)
+
+    output = json.dumps(summary, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
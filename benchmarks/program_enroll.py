@@ -0,0 +1,95 @@
+# benchmarks/program_enroll.py
+#
+# Times enrolling users in a multi-week training program (backend/db_fitness/programs.py)
+# against saving the same planned workouts one add_workout at a time, on a fresh database in
+# a temporary directory. The per-workout path is timed on a sample of users and scaled up.
+#
+#   python -m benchmarks.program_enroll --users 1000 --weeks 12 --sessions 4
+#   FITNESS_SHARDS=hash:4 python -m benchmarks.program_enroll
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict
+
+from benchmarks.synthetic import generate_templates
+
+
+def run_benchmark(n_users: int, weeks: int, sessions: int, sample: int, seed: int) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory(prefix="fitness-programs-") as tmp:
+        saved = {key: os.environ.get(key) for key in ("FITNESS_DB_PATH", "FITNESS_SHARD_DIR")}
+        os.environ["FITNESS_DB_PATH"] = os.path.join(tmp, "fitness.db")
+        os.environ["FITNESS_SHARD_DIR"] = os.path.join(tmp, "shards")
+        try:
+            from backend.db_fitness import workouts
+            from backend.db_fitness.connection import init_db
+            from backend.db_fitness.programs import Program, ProgramSession, _expand, enroll, get_planned_workouts
+
+            init_db()
+            rng = random.Random(seed)
+            program = Program(
+                id="bench", name="Benchmark program", weeks=weeks,
+                sessions=[ProgramSession(template=t, day=i * 7 // sessions, weight_step=5.0)
+                          for i, t in enumerate(generate_templates(rng, sessions))],
+            )
+            start = date.today() + timedelta(days=1)
+            usernames = [f"user{i:05d}" for i in range(n_users)]
+
+            started = time.perf_counter()
+            counts = enroll(program, usernames, start)
+            bulk_seconds = time.perf_counter() - started
+
+            # The same plan saved workout by workout, for a sample of other users
+            plan = _expand(program)
+            sample_users = [f"sample{i:05d}" for i in range(sample)]
+            started = time.perf_counter()
+            planned_workouts = get_planned_workouts(usernames[0])
+            for username in sample_users:
+                for planned in planned_workouts:
+                    workouts.add_workout(username, planned.to_workout())
+            per_workout_seconds = (time.perf_counter() - started) / max(sample, 1) * n_users
+        finally:
+            from backend.db_fitness.write_queue import close_all
+            close_all()
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    return {
+        "users": n_users,
+        "weeks": weeks,
+        "sessions_per_week": sessions,
+        "planned_workouts": counts["planned_workouts"],
+        "planned_sets": counts["planned_sets"],
+        "sets_per_user": len(plan.sets),
+        "bulk_seconds": bulk_seconds,
+        "per_workout_seconds_estimated": per_workout_seconds,
+        "speedup": per_workout_seconds / bulk_seconds if bulk_seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time bulk program enrollment against per-workout saves")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--sessions", type=int, default=4, help="sessions per week")
+    parser.add_argument("--sample", type=int, default=10, help="users saved workout by workout for the comparison")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    result = run_benchmark(args.users, args.weeks, args.sessions, args.sample, args.seed)
+    print(f"{result['users']} users x {result['weeks']} weeks: {result['planned_workouts']} planned workouts, "
+          f"{result['planned_sets']} sets in {result['bulk_seconds']:.1f} s "
+          f"(add_workout per workout: ~{result['per_workout_seconds_estimated']:.0f} s)", file=sys.stderr)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
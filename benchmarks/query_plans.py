@@ -0,0 +1,240 @@
+# benchmarks/query_plans.py
+#
+# Query-plan regression check. Builds a synthetic database in a temp directory (part of it
+# archived), runs the app's interactive data functions against it with statement capture on
+# (see backend/instrumentation.py), then asks SQLite for the plan of every distinct statement
+# they issued. A statement fails the check when its plan
+#
+#   SCANs a table or a whole index    instead of SEARCHing one, or
+#   USEs a TEMP B-TREE                to sort, group or de-duplicate
+#
+# unless it is listed in ALLOWED with the reason it is fine. Run it after schema or query changes:
+#
+#   python -m benchmarks.query_plans                 # exit 1 if any statement regressed
+#   python -m benchmarks.query_plans --verbose       # print every plan
+#
+# The fixture is always FIXTURE_SETS (100k) sets, with the user count synthetic.py picks for
+# that scale; results at that size are the authoritative ones. SQLite plans by table size, so
+# on much smaller tables it rightly scans where an index would be used in production, and a
+# check that passed or failed with the fixture's size would flag spurious regressions.
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import SCALES, generate_templates, generate_workouts, populate
+
+FIXTURE_SETS = SCALES["100k"]
+
+# Normalized statement (regex, see normalize_sql) -> why its scan or temp B-tree is acceptable
+ALLOWED: Dict[str, str] = {
+    r"GROUP BY period_start ORDER BY period_start DESC":
+        "groups one user's workout dates (already narrowed by the user index) by week or month",
+    r"^SELECT type, COUNT\(\*\) FROM (archived_)?workouts WHERE username = \? GROUP BY type":
+        "groups one user's rows, found by the user index, into a handful of types",
+    r"JOIN workouts w ON w.id = e.workout_id WHERE w.username = \? AND e.name IS NOT NULL GROUP BY e.name$":
+        "builds one user's exercise name index (autocomplete and the chart picker), once per process",
+}
+
+# Plan lines that read a whole table or index, and the ones that build a temporary sort
+_SCAN = re.compile(r"^SCAN (\S+)(?: USING (?:COVERING )?INDEX (\S+))?")
+_TEMP_B_TREE = re.compile(r"USE TEMP B-TREE FOR (.+)")
+_TRANSIENT = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\S+)")
+_TEMP_TABLE = re.compile(r"\btemp\.", re.IGNORECASE)
+_CHECKED = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+
+def _plan(conn: sqlite3.Connection, sql: str, params) -> List[str]:
+    """EXPLAIN QUERY PLAN lines, indented by depth like the sqlite3 shell."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params if params is not None else ()).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+def problems(plan: List[str]) -> List[str]:
+    """The full scans and temp B-trees in a plan (scans of materialized subqueries don't count)."""
+    details = [line.strip() for line in plan]
+    transient = {m.group(1) for m in map(_TRANSIENT.match, details) if m}
+    found = []
+    for detail in details:
+        scan = _SCAN.match(detail)
+        if scan and scan.group(1) not in transient and not detail.startswith("SCAN CONSTANT ROW"):
+            found.append(detail)
+        elif _TEMP_B_TREE.search(detail):
+            found.append(detail)
+    return found
+
+
+def allowed_reason(statement: str) -> Optional[str]:
+    for pattern, reason in ALLOWED.items():
+        if re.search(pattern, statement):
+            return reason
+    return None
+
+
+# ------------------ Workload ------------------
+
+def _workload(counts: Dict[str, int], seed: int) -> List[Tuple[str, Callable[[], object]]]:
+    """(name, call) for every interactive read and write, on a heavy and a typical user."""
+    from backend import auth, db_users
+    from backend.db_fitness import activity, changes, exercise_names, programs, progress, templates, workouts
+
+    rng = random.Random(seed)
+    ranked = sorted(counts, key=counts.get)
+    heavy, typical = ranked[-1], ranked[len(ranked) // 2]
+    today = date.today()
+    month_ago, two_years_ago = today - timedelta(days=30), today - timedelta(days=730)
+    new = generate_workouts(40, rng)
+    template = generate_templates(rng, 1)[0]
+
+    program = programs.Program("plan-check", "Plan check", 4, [
+        programs.ProgramSession(t, day=2 * i, weight_step=5.0) for i, t in enumerate(generate_templates(rng, 3))
+    ])
+
+    calls: List[Tuple[str, Callable[[], object]]] = [
+        ("enroll", lambda: programs.enroll(program, [heavy, typical], today)),
+    ]
+    for user in (heavy, typical):
+        calls += [
+            ("get_all_workouts", lambda u=user: workouts.get_all_workouts(u)),
+            ("get_workouts_page", lambda u=user: workouts.get_workouts_page(u, 20, 40)),
+            ("get_workouts_page recent", lambda u=user: workouts.get_workouts_page(u, 20, 0, month_ago, today)),
+            ("get_workouts_page archived", lambda u=user: workouts.get_workouts_page(u, 20, 0, two_years_ago)),
+            ("get_workouts_page filtered",
+             lambda u=user: workouts.get_workouts_page(u, 20, 0, month_ago, None, "cardio", "run")),
+            ("count_workouts", lambda u=user: workouts.count_workouts(u, two_years_ago, None, "strength")),
+            ("get_workout_period_summaries", lambda u=user: workouts.get_workout_period_summaries(u, "week")),
+            ("get_workout_period_summaries month",
+             lambda u=user: workouts.get_workout_period_summaries(u, "month", month_ago, today)),
+            ("get_workout_stats", lambda u=user: workouts.get_workout_stats(u)),
+            ("get_templates", lambda u=user: templates.get_templates(u)),
+            ("get_activity", lambda u=user: activity.get_activity(u)),
+            ("get_progress_series", lambda u=user: progress.get_progress_series(u, "Bench Press", "weight")),
+            ("get_progress_series cardio", lambda u=user: progress.get_progress_series(u, "Running", "distance")),
+            ("get_exercise_names", lambda u=user: progress.get_exercise_names(u)),
+            ("suggest_exercises", lambda u=user: exercise_names.suggest_exercises(u, "be")),
+            ("get_changes", lambda u=user: changes.get_changes(0, 50, u)),
+            ("get_planned_workouts", lambda u=user: programs.get_planned_workouts(u, today, today + timedelta(days=14))),
+        ]
+
+    def edit_cycle(user: str):
+        workouts.add_workout(user, new[0])
+        workouts.add_workout(user, new[0])  # a double submit finds the first copy
+        workouts.add_workouts(user, new[1:4])
+        workouts.get_workout(user, new[1].id)
+        workouts.update_workout(user, new[1].id, new[2])
+        workouts.delete_workout(user, new[3].id)
+        # Editing and deleting an archived workout
+        oldest = workouts.get_workouts_page(user, 2, counts[user] - 2)
+        workouts.update_workout(user, oldest[0].id, oldest[0])
+        workouts.delete_workout(user, oldest[1].id)
+
+    def template_cycle(user: str):
+        templates.add_template(user, template)
+        templates.update_template(user, template)
+        templates.delete_template(template.id, user)
+
+    def account_cycle():
+        auth.signup_user("plan-check", "secret")
+        auth.login_user("plan-check", "secret")
+        auth.user_exists("nobody")
+        db_users.get_user_by_username("plan-check")
+
+    calls += [
+        ("workout writes", lambda: edit_cycle(heavy)),
+        ("template writes", lambda: template_cycle(typical)),
+        ("accounts", account_cycle),
+    ]
+    return calls
+
+
+def run_check(seed: int = 42, verbose: bool = False) -> List[str]:
+    """Returns one failure message per statement whose plan regressed on the FIXTURE_SETS fixture."""
+    from backend import db_users, instrumentation
+    from backend.db_fitness.archive import archive_workouts
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="fitness-plans-") as tmp:
+        saved = {key: os.environ.get(key) for key in ("FITNESS_DB_PATH", "USERS_DB_PATH", "FITNESS_READ_REPLICA", "FITNESS_SHARDS")}
+        os.environ["FITNESS_DB_PATH"] = os.path.join(tmp, "fitness.db")
+        os.environ["USERS_DB_PATH"] = os.path.join(tmp, "users.db")
+        os.environ.pop("FITNESS_READ_REPLICA", None)
+        os.environ.pop("FITNESS_SHARDS", None)
+        was_enabled = instrumentation.is_enabled()
+        try:
+            counts = populate(os.environ["FITNESS_DB_PATH"], FIXTURE_SETS, seed=seed)
+            # Archive the older half of the history so reads that reach the archive run too
+            with sqlite3.connect(os.environ["FITNESS_DB_PATH"]) as conn:
+                dates = [row[0] for row in conn.execute("SELECT date FROM workouts ORDER BY date")]
+            archive_workouts(days=(date.today() - date.fromisoformat(dates[len(dates) // 2])).days)
+            db_users.init_db()
+            for path in (os.environ["FITNESS_DB_PATH"], os.environ["USERS_DB_PATH"]):
+                with sqlite3.connect(path) as conn:
+                    conn.execute("ANALYZE")  # as backend/maintenance.py does in production
+
+            instrumentation.enable()
+            instrumentation.start_capture()
+            for name, call in _workload(counts, seed):
+                call()
+            captured = instrumentation.stop_capture()
+            print(f"Checking {len(captured)} distinct statements...", file=sys.stderr)
+
+            connections: Dict[str, sqlite3.Connection] = {}
+            for database, sql, params in captured:
+                statement = instrumentation.normalize_sql(sql)
+                if not statement.upper().startswith(_CHECKED) or params is None:
+                    continue
+                if _TEMP_TABLE.search(statement):
+                    continue  # temp tables only exist on the connection that made them
+                conn = connections.get(database) or connections.setdefault(database, sqlite3.connect(database))
+                plan = _plan(conn, sql, params)
+                found = problems(plan)
+                reason = allowed_reason(statement) if found else None
+                if verbose or (found and reason is None):
+                    status = "OK" if not found else (f"ALLOWED ({reason})" if reason else "FAIL")
+                    print(f"\n[{status}] {statement}\n" + "\n".join(f"    {line}" for line in plan))
+                if found and reason is None:
+                    failures.append(f"{statement}\n    -> {'; '.join(found)}")
+            for conn in connections.values():
+                conn.close()
+        finally:
+            instrumentation.stop_capture()
+            if not was_enabled:
+                instrumentation.disable()
+            from backend.db_fitness.write_queue import close_all
+            close_all()
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a backend statement's query plan scans a table or sorts in a temp B-tree")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="print every statement's plan, not just failures")
+    args = parser.parse_args()
+
+    failures = run_check(args.seed, args.verbose)
+    if failures:
+        print(f"\n{len(failures)} statement(s) with a full scan or temp B-tree:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+    print("\nAll query plans use indexes.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/shard_scaling.py
+#
+# Measures workout write throughput against the number of shard files. Several processes
+# (one per core, like several app servers) save workouts through the group-commit queue for
+# users spread across the shards; each layout runs in a fresh temporary directory.
+#
+#   python -m benchmarks.shard_scaling --layouts single,hash:2,hash:4,hash:8 --writes 400
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.synthetic import generate_workouts
+
+
+def _writer_process(process_index: int, n_threads: int, writes_per_thread: int, n_users: int, start_event, results):
+    from backend.db_fitness.write_queue import add_workout, close_all
+
+    rng = random.Random(process_index)
+    jobs = []
+    for t in range(n_threads):
+        workouts = []
+        while len(workouts) < writes_per_thread:
+            workouts.extend(generate_workouts(100, rng))
+        users = [f"user{(process_index * n_threads + t + i) % n_users:05d}" for i in range(writes_per_thread)]
+        jobs.append(list(zip(users, workouts[:writes_per_thread])))
+
+    def run(job):
+        for username, workout in job:
+            add_workout(username, workout)
+
+    threads = [threading.Thread(target=run, args=(job,)) for job in jobs]
+    start_event.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    close_all()
+    results.put(time.perf_counter() - started)
+
+
+def run_layout(layout: str, processes: int, threads: int, writes: int, n_users: int) -> Dict[str, float]:
+    """Writes processes * threads * writes workouts under one shard layout; returns throughput."""
+    with tempfile.TemporaryDirectory(prefix="fitness-shards-") as tmp:
+        env = {
+            "FITNESS_DB_PATH": os.path.join(tmp, "fitness.db"),
+            "FITNESS_SHARD_DIR": os.path.join(tmp, "shards"),
+            "FITNESS_SHARDS": layout,
+        }
+        saved = {k: os.environ.get(k) for k in env}
+        os.environ.update(env)
+        try:
+            from backend.db_fitness.connection import init_db
+            init_db()  # shard files are created on first use; the single file is not
+            ctx = multiprocessing.get_context("spawn")
+            start_event = ctx.Event()
+            results = ctx.Queue()
+            procs = [
+                ctx.Process(target=_writer_process, args=(i, threads, writes, n_users, start_event, results))
+                for i in range(processes)
+            ]
+            for p in procs:
+                p.start()
+            time.sleep(1.0)  # let every process import and build its workouts before the clock starts
+            started = time.perf_counter()
+            start_event.set()
+            [results.get() for _ in procs]
+            elapsed = time.perf_counter() - started
+            for p in procs:
+                p.join()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    total = processes * threads * writes
+    return {"layout": layout, "writes": total, "seconds": elapsed, "writes_per_sec": total / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workout write throughput by shard layout")
+    parser.add_argument("--layouts", default="single,hash:2,hash:4,hash:8")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--threads", type=int, default=8, help="concurrent sessions per process")
+    parser.add_argument("--writes", type=int, default=100, help="writes per session")
+    parser.add_argument("--users", type=int, default=64)
+    args = parser.parse_args()
+
+    rows: List[Dict[str, float]] = []
+    for layout in args.layouts.split(","):
+        row = run_layout(layout, args.processes, args.threads, args.writes, args.users)
+        rows.append(row)
+        print(f"{layout:<10} {row['writes']:7d} writes in {row['seconds']:6.2f} s  "
+              f"{row['writes_per_sec']:9,.0f} writes/s", file=sys.stderr)
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
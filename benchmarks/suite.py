@@ -0,0 +1,326 @@
+# benchmarks/suite.py
+#
+# Backend benchmark suite. Builds a synthetic database in a temp directory, times each
+# backend operation, writes machine-readable results and compares them with a baseline.
+#
+#   python -m benchmarks.suite --scale 10k --out bench.json
+#   python -m benchmarks.suite --scale 10k --save-baseline          # refresh benchmarks/baseline.json
+#   python -m benchmarks.suite --scale 10k --fail-on-regression     # exit 1 if anything got slower
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import SCALES, generate_templates, generate_workouts, parse_scale, populate
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# name -> function(ctx) returning a list of per-operation durations in seconds
+BENCHMARKS: Dict[str, Callable[["BenchContext"], List[float]]] = {}
+
+
+def benchmark(name: str):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class BenchContext:
+    """Shared state for one run: the populated database and a few users picked from it."""
+
+    def __init__(self, db_path: str, counts: Dict[str, int], seed: int):
+        self.db_path = db_path
+        self.rng = random.Random(seed)
+        ranked = sorted(counts, key=counts.get)
+        self.heavy_user = ranked[-1]  # the power user with the longest history
+        self.typical_user = ranked[len(ranked) // 2]
+
+        from backend.db_fitness.workouts import get_all_workouts
+        self.heavy_workouts = get_all_workouts(self.heavy_user)
+
+    def new_workouts(self, count: int):
+        """Fresh workouts (not yet in the database) to write."""
+        workouts = []
+        while len(workouts) < count:
+            workouts.extend(generate_workouts(200, self.rng))
+        return workouts[:count]
+
+
+def _time_each(func: Callable, args_list: list) -> List[float]:
+    timings = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+# ------------------ Workouts ------------------
+
+@benchmark("add_workout")
+def bench_add_workout(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.workouts import add_workout
+    return _time_each(add_workout, [(ctx.typical_user, w) for w in ctx.new_workouts(200)])
+
+
+@benchmark("add_workout_queued_16_threads")
+def bench_add_workout_queued(ctx: BenchContext) -> List[float]:
+    """Throughput of the group-commit queue with 16 sessions saving at once (per-op = wall time / ops)."""
+    from backend.db_fitness.write_queue import add_workout
+    per_thread = 50
+    batches = [ctx.new_workouts(per_thread) for _ in range(16)]
+
+    def run(workouts):
+        for w in workouts:
+            add_workout(ctx.typical_user, w)
+
+    threads = [threading.Thread(target=run, args=(b,)) for b in batches]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return [elapsed / (16 * per_thread)] * (16 * per_thread)
+
+
+@benchmark("get_all_workouts_heavy_user")
+def bench_get_all_workouts(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.workouts import get_all_workouts
+    return _time_each(get_all_workouts, [(ctx.heavy_user,)] * 5)
+
+
+@benchmark("get_workouts_page")
+def bench_get_workouts_page(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.workouts import get_workouts_page
+    total = len(ctx.heavy_workouts)
+    offsets = [ctx.rng.randrange(0, max(1, total - 20)) for _ in range(200)]
+    return _time_each(get_workouts_page, [(ctx.heavy_user, 20, offset) for offset in offsets])
+
+
+@benchmark("update_workout")
+def bench_update_workout(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.workouts import update_workout
+    targets = ctx.rng.sample(ctx.heavy_workouts, min(200, len(ctx.heavy_workouts)))
+    return _time_each(update_workout, [(ctx.heavy_user, w.id, w) for w in targets])
+
+
+@benchmark("delete_workout")
+def bench_delete_workout(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.workouts import add_workout, delete_workout
+    workouts = ctx.new_workouts(200)
+    for w in workouts:
+        add_workout(ctx.typical_user, w)
+    return _time_each(delete_workout, [(ctx.typical_user, w.id) for w in workouts])
+
+
+# ------------------ Templates ------------------
+
+@benchmark("add_template")
+def bench_add_template(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.templates import add_template
+    return _time_each(add_template, [(ctx.typical_user, t) for t in generate_templates(ctx.rng, 100)])
+
+
+@benchmark("get_templates")
+def bench_get_templates(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.templates import get_templates
+    return _time_each(get_templates, [(ctx.heavy_user,)] * 200)
+
+
+@benchmark("update_template")
+def bench_update_template(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.templates import get_templates, update_template
+    templates = get_templates(ctx.heavy_user)
+    return _time_each(update_template, [(ctx.heavy_user, ctx.rng.choice(templates)) for _ in range(100)])
+
+
+@benchmark("delete_template")
+def bench_delete_template(ctx: BenchContext) -> List[float]:
+    from backend.db_fitness.templates import add_template, delete_template
+    templates = generate_templates(ctx.rng, 100)
+    for t in templates:
+        add_template(ctx.typical_user, t)
+    return _time_each(delete_template, [(t.id, ctx.typical_user) for t in templates])
+
+
+# ------------------ Filters & Validation ------------------
+
+@benchmark("filter_workouts_by_date_range")
+def bench_filter_by_date(ctx: BenchContext) -> List[float]:
+    from backend.filters import filter_workouts_by_date_range
+    start = date.today() - timedelta(days=90)
+    return _time_each(filter_workouts_by_date_range, [(ctx.heavy_workouts, start, date.today())] * 50)
+
+
+@benchmark("filter_workouts_by_type")
+def bench_filter_by_type(ctx: BenchContext) -> List[float]:
+    from backend.filters import filter_workouts_by_type
+    return _time_each(filter_workouts_by_type, [(ctx.heavy_workouts, "cardio")] * 50)
+
+
+@benchmark("search_templates_by_name")
+def bench_search_templates(ctx: BenchContext) -> List[float]:
+    from backend.filters import search_templates_by_name
+    templates = generate_templates(ctx.rng, 500)
+    return _time_each(search_templates_by_name, [(templates, "day")] * 200)
+
+
+@benchmark("validate_workout")
+def bench_validate_workout(ctx: BenchContext) -> List[float]:
+    from backend.validators import validate_workout
+    return _time_each(validate_workout, [
+        (w.type, w.date.isoformat(), w.name, w.exercises, w.duration_minutes, w.distance_mi)
+        for w in ctx.heavy_workouts
+    ])
+
+
+@benchmark("validate_workouts_batch")
+def bench_validate_workouts(ctx: BenchContext) -> List[float]:
+    """Whole-history batch validation; per-op time is per workout."""
+    from backend.validators import validate_workouts
+    started = time.perf_counter()
+    validate_workouts(ctx.heavy_workouts)
+    elapsed = time.perf_counter() - started
+    n = max(1, len(ctx.heavy_workouts))
+    return [elapsed / n] * n
+
+
+# ------------------ Runner ------------------
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "ops": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        "ops_per_sec": len(ordered) / sum(ordered) if sum(ordered) else 0.0,
+    }
+
+
+def run_suite(total_sets: int, n_users: Optional[int], seed: int, only: Optional[List[str]] = None) -> Dict:
+    """Populates a temporary database and runs the selected benchmarks against it."""
+    with tempfile.TemporaryDirectory(prefix="fitness-bench-") as tmp:
+        db_path = os.path.join(tmp, "fitness.db")
+        previous = os.environ.get("FITNESS_DB_PATH")
+        os.environ["FITNESS_DB_PATH"] = db_path
+        try:
+            started = time.perf_counter()
+            counts = populate(db_path, total_sets, n_users, seed)
+            populate_seconds = time.perf_counter() - started
+
+            ctx = BenchContext(db_path, counts, seed)
+            results = {}
+            for name, func in BENCHMARKS.items():
+                if only and name not in only:
+                    continue
+                results[name] = summarize(func(ctx))
+                print(f"  {name:<34} median {results[name]['median_ms']:9.3f} ms"
+                      f"  ({results[name]['ops_per_sec']:,.0f} ops/s)", file=sys.stderr)
+        finally:
+            from backend.db_fitness.write_queue import close_all
+            close_all()
+            if previous is None:
+                os.environ.pop("FITNESS_DB_PATH", None)
+            else:
+                os.environ["FITNESS_DB_PATH"] = previous
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "total_sets": total_sets,
+            "users": len(counts),
+            "workouts": sum(counts.values()),
+            "heavy_user_workouts": len(ctx.heavy_workouts),
+            "populate_seconds": populate_seconds,
+        },
+        "results": results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compares median times with the baseline. Returns one line per benchmark that got
+    slower by more than `tolerance` (0.25 = 25%).
+    """
+    regressions = []
+    print(f"\n{'benchmark':<34} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"{name:<34} {'-':>12} {current['median_ms']:12.3f} {'new':>8}")
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(f"{name}: {previous['median_ms']:.3f} ms -> {current['median_ms']:.3f} ms ({ratio:.2f}x)")
+        print(f"{name:<34} {previous['median_ms']:12.3f} {current['median_ms']:12.3f} {(ratio - 1) * 100:+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Fitness Tracker backend")
+    parser.add_argument("--scale", default="10k", help=f"total sets: a number or one of {', '.join(SCALES)}")
+    parser.add_argument("--users", type=int, help="default: scales with the set total")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--out", help="write results JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging, 0.25 = 25%%")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    only = args.only.split(",") if args.only else None
+    unknown = set(only or []) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    print(f"Running {len(only or BENCHMARKS)} benchmarks at {args.scale} sets...", file=sys.stderr)
+    results = run_suite(parse_scale(args.scale), args.users, args.seed, only)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    elif not args.save_baseline:
+        print(output)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(output + "\n")
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("total_sets") != results["meta"]["total_sets"]:
+            print("Note: baseline was recorded at a different scale.", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# benchmarks/synthetic.py
+#
+# Synthetic workout histories for benchmarks and load tests, built from the real models.
+#   python -m benchmarks.synthetic --sets 100k --users 50 --db /tmp/fitness.db
+
+import argparse
+import random
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.models import Workout, Exercise, WorkoutSet, Template
+from backend.db_fitness.connection import init_db, get_connection
+from backend.db_fitness import workouts as _workouts
+from backend.db_fitness import templates as _templates
+from backend.db_fitness.writes import commit, transaction
+
+# Named scales, in total number of sets across all users
+SCALES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+# (name, type, typical working weight in lbs); bodyweight movements carry the lifter's weight
+EXERCISES: List[Tuple[str, str, float]] = [
+    ("Bench Press", "strength", 155.0),
+    ("Squat", "strength", 205.0),
+    ("Deadlift", "strength", 255.0),
+    ("Overhead Press", "strength", 95.0),
+    ("Barbell Row", "strength", 135.0),
+    ("Lat Pulldown", "strength", 120.0),
+    ("Leg Press", "strength", 300.0),
+    ("Bicep Curl", "strength", 30.0),
+    ("Tricep Pushdown", "strength", 50.0),
+    ("Pull Up", "bodyweight", 180.0),
+    ("Push Up", "bodyweight", 180.0),
+    ("Dip", "bodyweight", 180.0),
+    ("Lunge", "bodyweight", 180.0),
+]
+CARDIO: List[Tuple[str, float]] = [  # (name, typical pace in minutes per mile)
+    ("Run", 9.5),
+    ("Bike", 4.0),
+    ("Row", 8.0),
+    ("Walk", 18.0),
+]
+WORKOUT_NAMES = {
+    "strength": ["Push Day", "Pull Day", "Leg Day", "Upper Body", "Lower Body", "Full Body"],
+    "bodyweight": ["Calisthenics", "Home Workout", "Bodyweight Circuit"],
+    "cardio": ["Morning Run", "Bike Ride", "Conditioning", "Easy Cardio"],
+}
+
+
+# Per-user history sizes. A generated user logs ~3,000 sets a year, so the average user holds
+# under two years and even the heaviest stops at about ten; bigger scales get more users
+# rather than centuries-long histories.
+MIN_USERS = 20
+SETS_PER_USER = 5_000
+MAX_USER_SETS = 30_000
+
+
+def users_for_scale(total_sets: int) -> int:
+    """Default user count for a scale: MIN_USERS, or one per SETS_PER_USER sets beyond that."""
+    return max(MIN_USERS, total_sets // SETS_PER_USER)
+
+
+def parse_scale(value: str) -> int:
+    """Accepts a named scale ("100k") or a plain number of sets."""
+    return SCALES.get(value.lower()) or int(value)
+
+
+def generate_workouts(n_sets: int, rng: random.Random, end_date: Optional[date] = None) -> List[Workout]:
+    """
+    Generates one user's history holding roughly n_sets sets, oldest first.
+    About 3-5 sessions a week; ~75% strength or bodyweight sessions of 3-6 exercises with 3-5 sets
+    each and slowly progressing weights, the rest cardio (pure cardio workouts or a cardio finisher).
+    """
+    end_date = end_date or date.today()
+    progress = rng.uniform(0.6, 1.0)  # strength level relative to EXERCISES weights at the start
+    sessions: List[Tuple[int, Workout]] = []  # (day number, workout)
+    sets_made = 0
+    day = 0
+
+    while sets_made < n_sets:
+        day += rng.choice([1, 1, 2, 2, 3])
+        progress = min(progress * 1.0015, 1.6)
+        kind = rng.choices(["strength", "bodyweight", "cardio"], weights=[60, 15, 25])[0]
+
+        if kind == "cardio":
+            name, pace = rng.choice(CARDIO)
+            miles = round(rng.uniform(1.0, 8.0), 1)
+            minutes = round(miles * pace * rng.uniform(0.9, 1.1))
+            sessions.append((day, Workout.create(
+                type="cardio",
+                date=date.min,  # dates are assigned below once the span is known
+                name=rng.choice(WORKOUT_NAMES["cardio"]),
+                sets=[],
+                duration_minutes=minutes,
+                distance_mi=miles,
+            )))
+            continue
+
+        pool = [e for e in EXERCISES if e[1] == kind] if kind == "bodyweight" else EXERCISES
+        exercises = []
+        for ex_name, ex_type, base_weight in rng.sample(pool, min(len(pool), rng.randint(3, 6))):
+            weight = round(base_weight * (1.0 if ex_type == "bodyweight" else progress) / 2.5) * 2.5
+            sets = [
+                WorkoutSet(reps=rng.randint(5, 12), weight=max(2.5, weight - 10.0 * i * rng.random()))
+                for i in range(rng.randint(3, 5))
+            ]
+            sets_made += len(sets)
+            exercises.append(Exercise(name=ex_name, type=ex_type, sets=sets))
+
+        # Some strength sessions end with a short cardio finisher
+        if rng.random() < 0.2:
+            name, pace = rng.choice(CARDIO)
+            miles = round(rng.uniform(0.5, 2.0), 1)
+            exercises.append(Exercise(name=name, type="cardio", sets=None,
+                                      duration_minutes=round(miles * pace), distance_mi=miles))
+
+        sessions.append((day, Workout.create(
+            type=kind,
+            date=date.min,
+            name=rng.choice(WORKOUT_NAMES[kind]),
+            exercises=exercises,
+        )))
+
+    # Lay the history out so the newest session lands on end_date
+    for session_day, workout in sessions:
+        workout.date = end_date - timedelta(days=day - session_day)
+    return [workout for _, workout in sessions]
+
+
+def generate_templates(rng: random.Random, count: int = 5) -> List[Template]:
+    """Generates a handful of strength templates with planned sets."""
+    templates = []
+    for i in range(count):
+        exercises = [
+            Exercise(name=name, type=ex_type, sets=[WorkoutSet(reps=rng.choice([5, 8, 10]), weight=weight)] * 3)
+            for name, ex_type, weight in rng.sample(EXERCISES, 4)
+        ]
+        templates.append(Template.create(name=f"{rng.choice(WORKOUT_NAMES['strength'])} {i + 1}",
+                                         type="strength", exercises=exercises))
+    return templates
+
+
+def user_set_counts(total_sets: int, n_users: int, rng: random.Random) -> Dict[str, int]:
+    """
+    Splits total_sets across users with a long-tailed (Pareto) distribution:
+    a few power users hold most of the history, most users have little.
+    No user gets more than MAX_USER_SETS.
+    """
+    weights = [rng.paretovariate(1.2) for _ in range(n_users)]
+    # No user above MAX_USER_SETS (unless there are too few users to hold total_sets otherwise):
+    # cap the heaviest and share what they'd have had among the rest
+    cap = max(MAX_USER_SETS, -(-total_sets // n_users))
+    counts: Dict[int, float] = {}
+    remaining, uncapped = float(total_sets), set(range(n_users))
+    while uncapped:
+        scale = remaining / sum(weights[i] for i in uncapped)
+        over = {i for i in uncapped if weights[i] * scale > cap}
+        if not over:
+            counts.update((i, weights[i] * scale) for i in uncapped)
+            break
+        for i in over:
+            counts[i] = cap
+        remaining -= cap * len(over)
+        uncapped -= over
+    return {f"user{i:05d}": max(1, int(counts[i])) for i in range(n_users)}
+
+
+def iter_dataset(total_sets: int, n_users: Optional[int] = None, seed: int = 42) -> Iterator[Tuple[str, Workout]]:
+    """Yields (username, workout) for a whole synthetic user base, one user at a time."""
+    n_users = n_users or users_for_scale(total_sets)
+    rng = random.Random(seed)
+    for username, n_sets in user_set_counts(total_sets, n_users, rng).items():
+        for workout in generate_workouts(n_sets, rng):
+            yield username, workout
+
+
+def populate(db_path: str, total_sets: int, n_users: Optional[int] = None, seed: int = 42,
+             templates_per_user: int = 3) -> Dict[str, int]:
+    """
+    Creates (or extends) a fitness database at db_path with a synthetic user base
+    (users_for_scale(total_sets) users unless n_users is given).
+    Rows go through the same cursor-level helpers as the app, committed in large transactions.
+    Returns the number of workouts written per user.
+    """
+    init_db(db_path)
+    conn = get_connection(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    c = conn.cursor()
+
+    rng = random.Random(seed + 1)
+    counts: Dict[str, int] = {}
+    with transaction(conn):
+        for i, (username, workout) in enumerate(iter_dataset(total_sets, n_users, seed)):
+            if username not in counts:
+                counts[username] = 0
+                for template in generate_templates(rng, templates_per_user):
+                    _templates._add_template(c, username, template)
+            _workouts._add_workout(c, username, workout)
+            counts[username] += 1
+            if i % 5000 == 4999:
+                commit(conn)
+    conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a fitness database with synthetic workout history")
+    parser.add_argument("--db", required=True, help="path of the database file to create or extend")
+    parser.add_argument("--sets", default="100k", help=f"total sets: a number or one of {', '.join(SCALES)}")
+    parser.add_argument("--users", type=int, help="default: scales with --sets (see users_for_scale)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    counts = populate(args.db, parse_scale(args.sets), args.users, args.seed)
+    print(f"Wrote {sum(counts.values())} workouts for {len(counts)} users to {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/write_stress.py
+#
+# Several processes (like several Streamlit servers on one fitness.db) saving workouts and
+# templates at once, each through its own connections rather than a shared write queue.
+# Counts saves that failed and checks every save landed exactly once.
+#
+#   python -m benchmarks.write_stress --processes 8 --threads 4 --writes 50
+#   python -m benchmarks.write_stress --legacy      # the old connect / write / commit path, for comparison
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict
+
+from benchmarks.synthetic import generate_templates, generate_workouts
+
+
+def _legacy_write(username: str, func, *args):
+    """How public writes ran before backend/db_fitness/writes.py: implicit transaction, no retry."""
+    from backend.db_fitness.connection import get_connection
+    conn = get_connection(username=username)
+    try:
+        result = func(conn.cursor(), *args)
+        conn.commit()
+        return result
+    finally:
+        conn.close()
+
+
+def _writer_process(process_index: int, n_threads: int, writes_per_thread: int, n_users: int,
+                    legacy: bool, start_event, results):
+    from backend.db_fitness import templates, workouts, write_queue
+    from backend.db_fitness.writes import lock_stats, run_write
+
+    write = _legacy_write if legacy else lambda username, func, *args: run_write(username, func, *args)
+    rng = random.Random(process_index)
+    failures: Counter = Counter()
+    saved = Counter()
+    lock = threading.Lock()
+
+    def run(thread_index: int):
+        thread_rng = random.Random(process_index * 1000 + thread_index)
+        workouts_to_save = []
+        while len(workouts_to_save) < writes_per_thread:
+            workouts_to_save.extend(generate_workouts(60, thread_rng))
+        template = generate_templates(thread_rng, 1)[0]
+        template.name = f"Stress {process_index}-{thread_index}"
+        for i, workout in enumerate(workouts_to_save[:writes_per_thread]):
+            username = f"user{thread_rng.randrange(n_users):03d}"
+            try:
+                write(username, workouts._add_workout, username, workout)
+                with lock:
+                    saved["workout"] += 1
+                if i % 5 == 0:
+                    # Edit it again straight away, as the timeline's Edit does
+                    write(username, workouts._update_workout, username, workout.id, workout)
+                if i % 10 == 0:
+                    template.id = str(uuid.uuid4())
+                    write(username, templates._update_template, username, template)
+            except Exception as e:
+                with lock:
+                    failures[f"{type(e).__name__}: {e}"] += 1
+
+    threads = [threading.Thread(target=run, args=(t,)) for t in range(n_threads)]
+    start_event.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    write_queue.close_all()
+    results.put({
+        "seconds": time.perf_counter() - started,
+        "saved": saved["workout"],
+        "failures": dict(failures),
+        "retries": sum(row["retries"] for row in lock_stats()),
+        "max_wait_ms": max((row["max_wait_ms"] for row in lock_stats()), default=0.0),
+    })
+
+
+def run_stress(processes: int, threads: int, writes: int, n_users: int, legacy: bool,
+               journal_mode: str = "wal") -> Dict[str, object]:
+    with tempfile.TemporaryDirectory(prefix="fitness-stress-") as tmp:
+        db_path = os.path.join(tmp, "fitness.db")
+        saved_env = os.environ.get("FITNESS_DB_PATH")
+        os.environ["FITNESS_DB_PATH"] = db_path
+        try:
+            from backend.db_fitness.connection import init_db
+            init_db()
+            with sqlite3.connect(db_path) as conn:
+                conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+
+            ctx = multiprocessing.get_context("spawn")
+            start_event = ctx.Event()
+            results = ctx.Queue()
+            procs = [
+                ctx.Process(target=_writer_process, args=(i, threads, writes, n_users, legacy, start_event, results))
+                for i in range(processes)
+            ]
+            for p in procs:
+                p.start()
+            time.sleep(1.0)  # let every process import before the clock starts
+            started = time.perf_counter()
+            start_event.set()
+            reports = [results.get() for _ in procs]
+            elapsed = time.perf_counter() - started
+            for p in procs:
+                p.join()
+
+            with sqlite3.connect(db_path) as conn:
+                stored = conn.execute("SELECT COUNT(*) FROM workouts").fetchone()[0]
+        finally:
+            if saved_env is None:
+                os.environ.pop("FITNESS_DB_PATH", None)
+            else:
+                os.environ["FITNESS_DB_PATH"] = saved_env
+
+    failures: Counter = Counter()
+    for report in reports:
+        failures.update(report["failures"])
+    saved = sum(report["saved"] for report in reports)
+    return {
+        "mode": "legacy" if legacy else "retry",
+        "journal_mode": journal_mode,
+        "attempted_saves": processes * threads * writes,
+        "saved": saved,
+        "stored": stored,
+        "failed_writes": sum(failures.values()),
+        "failures": dict(failures),
+        "retries": sum(report["retries"] for report in reports),
+        "max_lock_wait_ms": max(report["max_wait_ms"] for report in reports),
+        "seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writes from several processes to one database")
+    parser.add_argument("--processes", type=int, default=max(4, os.cpu_count() or 2))
+    parser.add_argument("--threads", type=int, default=4, help="concurrent sessions per process")
+    parser.add_argument("--writes", type=int, default=50, help="workouts saved per session")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--legacy", action="store_true", help="use the old write path without BEGIN IMMEDIATE or retries")
+    parser.add_argument("--journal-mode", default="wal", choices=["wal", "delete"],
+                        help="wal, as the app's writers set it, or delete (a database nothing has switched yet)")
+    args = parser.parse_args()
+
+    result = run_stress(args.processes, args.threads, args.writes, args.users, args.legacy, args.journal_mode)
+    print(f"{result['mode']} ({result['journal_mode']}): {result['saved']}/{result['attempted_saves']} saves, {result['stored']} stored, "
+          f"{result['failed_writes']} failed writes, {result['retries']} retries, "
+          f"max lock wait {result['max_lock_wait_ms']:.0f} ms, {result['seconds']:.1f} s", file=sys.stderr)
+    print(json.dumps(result, indent=2))
+    if result["failed_writes"] or result["stored"] != result["saved"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,42 @@ from typing import Optional
 
 from backend.models import Workout, WorkoutSet, Exercise
 from backend.validators import validate_workout
-from backend.db_fitness.workouts import add_workout, update_workout
+from backend.db_fitness.write_queue import add_workout, update_workout
 from backend.db_fitness.templates import get_templates
+from backend.db_fitness.exercise_names import suggest_exercises
 
 def mark_template_change():
     """Trigger flag when template selection changes."""
     st.session_state["template_changed"] = True
 
+def use_suggestion(key: str, name: str):
+    """Fill an exercise name input with the clicked suggestion."""
+    st.session_state[key] = name
+
+def exercise_name_input(username: str, label: str, default: str, key: str) -> str:
+    """
+    Text input for an exercise name that suggests the user's past exercise names as they type,
+    so a typo or different capitalization doesn't start a separate history.
+    """
+    # Reset the input when its default changes (template loaded, another workout edited)
+    default_key = f"{key}_default"
+    if st.session_state.get(default_key) != default or key not in st.session_state:
+        st.session_state[default_key] = default
+        st.session_state[key] = default
+
+    name = st.text_input(label, key=key)
+    typed = name.strip()
+    if typed and name != default:
+        suggestions = suggest_exercises(username, typed, limit=3)
+        if typed not in suggestions:
+            cols = st.columns(len(suggestions) + 1) if suggestions else []
+            if cols:
+                cols[0].caption("Did you mean:")
+            for col, suggestion in zip(cols[1:], suggestions):
+                col.button(suggestion, key=f"{key}_suggestion_{suggestion}",
+                           on_click=use_suggestion, args=(key, suggestion))
+    return name
+
 def input_workout(username: str):
     """
     Render the Add Workout form.
@@ -93,7 +122,7 @@ def input_workout(username: str):
             ex_type = existing_exercises[i].type if i < len(existing_exercises) else workout_type
             sets_in_ex = existing_exercises[i].sets if i < len(existing_exercises) else []
 
-            exercise_name = st.text_input(f"Exercise {i+1} Name", value=ex_name, key=f"exercise_name_{i}")
+            exercise_name = exercise_name_input(username, f"Exercise {i+1} Name", ex_name, f"exercise_name_{i}")
             exercise_type = st.selectbox(
                 f"Type for {exercise_name}",
                 options=["strength", "bodyweight", "cardio"],
@@ -202,8 +231,10 @@ def input_workout(username: str):
         try:
             if "template_loaded" in st.session_state:
                 # If the user loaded from a template, it's a new workout
-                add_workout(username, workout)
-                st.success(f"Workout '{workout_name}' added from template!")
+                if add_workout(username, workout) != workout.id:
+                    st.info(f"Workout '{workout_name}' was already saved.")
+                else:
+                    st.success(f"Workout '{workout_name}' added from template!")
                 del st.session_state["edit_workout"]
                 del st.session_state["template_loaded"]
 
@@ -215,8 +246,10 @@ def input_workout(username: str):
 
             else:
                 # Brand new workout not from template
-                add_workout(username, workout)
-                st.success(f"Workout '{workout_name}' added successfully!")
+                if add_workout(username, workout) != workout.id:
+                    st.info(f"Workout '{workout_name}' was already saved.")
+                else:
+                    st.success(f"Workout '{workout_name}' added successfully!")
 
         except Exception as e:
             st.error(f"Error saving workout: {e}")
@@ -0,0 +1,137 @@
+# frontend/diagnostics.py
+
+import streamlit as st
+from backend import instrumentation, memory_profile
+from backend.db_fitness.history import memory_budget
+from backend.maintenance import get_scheduler
+from backend.db_fitness.write_queue import queue_stats
+from backend.db_fitness.writes import lock_stats
+from backend.db_fitness.replica import replica_stats
+
+
+def diagnostics_page(username: str):
+    """
+    Admin-only page showing backend instrumentation: per-function and per-statement
+    latency, the slow-query log, memory use per page and function, and a Prometheus text dump.
+    """
+    st.header("🩺 Diagnostics")
+
+    # --- Instrumentation switch ---
+    col1, col2 = st.columns(2)
+    with col1:
+        if instrumentation.is_enabled():
+            st.success("Instrumentation is on.")
+            if st.button("Turn off"):
+                instrumentation.disable()
+                st.rerun()
+        else:
+            st.info("Instrumentation is off. Connections opened after turning it on are timed.")
+            if st.button("Turn on"):
+                instrumentation.enable()
+                st.rerun()
+    with col2:
+        threshold = st.number_input(
+            "Slow query threshold (ms)",
+            min_value=1.0,
+            value=float(instrumentation.slow_query_threshold_ms()),
+            step=10.0,
+        )
+        if threshold != instrumentation.slow_query_threshold_ms():
+            instrumentation.set_slow_query_threshold(threshold)
+        if st.button("Reset stats"):
+            instrumentation.reset()
+            st.rerun()
+
+    # --- Write queue ---
+    write_stats = queue_stats()
+    st.subheader("Write queue")
+    st.write(
+        f"{write_stats['writes']} writes in {write_stats['batches']} batches "
+        f"across {write_stats['queues']} queue(s) (largest batch: {write_stats['largest_batch']})"
+    )
+
+    # --- Write lock ---
+    locks = lock_stats()
+    if locks:
+        st.subheader("Write lock")
+        st.caption("Time each write waited for SQLite's write lock (other processes included), "
+                   "retries after \"database is locked\", and writes that gave up.")
+        st.dataframe(locks, use_container_width=True)
+
+    # --- Read replicas ---
+    replicas = replica_stats()
+    if replicas:
+        st.subheader("Read replicas")
+        st.dataframe(replicas, use_container_width=True)
+
+    # --- Maintenance ---
+    st.subheader("Maintenance")
+    scheduler = get_scheduler()
+    if scheduler is None:
+        st.caption("The maintenance scheduler is not running.")
+    elif scheduler.history:
+        st.dataframe([vars(run) for run in reversed(scheduler.history)], use_container_width=True)
+    else:
+        st.caption("No maintenance has run yet.")
+
+    # --- Stats tables ---
+    st.subheader("Data functions")
+    function_stats = instrumentation.function_stats()
+    if function_stats:
+        st.dataframe(function_stats, use_container_width=True)
+    else:
+        st.caption("No calls recorded yet.")
+
+    st.subheader("SQL statements")
+    sql_stats = instrumentation.sql_stats()
+    if sql_stats:
+        st.dataframe(sql_stats, use_container_width=True)
+    else:
+        st.caption("No statements recorded yet.")
+
+    st.subheader("Slow queries")
+    slow = instrumentation.slow_queries()
+    if slow:
+        st.dataframe(slow, use_container_width=True)
+    else:
+        st.caption(f"Nothing slower than {instrumentation.slow_query_threshold_ms():.0f} ms.")
+
+    # --- Memory ---
+    st.subheader("Memory")
+    col1, col2 = st.columns(2)
+    with col1:
+        if memory_profile.is_enabled():
+            traced = memory_profile.traced_memory()
+            st.success(f"Memory profiling is on ({traced['current_kib'] / 1024:.1f} MiB traced).")
+            if st.button("Turn off profiling"):
+                memory_profile.disable()
+                st.rerun()
+        else:
+            st.info("Memory profiling is off. It traces every allocation, so expect pages to load slower.")
+            if st.button("Turn on profiling"):
+                memory_profile.enable()
+                st.rerun()
+    with col2:
+        budget = memory_budget()
+        if budget is None:
+            st.caption("Memory-budget mode is off: full histories are loaded as lists.")
+        else:
+            st.caption(f"Memory-budget mode: histories over {budget} workouts are loaded a page at a time.")
+        if st.button("Reset memory stats"):
+            memory_profile.reset()
+            st.rerun()
+
+    memory_stats = memory_profile.memory_stats()
+    if memory_stats:
+        st.caption("Peak: most memory in use above the starting point. Retained: still allocated afterwards.")
+        st.dataframe(memory_stats, use_container_width=True)
+    elif memory_profile.is_enabled():
+        st.caption("No pages or data functions profiled yet.")
+    if memory_profile.is_enabled() and st.button("Show top allocations"):
+        st.dataframe(memory_profile.top_allocations(), use_container_width=True)
+
+    # --- Prometheus export ---
+    metrics = instrumentation.prometheus_text()
+    with st.expander("Prometheus metrics"):
+        st.code(metrics, language="text")
+    st.download_button("Download metrics", metrics, file_name="fitness_metrics.prom", mime="text/plain")
@@ -13,6 +13,10 @@ from backend.db_fitness.connection import init_db as init_fitness_db  # Fixed im
 init_user_db()      # Initialize user database (users.db)
 init_fitness_db()   # Initialize fitness database (fitness.db)
 
+# Background ANALYZE / optimize / WAL checkpoints / incremental vacuum (starts once per process)
+from backend.maintenance import start_maintenance
+start_maintenance()
+
 # Import the run_session after init_db is ready
 from frontend.user_interface import run_session
 
@@ -1,27 +1,42 @@
 # frontend/timeline.py
 
 import streamlit as st
+from collections import OrderedDict
 from backend.models import Workout
-from backend.db_fitness.workouts import delete_workout, update_workout
+from backend.db_fitness.activity import get_activity
+from backend.db_fitness.progress import get_exercise_names, get_progress_series
+from backend.db_fitness.workouts import (
+    count_workouts,
+    get_workouts_page,
+    get_workout_period_summaries,
+)
+from backend.db_fitness.write_queue import delete_workout, update_workout
 from frontend.add_workout import input_workout
-from typing import List
-from datetime import date
-from backend.filters import filter_workouts_by_date_range, filter_workouts_by_type
+from typing import List, Tuple
+from datetime import date, timedelta
 
-def show_timeline(workouts: List[Workout]):
+# Rendered workout bodies keyed by (workout id, version), so unchanged workouts aren't rebuilt each rerun
+_BODY_CACHE: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+_BODY_CACHE_SIZE = 1024
+
+# Weeks shown in the activity heatmap above the timeline
+_HEATMAP_WEEKS = 26
+# Points requested for the progress chart, about one per pixel of its width
+_CHART_WIDTH = 600
+
+
+def show_timeline(username: str, page_size: int = 20):
     """
-    Renders a timeline view of all workouts with options to edit or delete.
-    Displays each workout inside an expandable box sorted by date (latest first).
+    Renders a windowed timeline of the user's workouts with options to edit or delete.
+    Only the current page of workouts is loaded and rendered, newest first,
+    grouped by week or month under collapsed per-period summaries.
     """
     st.header("🏋️ Workout Timeline")
-
-    if not workouts:
-        st.info("No workouts to display.")
-        return
+    _show_activity(username)
 
     #--- Filtering Workouts ---
     col1, col2 = st.columns(2)
-    with col1: 
+    with col1:
         start_date = st.date_input("Start Date", value=None)
     with col2:
         end_date = st.date_input("End Date", value=None)
@@ -29,70 +44,173 @@ def show_timeline(workouts: List[Workout]):
     workout_type = [ "All", "Strength", "Bodyweight", "Cardio" ]
     selected_type = st.selectbox("Filter by Type", workout_type, index=0)
 
+    col1, col2 = st.columns(2)
+    with col1:
+        group_by = st.selectbox("Group by", ["Week", "Month"], index=0)
+    with col2:
+        page_size = st.selectbox("Workouts per page", [10, 20, 50], index=[10, 20, 50].index(page_size))
+
     #--- Apply Filters ---
-    # Filter by type if not "All"
-    if selected_type != "All":
-        workouts = filter_workouts_by_type(workouts, selected_type.lower())
-    
-    # Filter by date range if dates selected (and not default today)
+    # Filters are applied in the database so only the visible page is loaded
+    type_filter = selected_type.lower() if selected_type != "All" else None
+
     # Treat todays date as no filter
     start_filter = start_date if start_date != date.today() else None
     end_filter = end_date if end_date != date.today() else None
-    workouts = filter_workouts_by_date_range(workouts, start_filter, end_filter)
-
-    # Sort workouts by date, latest first
-    sorted_workouts = sorted(workouts, key=lambda w: w.date, reverse=True)
-
-    for workout in sorted_workouts:
-        # Unique expander for each workout
-        with st.expander(f"{workout.date.strftime('%Y-%m-%d')} - {workout.name} ({workout.type})"):
-
-            # ----------------- Show workout data ------------------
-            if workout.exercises:
-                for ex in workout.exercises:
-                    st.markdown(f"**Exercise: {ex.name}**")
-                    if ex.type in ["strength", "bodyweight"]:
-                        if ex.sets:
-                            for i, s in enumerate(ex.sets):
-                                st.text(f"Set {i + 1}: {s.reps} reps @ {s.weight} lbs")
-                        else:
-                            st.text("No sets recorded for this exercise.")
-
-                    elif ex.type == "cardio":
-                        st.text(f"Duration: {ex.duration_minutes or 'Unknown'} min")
-                        st.text(f"Distance: {ex.distance_mi or 'Unknown'} miles")
-            else:
-                st.text("No exercises recorded.")
-
-            # ------------- Action Buttons (Edit/Delete) --------------
-
-            # Unique keys for each workout's buttons
-            edit_key = f"edit_{workout.id}"
-            delete_key = f"delete_button_{workout.id}"
-            confirm_key = f"confirm_delete_{workout.id}"
-            confirm_btn_key = f"confirm_button_{workout.id}"
-
-            # Button to edit workout
-            if st.button("✏️ Edit Workout", key=edit_key):
-                st.session_state.edit_mode = {
-                    "id": workout.id,
-                    "data": workout
-                }
-
-            # Button to trigger delete confirmation
-            if st.button("🗑️ Delete Workout", key=delete_key):
-                st.session_state[confirm_key] = True  # flag to show confirm delete
-
-            # If delete is clicked, show confirmation prompt
-            if st.session_state.get(confirm_key, False):
-                st.warning("Are you sure you want to delete this workout?")
-                if st.button("✅ Confirm Delete", key=confirm_btn_key):
-                    delete_workout(st.session_state.user, workout.id)
-                    st.success("Workout deleted.")
-                    st.session_state.pop(confirm_key, None)
-                    st.rerun()
-
-    # ---------------- Edit Mode ----------------
+
+    total = count_workouts(username, start_filter, end_filter, type_filter)
+    if total == 0:
+        st.info("No workouts to display.")
+        _show_edit_mode()
+        return
+
+    # Go back to the first page whenever the filters change
+    filter_key = (start_filter, end_filter, type_filter, page_size)
+    if st.session_state.get("timeline_filter_key") != filter_key:
+        st.session_state.timeline_filter_key = filter_key
+        st.session_state.timeline_page = 0
+
+    num_pages = (total + page_size - 1) // page_size
+    page = min(st.session_state.get("timeline_page", 0), num_pages - 1)
+
+    #--- Period Summaries ---
+    period = "week" if group_by == "Week" else "month"
+    summaries = dict(get_workout_period_summaries(username, period, start_filter, end_filter, type_filter))
+
+    with st.expander(f"📅 History overview ({total} workouts)"):
+        # One markdown block for all periods instead of a widget per period
+        st.markdown("\n".join(
+            f"- **{_period_label(key, period)}**: {count} workout{'s' if count != 1 else ''}"
+            for key, count in summaries.items()
+        ))
+
+    _show_progress_chart(username, start_filter, end_filter)
+
+    #--- Current Page ---
+    workouts = get_workouts_page(username, page_size, page * page_size, start_filter, end_filter, type_filter)
+
+    current_period = None
+    for workout in workouts:
+        key = _period_key(workout.date, period)
+        if key != current_period:
+            current_period = key
+            count = summaries.get(key, 0)
+            st.markdown(f"#### {_period_label(key, period)} · {count} workout{'s' if count != 1 else ''}")
+        _show_workout(username, workout)
+
+    #--- Page Navigation ---
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Newer", disabled=page == 0):
+            st.session_state.timeline_page = page - 1
+            st.rerun()
+    with col2:
+        st.caption(f"Page {page + 1} of {num_pages}")
+    with col3:
+        if st.button("Older ➡️", disabled=page >= num_pages - 1):
+            st.session_state.timeline_page = page + 1
+            st.rerun()
+
+    _show_edit_mode()
+
+
+def _show_activity(username: str):
+    """
+    Renders streaks and a calendar heatmap of workout days from the user's activity bitmap.
+    """
+    activity = get_activity(username)
+    today = date.today()
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("🔥 Current streak", f"{activity.current_streak(today)} days")
+    col2.metric("🏆 Longest streak", f"{activity.longest_streak()} days")
+    col3.metric("📆 Active days (30d)", activity.active_days(today - timedelta(days=29), today))
+
+    first, grid = activity.heatmap(today, _HEATMAP_WEEKS)
+    labels = ["Mon", "", "Wed", "", "Fri", "", "Sun"]
+    rows = [
+        f"`{label:<3}` " + "".join("🟩" if active else "⬜" for active in days)
+        for label, days in zip(labels, grid)
+    ]
+    st.markdown("  \n".join(rows))
+    st.caption(f"Workout days since {first.strftime('%b %d, %Y')}")
+
+
+def _show_progress_chart(username: str, start_date, end_date):
+    """
+    Charts one exercise over the filtered date range from a downsampled series, so the
+    chart stays small however long the history is.
+    """
+    with st.expander("📈 Progress"):
+        names = get_exercise_names(username)
+        if not names:
+            st.info("Log an exercise to chart its progress.")
+            return
+
+        col1, col2 = st.columns(2)
+        with col1:
+            exercise = st.selectbox("Exercise", names, key="progress_exercise")
+        with col2:
+            metric = st.selectbox("Metric", ["Weight", "Reps", "Volume", "Duration", "Distance"], key="progress_metric")
+
+        series = get_progress_series(username, exercise, metric.lower(), start_date, end_date, _CHART_WIDTH)
+        points = series["points"]
+        if not points:
+            st.info(f"No {metric.lower()} recorded for {exercise} in this range.")
+            return
+
+        st.line_chart(
+            {"Date": [date.fromisoformat(p["date"]) for p in points], metric: [p["value"] for p in points]},
+            x="Date",
+            y=metric,
+        )
+        if series["total_points"] > len(points):
+            st.caption(f"Showing {len(points)} of {series['total_points']} entries")
+
+
+def _show_workout(username: str, workout: Workout):
+    """
+    Renders a single workout inside an expandable box with Edit/Delete actions.
+    """
+    # Unique expander for each workout
+    with st.expander(f"{workout.date.strftime('%Y-%m-%d')} - {workout.name} ({workout.type})"):
+
+        # ----------------- Show workout data ------------------
+        st.markdown(_workout_body(workout))
+
+        # ------------- Action Buttons (Edit/Delete) --------------
+
+        # Unique keys for each workout's buttons
+        edit_key = f"edit_{workout.id}"
+        delete_key = f"delete_button_{workout.id}"
+        confirm_key = f"confirm_delete_{workout.id}"
+        confirm_btn_key = f"confirm_button_{workout.id}"
+
+        # Button to edit workout
+        if st.button("✏️ Edit Workout", key=edit_key):
+            st.session_state.edit_mode = {
+                "id": workout.id,
+                "data": workout
+            }
+
+        # Button to trigger delete confirmation
+        if st.button("🗑️ Delete Workout", key=delete_key):
+            st.session_state[confirm_key] = True  # flag to show confirm delete
+
+        # If delete is clicked, show confirmation prompt
+        if st.session_state.get(confirm_key, False):
+            st.warning("Are you sure you want to delete this workout?")
+            if st.button("✅ Confirm Delete", key=confirm_btn_key):
+                delete_workout(username, workout.id)
+                st.success("Workout deleted.")
+                st.session_state.pop(confirm_key, None)
+                st.rerun()
+
+
+def _show_edit_mode():
+    """
+    Shows the edit form for the workout selected with "Edit Workout", if any.
+    """
     if hasattr(st.session_state, "edit_mode"):
         st.subheader("🛠️ Edit Workout")
         workout_data = st.session_state.edit_mode["data"]
@@ -106,3 +224,72 @@ def show_timeline(workouts: List[Workout]):
             st.success("✅ Workout updated!")
             del st.session_state.edit_mode
             st.rerun()
+
+
+def _workout_body(workout: Workout) -> str:
+    """
+    Returns the workout's exercises as markdown, memoized by workout id and version.
+    """
+    key = (workout.id, _workout_version(workout))
+    body = _BODY_CACHE.get(key)
+    if body is not None:
+        _BODY_CACHE.move_to_end(key)
+        return body
+
+    lines: List[str] = []
+    if workout.exercises:
+        for ex in workout.exercises:
+            lines.append(f"**Exercise: {ex.name}**")
+            if ex.type in ["strength", "bodyweight"]:
+                if ex.sets:
+                    for i, s in enumerate(ex.sets):
+                        lines.append(f"- Set {i + 1}: {s.reps} reps @ {s.weight} lbs")
+                else:
+                    lines.append("- No sets recorded for this exercise.")
+
+            elif ex.type == "cardio":
+                lines.append(f"- Duration: {ex.duration_minutes or 'Unknown'} min")
+                lines.append(f"- Distance: {ex.distance_mi or 'Unknown'} miles")
+            lines.append("")
+    else:
+        lines.append("No exercises recorded.")
+
+    body = "\n".join(lines)
+    _BODY_CACHE[key] = body
+    if len(_BODY_CACHE) > _BODY_CACHE_SIZE:
+        _BODY_CACHE.popitem(last=False)
+    return body
+
+
+def _workout_version(workout: Workout) -> int:
+    """
+    Fingerprint of everything shown in a workout's body; changes whenever the workout is edited.
+    """
+    return hash((
+        workout.name,
+        workout.type,
+        workout.date,
+        tuple(
+            (ex.name, ex.type, ex.duration_minutes, ex.distance_mi,
+             tuple((s.reps, s.weight) for s in ex.sets or []))
+            for ex in workout.exercises or []
+        ),
+    ))
+
+
+def _period_key(workout_date: date, period: str) -> str:
+    """
+    Returns the key used by get_workout_period_summaries for the period containing workout_date.
+    """
+    if period == "week":
+        return (workout_date - timedelta(days=workout_date.weekday())).isoformat()
+    return workout_date.strftime("%Y-%m")
+
+
+def _period_label(key: str, period: str) -> str:
+    """
+    Human readable heading for a week or month key.
+    """
+    if period == "week":
+        return f"Week of {key}"
+    return date.fromisoformat(f"{key}-01").strftime("%B %Y")
@@ -4,8 +4,9 @@ import streamlit as st
 from frontend.timeline import show_timeline
 from frontend.add_workout import input_workout
 from frontend.templates import templates_page
-from backend.auth import login_user, signup_user
-from backend.db_fitness.workouts import get_all_workouts
+from frontend.diagnostics import diagnostics_page
+from backend.auth import login_user, signup_user, is_admin
+from backend.memory_profile import profile
 
 def run_session():
     """
@@ -61,6 +62,10 @@ def run_session():
 
     # Sidebar navigation
     page_options = ["Add Workout", "Templates", "Timeline"]
+    if is_admin(st.session_state.user):
+        page_options.append("Diagnostics")
+    if st.session_state.page not in page_options:
+        st.session_state.page = "Timeline"
     page = st.sidebar.selectbox(
         "📋 Navigation",
         page_options,
@@ -76,12 +81,16 @@ def run_session():
         st.rerun()
 
     # --- PAGE ROUTING ---
-    if st.session_state.page == "Timeline":
-        workouts = get_all_workouts(st.session_state.user)
-        show_timeline(workouts)
+    # Each page load is profiled when memory profiling is on (see backend/memory_profile.py)
+    with profile(f"page:{st.session_state.page}"):
+        if st.session_state.page == "Timeline":
+            show_timeline(st.session_state.user)
+
+        elif st.session_state.page == "Add Workout":
+            input_workout(st.session_state.user)
 
-    elif st.session_state.page == "Add Workout":
-        input_workout(st.session_state.user)
+        elif st.session_state.page == "Templates":
+            templates_page(st.session_state.user)
 
-    elif st.session_state.page == "Templates":
-        templates_page(st.session_state.user)
+        elif st.session_state.page == "Diagnostics":
+            diagnostics_page(st.session_state.user)